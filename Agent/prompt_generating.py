@@ -1,8 +1,14 @@
 import json
 import os
+import sys
 from difflib import SequenceMatcher
 from tqdm import tqdm  # 引入 tqdm 用于显示进度条
 
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'CodeGraph'))
+from graph_store import open_graph_store
+from graph_snapshot import open_graph_snapshot
+from node_link_json import iter_nodes
+
 def read_jsonl(file_path):
     """
     读取 JSONL 文件并将其解析为 Python 对象列表。
@@ -74,14 +80,20 @@ def find_closest_function_node(candidate_node, graph_data):
 def load_graph_data(graph_path):
     """
     加载指定路径下的代码图 JSON 文件，并返回其中的节点列表。
-    """
+    存在同名的图快照或图存储时只加载结构，节点的 code 在读取时才从 mmap 中解码。
+    """
+    snapshot = open_graph_snapshot(graph_path)
+    if snapshot is not None:
+        return snapshot.node_dicts()
+    store = open_graph_store(graph_path)
+    if store is not None:
+        return store.node_dicts()
     if not os.path.exists(graph_path):
         print(f"Graph file not found: {graph_path}")
         return []
     
-    with open(graph_path, 'r', encoding='utf-8') as file:
-        graph_json = json.load(file)
-        return graph_json.get("nodes", [])
+    # 只用到节点的 id 和 type：流式读取，不加载源码和边
+    return list(iter_nodes(graph_path, fields=("type",)))
 
 def check_node_in_graph(candidate_node, graph_data):
     """
@@ -1,4 +1,5 @@
 import os
+import sys
 import networkx as nx
 from tree_sitter import Parser, Language
 import tree_sitter_python as tspython
@@ -6,6 +7,9 @@ import json
 import re
 from typing import List, Dict, Any
 
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'CodeGraph'))
+from node_link_json import load_node_link_graph, save_node_link_json
+
 
 # 使用 Tree-sitter 解析代码
 def parse_code_with_treesitter(code):
@@ -16,8 +20,11 @@ def parse_code_with_treesitter(code):
     tree = parser.parse(bytes(code, "utf8"))
     return tree
 
-def get_involved_names(node_label: str, codegraph) -> Dict[str, str]:
+def get_involved_names(node_label: str, codegraph, hierarchy=None) -> Dict[str, str]:
     """get the related class and module name of the target node"""
+    if hierarchy is not None:
+        # 已建立的 HierarchyIndex：直接取各类型最外层的祖先
+        return hierarchy.involved_names(node_label)
     parts = node_label.split('.')
     result = {}
     for i in range(len(parts), 0, -1):
@@ -32,9 +39,19 @@ def get_involved_names(node_label: str, codegraph) -> Dict[str, str]:
                 result['function'] = current_prefix
     return result
 
+# 可能包含函数定义的节点类型，遍历时跳过表达式等其他子树
+FUNCTION_CONTAINERS = frozenset({
+    'module', 'class_definition', 'function_definition', 'decorated_definition', 'block',
+    'if_statement', 'elif_clause', 'else_clause', 'for_statement', 'while_statement',
+    'try_statement', 'except_clause', 'except_group_clause', 'finally_clause',
+    'with_statement', 'match_statement', 'case_clause', 'ERROR',
+})
+
+
 def replace_function_body(tree, code, target_function_name):
     """
     只替换目标函数体（block），不影响其他函数。
+    使用 TreeCursor 迭代做先序遍历，不会因为嵌套过深或同级语句过多而超出递归深度。
     :param tree: Tree-sitter 解析后的语法树
     :param code: 原始 Python 代码字符串
     :param target_function_name: 需要替换函数体的目标函数名
@@ -42,37 +59,40 @@ def replace_function_body(tree, code, target_function_name):
     """
     cursor = tree.walk()  # 获取 AST 游标
     updated_code = code
-
-    def visit_node(cursor):
-        nonlocal updated_code
-
-        # 如果节点是 'function_definition'
-        if cursor.node.type == 'function_definition':
-            function_id = cursor.node.child_by_field_name('name')
-            function_name = function_id.text.decode('utf-8')
-
-            # 仅替换目标函数的代码
-            if function_name == target_function_name:
-                # 找到函数体并替换
-                body_node = cursor.node.child_by_field_name('body')
-                if body_node:
-                    body_start_byte = body_node.start_byte
-                    body_end_byte = cursor.node.end_byte
-                    new_body = "<CODETOCOMPLETE>"
-
-                    # 更新代码：替换函数体
-                    updated_code = updated_code[:body_start_byte] + new_body + updated_code[body_end_byte:]
-
-        # 递归处理子节点
-        if cursor.goto_first_child():
-            visit_node(cursor)
-            cursor.goto_parent()  # 返回父节点
-
-        # 递归处理兄弟节点
-        while cursor.goto_next_sibling():
-            visit_node(cursor)
-
-    visit_node(cursor)  # 从根节点开始遍历
+    children_done = False
+
+    while True:
+        if not children_done:
+            node = cursor.node
+
+            # 如果节点是 'function_definition'
+            if node.type == 'function_definition':
+                function_id = node.child_by_field_name('name')
+                function_name = function_id.text.decode('utf-8')
+
+                # 仅替换目标函数的代码
+                if function_name == target_function_name:
+                    # 找到函数体并替换
+                    body_node = node.child_by_field_name('body')
+                    if body_node:
+                        body_start_byte = body_node.start_byte
+                        body_end_byte = node.end_byte
+                        new_body = "<CODETOCOMPLETE>"
+
+                        # 更新代码：替换函数体
+                        updated_code = updated_code[:body_start_byte] + new_body + updated_code[body_end_byte:]
+
+            # 进入可能包含函数定义的子节点
+            if node.type in FUNCTION_CONTAINERS and cursor.goto_first_child():
+                continue
+
+        # 处理兄弟节点，没有兄弟节点时回到父节点
+        if cursor.goto_next_sibling():
+            children_done = False
+        elif cursor.goto_parent():
+            children_done = True
+        else:
+            break
 
     return updated_code
 
@@ -92,18 +112,19 @@ def replace_code_in_node(node_id, node_data, function_name):
     return None
 
 
-def replace_groundtruth_code_with_treesitter(codegraph: nx.DiGraph, target_function: str):
+def replace_groundtruth_code_with_treesitter(codegraph: nx.DiGraph, target_function: str, hierarchy=None):
     """
     使用 Tree-sitter 替换目标函数、类和模块节点中的代码，将其函数体替换为 <CODETOCOMPLETE>。
     
     :param codegraph: NetworkX 图对象，包含代码节点
     :param target_function: 待补全的目标函数名称（如 'stellar.stellar.models.Table.get_table_name'）
+    :param hierarchy: 图的 HierarchyIndex，为 None 时按名称前缀查找所在的模块、类、函数
     :return: 返回被修改的节点
     """
     modified_nodes = set()
 
     # 获取目标函数、类、模块的相关节点
-    involved_names = get_involved_names(target_function, codegraph)
+    involved_names = get_involved_names(target_function, codegraph, hierarchy)
     function_name = target_function.split('.')[-1]  # 获取函数名
     
     # 替换函数节点代码
@@ -131,19 +152,14 @@ def replace_groundtruth_code_with_treesitter(codegraph: nx.DiGraph, target_funct
 
 # 加载 JSON 格式的 NetworkX 图
 def load_json_graph(path: str) -> nx.DiGraph:
-    """加载 JSON 文件并将其转换为 NetworkX DiGraph"""
-    with open(path, 'r') as f:
-        data = json.load(f)
-    graph = nx.node_link_graph(data)  # 使用 node-link 格式读取图
-    return graph
+    """加载 JSON 文件并将其转换为 NetworkX DiGraph（流式读取 node-link 格式，不需要先加载整个文件）"""
+    return load_node_link_graph(path)
 
 
 # 保存修改后的图为 JSON 文件
 def save_json_graph(graph: nx.DiGraph, path: str):
-    """将修改后的 NetworkX DiGraph 导出为 JSON 文件"""
-    graph_data = nx.node_link_data(graph)  # 将图转换为 node-link 格式
-    with open(path, 'w') as f:
-        json.dump(graph_data, f, indent=4)
+    """将修改后的 NetworkX DiGraph 导出为 JSON 文件（流式写出，与 json.dump(nx.node_link_data(graph), f, indent=4) 相同）"""
+    save_node_link_json(graph, path)
 
 
 if __name__ == "__main__":
@@ -20,6 +20,7 @@ os.environ['all_proxy'] = "socks5://127.0.0.1:7890"
 # 使用相对路径添加项目根目录到 Python 搜索路径
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
 sys.path.append(project_root)
+sys.path.append(os.path.join(project_root, 'CodeGraph'))
 
 import networkx as nx
 import json
@@ -33,6 +34,11 @@ from langchain_openai import ChatOpenAI
 import black
 from embedding.semantic_analyzer import SemanticAnalyzer
 from Agent.tools.model_server import start_model_server, stop_model_server, MODEL_SERVER_PORT
+from graph_store import open_graph_store
+from graph_snapshot import open_graph_snapshot
+from node_link_json import load_node_link_graph
+from edge_index import EdgeIndex
+from hierarchy_index import HierarchyIndex
 import atexit
 
 class CodeGraphToolsWrapper:
@@ -43,7 +49,10 @@ class CodeGraphToolsWrapper:
         :param target_function: 待替换 ground truth 的目标函数
         """
         self.graph_path = graph_path
+        self.hierarchy = None  # CONTAINS 树的层次索引，加载图时建立
         self.codegraph = self._load_and_process_graph(target_function)
+        # 按关系类型分开的邻接索引，调用关系查询只访问节点的邻居，不扫描所有边
+        self.edge_index = EdgeIndex.from_graph(self.codegraph)
         self.embeddings_path = self._get_embeddings_path()
         self.function_embeddings = self._load_or_create_embeddings()
         
@@ -101,22 +110,30 @@ class CodeGraphToolsWrapper:
         :param target_function: 需要替换的目标函数名称
         :return: 处理后的图数据
         """
-        if os.path.exists(self.graph_path):
-            with open(self.graph_path, 'r') as f:
-                data = json.load(f)
-            graph = nx.node_link_graph(data)
-            
-            # 调用 replace_data 来替换 ground truth
-            replace_groundtruth_code_with_treesitter(graph, target_function)
-            
-            return graph
+        # 优先使用同名的图快照（整个文件 mmap，不需要解析），其次是图存储：节点的 code 在读取时才从 mmap 中解码
+        snapshot = open_graph_snapshot(self.graph_path)
+        store = open_graph_store(self.graph_path) if snapshot is None else None
+        if snapshot is not None:
+            graph = snapshot.to_networkx()
+        elif store is not None:
+            graph = store.to_networkx()
+        elif os.path.exists(self.graph_path):
+            graph = load_node_link_graph(self.graph_path)  # 流式读取，不需要先把整个文件加载为字典
         else:
             raise FileNotFoundError(f"Code graph not found at {self.graph_path}")
 
+        # 父节点、按源码位置排序的兄弟节点和所在的模块、类、函数，在替换源码之前按原始源码建立
+        self.hierarchy = HierarchyIndex.from_graph(graph)
+
+        # 调用 replace_data 来替换 ground truth
+        replace_groundtruth_code_with_treesitter(graph, target_function, self.hierarchy)
+
+        return graph
+
     def get_context_above(self, node_label: str) -> Dict[str, Any]:
         """获取目标节点上文"""
-        target_node, parent_node = find_target_node_and_parent(self.codegraph, node_label)
-        context_above = get_context_siblings(self.codegraph, target_node, parent_node, "above")
+        target_node, parent_node = find_target_node_and_parent(self.codegraph, node_label, self.hierarchy)
+        context_above = get_context_siblings(self.codegraph, target_node, parent_node, "above", self.hierarchy)
         
         if context_above:
             return {"context_above": context_above}
@@ -125,8 +142,8 @@ class CodeGraphToolsWrapper:
 
     def get_context_below(self, node_label: str) -> Dict[str, Any]:
         """获取目标节点下文"""
-        target_node, parent_node = find_target_node_and_parent(self.codegraph, node_label)
-        context_below = get_context_siblings(self.codegraph, target_node, parent_node, "below")
+        target_node, parent_node = find_target_node_and_parent(self.codegraph, node_label, self.hierarchy)
+        context_below = get_context_siblings(self.codegraph, target_node, parent_node, "below", self.hierarchy)
         
         if context_below:
             return {"context_below": context_below}
@@ -135,34 +152,34 @@ class CodeGraphToolsWrapper:
 
     def get_import_statements(self, node_label: str) -> Dict[str, str]:
         """提取导入语句"""
-        module_node = find_module_ancestor(self.codegraph, node_label)
+        module_node = find_module_ancestor(self.codegraph, node_label, self.hierarchy)
         return {"import_statements": extract_import_statements(self.codegraph, module_node)}
 
     def get_involved_names(self, node_label: str) -> Dict[str, str]:
         """获取涉及的模块、类、方法等名称"""
-        return get_involved_names(node_label, self.codegraph)
+        return get_involved_names(node_label, self.codegraph, self.hierarchy)
 
     def find_one_hop_call_nodes(self, node_label: str) -> List[Dict[str, Any]]:
         """查找 one-hop 调用关系节点"""
         one_hop_nodes = []
-        for parent, child, edge_data in self.codegraph.edges(data=True):
-            if edge_data.get('relationship') == 'CALLS':
-                if parent == node_label:
-                    target_node_code = self.codegraph.nodes[child].get('code', 'No code available')
-                    one_hop_nodes.append({
-                        "relationship": "CALLS",
-                        "direction": "outgoing",
-                        "target_node": child,
-                        "target_node_code": target_node_code
-                    })
-                elif child == node_label:
-                    target_node_code = self.codegraph.nodes[parent].get('code', 'No code available')
-                    one_hop_nodes.append({
-                        "relationship": "CALLS",
-                        "direction": "incoming",
-                        "target_node": parent,
-                        "target_node_code": target_node_code
-                    })
+        for child in self.edge_index.callees(node_label):
+            target_node_code = self.codegraph.nodes[child].get('code', 'No code available')
+            one_hop_nodes.append({
+                "relationship": "CALLS",
+                "direction": "outgoing",
+                "target_node": child,
+                "target_node_code": target_node_code
+            })
+        for parent in self.edge_index.callers(node_label):
+            if parent == node_label:
+                continue  # 递归调用已经作为 outgoing 记录
+            target_node_code = self.codegraph.nodes[parent].get('code', 'No code available')
+            one_hop_nodes.append({
+                "relationship": "CALLS",
+                "direction": "incoming",
+                "target_node": parent,
+                "target_node_code": target_node_code
+            })
         return one_hop_nodes
 
     def get_node_info(self, node_label: str) -> Dict[str, Any]:
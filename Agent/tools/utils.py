@@ -1,30 +1,36 @@
 import networkx as nx
 import re
 from typing import List, Dict, Any
+from hierarchy_index import HierarchyIndex
 
 
 # 辅助函数: 获取目标节点和父节点
-def find_target_node_and_parent(codegraph: nx.DiGraph, node_label: str) -> (str, str):
-    """根据 node_label 定位目标节点和其父节点"""
+def find_target_node_and_parent(codegraph: nx.DiGraph, node_label: str, hierarchy: HierarchyIndex = None) -> (str, str):
+    """根据 node_label 定位目标节点和其父节点（CONTAINS 边的起点）"""
     if node_label not in codegraph.nodes:
         raise ValueError(f"未找到指定的目标节点: {node_label}")
-    
-    # 查找父节点
-    for parent, child, edge_data in codegraph.edges(data=True):
-        if edge_data.get('relationship') == 'CONTAINS' and child == node_label:
-            return child, parent  # 返回目标节点（child）和父节点
-    raise ValueError(f"未找到父节点 for {node_label}")
+
+    parent = _hierarchy_of(codegraph, hierarchy).parent(node_label)
+    if parent is None:
+        raise ValueError(f"未找到父节点 for {node_label}")
+    return node_label, parent  # 返回目标节点（child）和父节点
 
 
 # 辅助函数: 查找模块祖先节点
-def find_module_ancestor(codegraph: nx.DiGraph, node_label: str) -> str:
-    """递归查找目标节点的祖先模块节点"""
-    parts = node_label.split('.')
-    for i in range(len(parts), 0, -1):
-        current_prefix = '.'.join(parts[:i])
-        if current_prefix in codegraph.nodes and codegraph.nodes[current_prefix].get('type') == 'module':
-            return current_prefix
-    raise ValueError(f"未找到模块节点 (module) for {node_label}")
+def find_module_ancestor(codegraph: nx.DiGraph, node_label: str, hierarchy: HierarchyIndex = None) -> str:
+    """查找目标节点所在的模块节点（目标节点本身是模块时返回它自己）"""
+    module = _hierarchy_of(codegraph, hierarchy).nearest_ancestor(node_label, 'module')
+    if module is None:
+        raise ValueError(f"未找到模块节点 (module) for {node_label}")
+    return module
+
+
+def _hierarchy_of(codegraph: nx.DiGraph, hierarchy: HierarchyIndex = None) -> HierarchyIndex:
+    """
+    没有传入层次索引时临时建立一个（O(V + E)）。
+    多次查询同一个图时应在加载图后建立一次 HierarchyIndex 并传入，每次查询为 O(1) 或与兄弟节点个数成正比。
+    """
+    return hierarchy if hierarchy is not None else HierarchyIndex.from_graph(codegraph)
 
 
 # 辅助函数: 提取模块导入语句
@@ -48,57 +54,35 @@ def extract_import_statements(codegraph: nx.DiGraph, module_node: str) -> str:
 
 
 # 辅助函数: 获取上下文节点
-def get_context_siblings(codegraph: nx.DiGraph, target_node: str, parent_node: str, context_type: str) -> List[Dict[str, Any]]:
+def get_context_siblings(codegraph: nx.DiGraph, target_node: str, parent_node: str, context_type: str,
+                         hierarchy: HierarchyIndex = None) -> List[Dict[str, Any]]:
     """
-    获取目标节点的上下文节点，返回上下文列表。
+    获取目标节点的上下文节点，返回上下文列表。兄弟节点按在源码中的位置排序，而不是边的添加顺序。
     :param codegraph: NetworkX 图对象
     :param target_node: 当前节点
     :param parent_node: 父节点
     :param context_type: "above" 或 "below"，指定上下文的方向
+    :param hierarchy: 图的层次索引，为 None 时临时建立
     :return: 包含兄弟节点的上下文列表
     """
-    siblings = []
-    target_found = False
-    
-    # 获取父节点的所有子节点（兄弟节点）
-    for _, child, edge_data in codegraph.edges(parent_node, data=True):
-        if edge_data.get('relationship') == 'CONTAINS':
-            siblings.append(child)
-    
-    context_nodes = []
-    for sibling in siblings:
-        sibling_info = {'node_name': sibling, 'code': codegraph.nodes[sibling].get('code', 'No code available')}
-        
-        if sibling == target_node:
-            target_found = True
-            continue
-        
-        if context_type == "above" and not target_found:
-            context_nodes.append(sibling_info)
-        elif context_type == "below" and target_found:
-            context_nodes.append(sibling_info)
-
-    return context_nodes
+    siblings = _hierarchy_of(codegraph, hierarchy).ordered_children(parent_node)
+    if target_node in siblings:
+        position = siblings.index(target_node)
+        above, below = siblings[:position], siblings[position + 1:]
+    else:
+        above, below = siblings, []
+    siblings = above if context_type == "above" else below if context_type == "below" else []
+    return [{'node_name': sibling, 'code': codegraph.nodes[sibling].get('code', 'No code available')}
+            for sibling in siblings]
 
 
 # 辅助函数: 获取涉及的模块、类、方法等名称
-def get_involved_names(node_label: str, codegraph: nx.DiGraph) -> Dict[str, str]:
+def get_involved_names(node_label: str, codegraph: nx.DiGraph, hierarchy: HierarchyIndex = None) -> Dict[str, str]:
     """
     获取涉及的模块、类、方法的名称
     :param node_label: 目标节点的标签
     :param codegraph: NetworkX 图对象
-    :return: 包含模块、类和函数名称的字典
+    :param hierarchy: 图的层次索引，为 None 时临时建立
+    :return: 包含模块、类和函数名称的字典（各类型最外层的祖先，包含目标节点自身）
     """
-    parts = node_label.split('.')
-    result = {}
-    for i in range(len(parts), 0, -1):
-        current_prefix = '.'.join(parts[:i])
-        if current_prefix in codegraph.nodes:
-            node_type = codegraph.nodes[current_prefix].get('type')
-            if node_type == 'module':
-                result['module'] = current_prefix
-            elif node_type == 'class':
-                result['class'] = current_prefix
-            elif node_type == 'function':
-                result['function'] = current_prefix
-    return result
+    return _hierarchy_of(codegraph, hierarchy).involved_names(node_label)
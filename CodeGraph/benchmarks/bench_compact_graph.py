@@ -0,0 +1,136 @@
+"""
+对比两种代码图后端的内存占用和遍历耗时：
+  - digraph: CodeGraph，nx.DiGraph，节点全名为键，每个节点、每条边一个属性字典
+  - compact: CompactCodeGraph，整数编号，类型和关系为单字节数组，邻接为 CSR / CSC 数组
+
+内存为建图后保留的 Python 堆内存（tracemalloc，不含两者共用的 CONTAINS 树和源码）。遍历测试：
+  - contains:    从根节点沿 CONTAINS 边找出所有后代
+  - scan:  遍历所有节点的出边，统计 IMPORTS 边（代表按关系过滤的全图扫描）
+  - callers:     对每个节点查询指向它的 IMPORTS 边的起点
+  - nx.descendants: 在 get_graph() 上直接调用 networkx 算法（compact 为只读视图）
+遍历前调用 gc.freeze()，耗时不包含对解析器等长期对象的全量垃圾回收。
+图只包含 CONTAINS 和 IMPORTS 边（不需要语言服务器），并检查两种后端得到的节点、边是否一致。
+
+用法: python CodeGraph/benchmarks/bench_compact_graph.py <项目目录>
+"""
+import gc
+import os
+import sys
+import time
+import logging
+import tracemalloc
+import networkx as nx
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(current_dir))
+
+from parsers.repo_parser import RepoParser
+from code_graph import CodeGraph
+from compact_graph import CompactCodeGraph
+from module_classifier import ModuleClassifier
+
+REPEAT = 3
+
+
+def build(graph_class, repo_parser, classifier):
+    code_graph = graph_class(classifier)
+    code_graph.build_graph_from_tree(repo_parser.root)
+    for importer, imported_module in repo_parser.imports:
+        code_graph.add_import(importer, imported_module)
+    code_graph.get_graph()
+    return code_graph
+
+
+def digraph_contains(code_graph, root):
+    graph = code_graph.graph
+    seen = {root}
+    stack = [root]
+    while stack:
+        for target, data in graph._succ[stack.pop()].items():
+            if data.get('relationship') == "CONTAINS" and target not in seen:
+                seen.add(target)
+                stack.append(target)
+    return len(seen) - 1
+
+
+def compact_contains(code_graph, root):
+    return len(code_graph.descendant_ids(code_graph.ids[root], "CONTAINS"))
+
+
+def digraph_scan(code_graph, _):
+    return sum(1 for _, _, relationship in code_graph.graph.edges(data='relationship') if relationship == "IMPORTS")
+
+
+def compact_scan(code_graph, _):
+    code = code_graph.relationship_names.index("IMPORTS")
+    relationships, edges = code_graph.edge_relationships, code_graph.out_edges
+    return sum(1 for position in range(len(edges)) if relationships[edges[position]] == code)
+
+
+def digraph_callers(code_graph, _):
+    graph = code_graph.graph
+    return sum(1 for node in graph for _, data in graph._pred[node].items() if data.get('relationship') == "IMPORTS")
+
+
+def compact_callers(code_graph, _):
+    return sum(len(code_graph.predecessor_ids(node_id, "IMPORTS")) for node_id in range(len(code_graph.names)))
+
+
+def nx_descendants(code_graph, root):
+    return len(nx.descendants(code_graph.get_graph(), root))
+
+
+def measure(function, *args):
+    times = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        result = function(*args)
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main():
+    logging.disable(logging.CRITICAL)
+    project_path = os.path.abspath(sys.argv[1])
+    repo_name = os.path.basename(os.path.normpath(project_path))
+    repo_parser = RepoParser(project_path, repo_name)
+    repo_parser.parse()
+    classifier = ModuleClassifier(repo_parser.local_modules())
+    classifier.classify("")  # 先完成环境扫描，不计入建图的内存
+
+    graphs = {}
+    print(f"{'backend':>8} {'build (ms)':>11} {'memory (MB)':>12} {'bytes/elem':>11}")
+    for name, graph_class in (("digraph", CodeGraph), ("compact", CompactCodeGraph)):
+        elapsed, _ = measure(build, graph_class, repo_parser, classifier)
+        tracemalloc.start()
+        code_graph = build(graph_class, repo_parser, classifier)
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        graph = code_graph.get_graph()
+        elements = graph.number_of_nodes() + graph.number_of_edges()
+        graphs[name] = code_graph
+        print(f"{name:>8} {elapsed * 1000:>11.1f} {size / 1024 / 1024:>12.1f} {size / elements:>11.0f}")
+    digraph, compact = graphs["digraph"].get_graph(), graphs["compact"].get_graph()
+    # 解析器和两个图都是长期存活的对象，移出垃圾回收的追踪范围，遍历耗时不包含对它们的全量回收
+    gc.collect()
+    gc.freeze()
+    print(f"节点: {digraph.number_of_nodes()}, 边: {digraph.number_of_edges()}")
+
+    print(f"{'traversal':>15} {'digraph (ms)':>13} {'compact (ms)':>13}")
+    for name, digraph_function, compact_function in (
+            ("contains", digraph_contains, compact_contains),
+            ("scan", digraph_scan, compact_scan),
+            ("callers", digraph_callers, compact_callers),
+            ("nx.descendants", nx_descendants, nx_descendants)):
+        digraph_time, digraph_result = measure(digraph_function, graphs["digraph"], repo_name)
+        compact_time, compact_result = measure(compact_function, graphs["compact"], repo_name)
+        mark = "" if digraph_result == compact_result else f"  警告: 结果不一致 {digraph_result} != {compact_result}"
+        print(f"{name:>15} {digraph_time * 1000:>13.1f} {compact_time * 1000:>13.1f}{mark}")
+
+    same = (list(digraph.nodes) == list(compact.nodes)
+            and sorted(digraph.edges(data='relationship')) == sorted(compact.edges(data='relationship')))
+    print("结果一致" if same else "警告: 节点或边不一致")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+对比 LSP 定义结果转换为 namespace 的两种方式：
+  - legacy: 每次命中都重新读取、解析定义文件（旧版 _get_fullname_from_definition 的做法）
+  - cached: 定义文件语法树和 namespace 的 LRU 缓存（DefinitionFileCache）
+
+定义位置取自项目中的函数、类定义，并按调用频率的长尾分布重复（少数热门定义被反复命中），
+不需要启动语言服务器。
+
+用法: python CodeGraph/benchmarks/bench_definition_cache.py <项目目录> [查询次数]
+"""
+import os
+import sys
+import time
+import random
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(current_dir))
+
+from parsers.call_parser import CallParser
+from parsers.source_buffer import SourceBuffer
+from parsers.queries import DEFINITION_QUERY, ordered_matches
+
+
+class LegacyCallParser(CallParser):
+    def _get_fullname_from_definition(self, definition):
+        definition = definition[0]
+        def_file_path = os.path.abspath(definition['uri'].replace('file://', ''))
+        start = definition['range']['start']
+        end = definition['range']['end']
+        def_source = SourceBuffer.from_file(def_file_path)
+        tree = self.parser.parse(def_source.data)
+        target_node = tree.root_node.descendant_for_point_range(
+            (start['line'], start['character']), (end['line'], end['character']))
+        if not target_node:
+            return None
+        return self._build_namespace_from_node(target_node, def_source)
+
+
+def collect_definitions(project_path, parser):
+    definitions = []
+    for root, _, files in os.walk(project_path):
+        for name in files:
+            if not name.endswith(".py"):
+                continue
+            file_path = os.path.abspath(os.path.join(root, name))
+            try:
+                source = SourceBuffer.from_file(file_path)
+            except (OSError, UnicodeDecodeError):
+                continue
+            tree = parser.parse(source.data)
+            for _, _, captures in ordered_matches(DEFINITION_QUERY, tree.root_node):
+                if 'name' not in captures:
+                    continue
+                name_node = captures['name'][0]
+                definitions.append([{
+                    'uri': f"file://{file_path}",
+                    'range': {
+                        'start': {'line': name_node.start_point[0], 'character': name_node.start_point[1]},
+                        'end': {'line': name_node.end_point[0], 'character': name_node.end_point[1]},
+                    },
+                }])
+    return definitions
+
+
+def run(call_parser, queries):
+    start = time.perf_counter()
+    namespaces = [call_parser._get_fullname_from_definition(definition) for definition in queries]
+    return time.perf_counter() - start, namespaces
+
+
+def main():
+    project_path = os.path.abspath(sys.argv[1])
+    num_queries = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    repo_name = os.path.basename(os.path.normpath(project_path))
+
+    legacy = LegacyCallParser(project_path, repo_name, None, {})
+    cached = CallParser(project_path, repo_name, None, {})
+    definitions = collect_definitions(project_path, cached.parser)
+    random.seed(0)
+    # 长尾分布：排在前面的定义被查询的概率更高
+    weights = [1.0 / (rank + 1) for rank in range(len(definitions))]
+    queries = random.choices(definitions, weights=weights, k=num_queries)
+    print(f"定义数: {len(definitions)}, 查询次数: {num_queries}")
+
+    legacy_time, legacy_namespaces = run(legacy, queries)
+    cached_time, cached_namespaces = run(cached, queries)
+    print(f"{'mode':>8} {'time (s)':>10} {'us/query':>10}")
+    print(f"{'legacy':>8} {legacy_time:>10.3f} {legacy_time / num_queries * 1e6:>10.1f}")
+    print(f"{'cached':>8} {cached_time:>10.3f} {cached_time / num_queries * 1e6:>10.1f}")
+    print("结果一致" if legacy_namespaces == cached_namespaces else "警告: 结果不一致")
+    print("缓存统计:", cached.cache_stats())
+
+
+if __name__ == "__main__":
+    main()
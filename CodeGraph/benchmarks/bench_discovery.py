@@ -0,0 +1,78 @@
+"""
+对比原来三个解析器各自遍历项目目录的开销与统一发现阶段（FileDiscovery，一次 os.scandir 遍历）的开销：
+  - contains: os.listdir + os.path.isdir 递归（ContainsParser._build_tree 原来的方式）
+  - imports:  os.walk 收集 .py 文件（ImportParser._get_py_files 原来的方式）
+  - calls:    os.walk，并打开每个文件读取一个字符（CallParser._get_py_files 原来的方式）
+  - discovery: FileDiscovery.scan，同时得到文件大小、修改时间，并应用 .gitignore 和默认排除规则
+
+用法: python CodeGraph/benchmarks/bench_discovery.py <项目目录>
+"""
+import os
+import sys
+import time
+import logging
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(current_dir))
+
+from parsers.discovery import FileDiscovery
+
+REPEAT = 5
+
+
+def walk_contains(path, files):
+    for item in os.listdir(path):
+        item_path = os.path.join(path, item)
+        if os.path.isdir(item_path):
+            walk_contains(item_path, files)
+        elif item.endswith(".py"):
+            files.append(item_path)
+    return files
+
+
+def walk_imports(path):
+    return [os.path.join(root, file) for root, _, files in os.walk(path) for file in files if file.endswith(".py")]
+
+
+def walk_calls(path):
+    py_files = []
+    for root, _, files in os.walk(path):
+        for file in files:
+            if file.endswith(".py"):
+                file_path = os.path.join(root, file)
+                try:
+                    with open(file_path, "r", encoding="utf-8") as f:
+                        f.read(1)
+                    py_files.append(file_path)
+                except Exception:
+                    pass
+    return py_files
+
+
+def measure(function):
+    times = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main():
+    logging.disable(logging.CRITICAL)
+    project_path = os.path.abspath(sys.argv[1])
+    print(f"{'walker':>10} {'time (ms)':>10} {'files':>7}")
+    total = 0
+    for name, function in (("contains", lambda: walk_contains(project_path, [])),
+                           ("imports", lambda: walk_imports(project_path)),
+                           ("calls", lambda: walk_calls(project_path))):
+        elapsed, files = measure(function)
+        total += elapsed
+        print(f"{name:>10} {elapsed * 1000:>10.1f} {len(files):>7}")
+    print(f"{'(sum)':>10} {total * 1000:>10.1f}")
+    elapsed, manifest = measure(lambda: FileDiscovery(project_path).scan())
+    print(f"{'discovery':>10} {elapsed * 1000:>10.1f} {len(manifest.files):>7}  (跳过 {len(manifest.skipped)} 个文件)")
+
+
+if __name__ == "__main__":
+    main()
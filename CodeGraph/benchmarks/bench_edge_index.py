@@ -0,0 +1,101 @@
+"""
+对比按关系查询邻居的两种方式（对每个函数节点各查询一次）：
+  - scan:  原来 Agent 工具的做法，遍历图中所有边，按 edge_data['relationship'] 和端点过滤，O(E)
+  - index: EdgeIndex（CodeGraph.edge_index），按关系分开的双向邻接索引，O(度数)
+查询为 "X 调用了谁"、"谁调用了 X"，以及对每个模块节点查询 "谁导入了 M"。
+
+同时统计同一对节点之间有多种关系的边数：原来的 DiGraph 中这些边只保留最后添加的一种关系。
+调用关系由 jedi 后端解析（需要安装 jedi），超过时间预算后剩余调用点改用静态推测。
+
+用法: python CodeGraph/benchmarks/bench_edge_index.py <项目目录> [查询的节点数] [解析预算（秒）]
+"""
+import os
+import sys
+import time
+import logging
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(current_dir))
+
+from parsers.repo_parser import RepoParser
+from code_graph import CodeGraph
+from module_classifier import ModuleClassifier
+from lsp_client import create_resolver, RequestPolicy
+
+
+def build(project_path, budget):
+    repo_name = os.path.basename(os.path.normpath(project_path))
+    repo_parser = RepoParser(project_path, repo_name)
+    repo_parser.parse()
+    code_graph = CodeGraph(ModuleClassifier(repo_parser.local_modules()))
+    code_graph.build_graph_from_tree(repo_parser.root)
+    for importer, imported_module in repo_parser.imports:
+        code_graph.add_import(importer, imported_module)
+    policy = RequestPolicy(total_budget=budget)
+    with create_resolver(project_path, "jedi", size=1, policy=policy) as resolver:
+        for caller, callee in repo_parser.resolve_calls(code_graph, resolver):
+            code_graph.add_call(caller, callee, **repo_parser.call_attributes(caller, callee))
+    return code_graph
+
+
+def scan_calls(graph, node):
+    outgoing, incoming = [], []
+    for source, target, data in graph.edges(data=True):
+        if data.get('relationship') == 'CALLS':
+            if source == node:
+                outgoing.append(target)
+            elif target == node:
+                incoming.append(source)
+    return outgoing, incoming
+
+
+def scan_importers(graph, node):
+    return [source for source, target, data in graph.edges(data=True)
+            if data.get('relationship') == 'IMPORTS' and target == node]
+
+
+def index_calls(edge_index, node):
+    return edge_index.callees(node), [caller for caller in edge_index.callers(node) if caller != node]
+
+
+def main():
+    logging.disable(logging.CRITICAL)
+    project_path = os.path.abspath(sys.argv[1])
+    limit = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    budget = float(sys.argv[3]) if len(sys.argv) > 3 else 60.0
+    code_graph = build(project_path, budget)
+    graph, edge_index = code_graph.graph, code_graph.edge_index
+    typed = edge_index.number_of_edges()
+    print(f"节点: {graph.number_of_nodes()}, DiGraph 边: {graph.number_of_edges()}, 带关系的边: {typed}")
+    for relationship in edge_index.outgoing:
+        print(f"  {relationship:>8}: {edge_index.number_of_edges(relationship)}")
+    shared = sum(1 for _, _, data in graph.edges(data=True) if 'relationships' in data)
+    print(f"有多种关系的节点对: {shared}（原来的 DiGraph 会丢失 {typed - graph.number_of_edges()} 条边）")
+
+    functions = [node for node, data in graph.nodes(data=True) if data.get('type') == 'function'][:limit]
+    modules = [node for node, data in graph.nodes(data=True) if data.get('type') == 'module'][:limit]
+    print(f"{'query':>10} {'nodes':>6} {'scan (ms)':>10} {'index (ms)':>11}")
+    for name, nodes, scan, lookup in (
+            ("calls", functions, lambda node: scan_calls(graph, node), lambda node: index_calls(edge_index, node)),
+            ("importers", modules, lambda node: scan_importers(graph, node), edge_index.importers)):
+        start = time.perf_counter()
+        expected = [scan(node) for node in nodes]
+        scan_time = time.perf_counter() - start
+        start = time.perf_counter()
+        results = [lookup(node) for node in nodes]
+        index_time = time.perf_counter() - start
+        # scan 只能看到 DiGraph 中保留下来的关系，index 的结果应包含它
+        covered = all(_contains(found, scanned) for scanned, found in zip(expected, results))
+        mark = "" if covered else "  警告: 结果不一致"
+        print(f"{name:>10} {len(nodes):>6} {scan_time * 1000:>10.1f} {index_time * 1000:>11.2f}{mark}")
+
+
+def _contains(found, scanned):
+    """found 的每一组邻居都包含 scanned 中对应的一组（结果为 (出边, 入边) 或一个邻居列表）"""
+    if not isinstance(found, tuple):
+        found, scanned = (found,), (scanned,)
+    return all(set(part) <= set(found_part) for part, found_part in zip(scanned, found))
+
+
+if __name__ == "__main__":
+    main()
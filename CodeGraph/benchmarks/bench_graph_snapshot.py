@@ -0,0 +1,128 @@
+"""
+对比三种保存格式的文件大小和加载耗时：
+  - json:      export_graph_to_json 写出的 node-link JSON（indent=4），json.load + nx.node_link_graph
+  - store:     图存储（结构 JSON + 源码文件 mmap），GraphStore 加载结构后转换为 CodeDiGraph
+  - snapshot:  二进制图快照，整个文件 mmap
+
+加载方式：
+  - open:   只打开文件，得到可以查询的对象（json 与 nx 相同，store 为 GraphStore，snapshot 为 GraphSnapshot）
+  - nx:     转换为 networkx 图（Agent 工具的加载方式）
+  - nodes:  节点字典列表（prompt 生成的加载方式）
+  - lookup: 打开后查询抽样节点的后继（snapshot 在映射上二分查找，不转换整个图）
+同时检查快照加载的图与 JSON 加载的图是否一致。
+
+用法: python CodeGraph/benchmarks/bench_graph_snapshot.py <项目目录>
+"""
+import os
+import sys
+import json
+import time
+import logging
+import tempfile
+import networkx as nx
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(current_dir))
+
+from parsers.repo_parser import RepoParser
+from code_graph import CodeGraph
+from module_classifier import ModuleClassifier
+from graph_store import GraphStore, save_graph_store, store_paths
+from graph_snapshot import GraphSnapshot, save_graph_snapshot, snapshot_path
+
+REPEAT = 3
+LOOKUPS = 100
+
+
+def load_json(path):
+    with open(path, 'r') as f:
+        data = json.load(f)
+    return nx.node_link_graph(data, edges="links")
+
+
+def load_json_nodes(path):
+    with open(path, 'r') as f:
+        return json.load(f)["nodes"]
+
+
+def lookup_json(path, names):
+    graph = load_json(path)
+    return [list(graph.successors(name)) for name in names]
+
+
+def lookup_store(path, names):
+    graph = GraphStore(path).to_networkx()
+    return [list(graph.successors(name)) for name in names]
+
+
+def lookup_snapshot(path, names):
+    snapshot = GraphSnapshot(path)
+    return [snapshot.successors(name) for name in names]
+
+
+def measure(function, *args):
+    times = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        function(*args)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    logging.disable(logging.CRITICAL)
+    project_path = os.path.abspath(sys.argv[1])
+    repo_name = os.path.basename(os.path.normpath(project_path))
+    repo_parser = RepoParser(project_path, repo_name)
+    repo_parser.parse()
+    code_graph = CodeGraph(ModuleClassifier(repo_parser.local_modules()))
+    code_graph.build_graph_from_tree(repo_parser.root)
+    for importer, imported_module in repo_parser.imports:
+        code_graph.add_import(importer, imported_module)
+    graph = code_graph.graph
+    names = list(graph)[::max(1, len(graph) // LOOKUPS)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, f"{repo_name}.json")
+        start = time.perf_counter()
+        with open(json_path, 'w') as f:
+            json.dump(nx.node_link_data(graph, edges="links"), f, indent=4)
+        json_save = time.perf_counter() - start
+        start = time.perf_counter()
+        save_graph_store(graph, json_path)
+        store_save = time.perf_counter() - start
+        start = time.perf_counter()
+        save_graph_snapshot(graph, json_path)
+        snapshot_save = time.perf_counter() - start
+        meta_path, code_path = store_paths(json_path)
+        snapshot_file = snapshot_path(json_path)
+
+        print(f"节点: {graph.number_of_nodes()}, 边: {graph.number_of_edges()}")
+        print(f"{'format':>9} {'size (MB)':>10} {'save (ms)':>10}")
+        for name, size, elapsed in (
+                ("json", os.path.getsize(json_path), json_save),
+                ("store", os.path.getsize(meta_path) + os.path.getsize(code_path), store_save),
+                ("snapshot", os.path.getsize(snapshot_file), snapshot_save)):
+            print(f"{name:>9} {size / 1024 / 1024:>10.1f} {elapsed * 1000:>10.1f}")
+
+        print(f"{'format':>9} {'open (ms)':>10} {'nx (ms)':>10} {'nodes (ms)':>11} {'lookup (ms)':>12}")
+        for name, path, open_function, nx_function, nodes_function, lookup_function in (
+                ("json", json_path, load_json, load_json, load_json_nodes, lookup_json),
+                ("store", meta_path, GraphStore, lambda path: GraphStore(path).to_networkx(),
+                 lambda path: GraphStore(path).node_dicts(), lookup_store),
+                ("snapshot", snapshot_file, GraphSnapshot, lambda path: GraphSnapshot(path).to_networkx(),
+                 lambda path: GraphSnapshot(path).node_dicts(), lookup_snapshot)):
+            times = [measure(function, path) for function in (open_function, nx_function, nodes_function)]
+            times.append(measure(lookup_function, path, names))
+            print(f"{name:>9} {times[0] * 1000:>10.1f} {times[1] * 1000:>10.1f} {times[2] * 1000:>11.1f} {times[3] * 1000:>12.1f}")
+
+        expected = load_json(json_path)
+        with GraphSnapshot(snapshot_file) as snapshot:
+            loaded = snapshot.to_networkx()
+            same = (nx.node_link_data(expected, edges="links") == nx.node_link_data(loaded, edges="links")
+                    and lookup_json(json_path, names) == lookup_snapshot(snapshot_file, names))
+            print("结果一致" if same else "警告: 结果不一致")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+对比两种保存格式打开代码图的耗时和 Python 堆内存峰值（tracemalloc，不含 mmap 映射的页）：
+  - json:       json.load + nx.node_link_graph，所有节点的 code 文本都被加载
+  - store:      GraphStore 加载结构文件，源码文件只读映射
+  - store+nx:   GraphStore 并转换为 CodeDiGraph（Agent 工具使用的方式），code 在读取时才解码
+
+图只包含 CONTAINS 和 IMPORTS 边（不需要语言服务器）。同时检查两种格式加载出的节点属性和边是否一致。
+
+用法: python CodeGraph/benchmarks/bench_graph_store.py <项目目录>
+"""
+import os
+import sys
+import json
+import time
+import logging
+import tempfile
+import tracemalloc
+import networkx as nx
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(current_dir))
+
+from parsers.repo_parser import RepoParser
+from code_graph import CodeGraph
+from graph_store import GraphStore, save_graph_store, store_paths
+
+REPEAT = 3
+
+
+def load_json(path):
+    with open(path, 'r') as f:
+        data = json.load(f)
+    return nx.node_link_graph(data, edges="links")
+
+
+def open_store(path):
+    return GraphStore(path)
+
+
+def open_store_graph(path):
+    return GraphStore(path).to_networkx()
+
+
+def measure(loader, path):
+    """返回 (最短耗时, 堆内存峰值)"""
+    times = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        loader(path)
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    result = loader(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return min(times), peak
+
+
+def main():
+    logging.disable(logging.CRITICAL)
+    project_path = os.path.abspath(sys.argv[1])
+    repo_name = os.path.basename(os.path.normpath(project_path))
+    repo_parser = RepoParser(project_path, repo_name)
+    repo_parser.parse()
+    code_graph = CodeGraph()
+    code_graph.build_graph_from_tree(repo_parser.root)
+    for importer, imported_module in repo_parser.imports:
+        code_graph.add_import(importer, imported_module)
+    graph = code_graph.graph
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, f"{repo_name}.json")
+        with open(json_path, 'w') as f:
+            json.dump(nx.node_link_data(graph, edges="links"), f, indent=4)
+        save_graph_store(graph, json_path)
+        meta_path, code_path = store_paths(json_path)
+        print(f"节点: {graph.number_of_nodes()}, 边: {graph.number_of_edges()}")
+        print(f"json: {os.path.getsize(json_path) / 1024 / 1024:.1f} MB, "
+              f"store: {os.path.getsize(meta_path) / 1024 / 1024:.1f} MB 结构 + "
+              f"{os.path.getsize(code_path) / 1024 / 1024:.1f} MB 源码")
+
+        print(f"{'format':>10} {'open (ms)':>10} {'peak (MB)':>10}")
+        for name, loader, path in (("json", load_json, json_path),
+                                   ("store", open_store, meta_path),
+                                   ("store+nx", open_store_graph, meta_path)):
+            elapsed, peak = measure(loader, path)
+            print(f"{name:>10} {elapsed * 1000:>10.1f} {peak / 1024 / 1024:>10.1f}")
+
+        expected = load_json(json_path)
+        with GraphStore(meta_path) as store:
+            loaded = store.to_networkx()
+            same = (dict(expected.nodes(data=True)) == {node: dict(attributes) for node, attributes in loaded.nodes(data=True)}
+                    and sorted(expected.edges(data=True)) == sorted(loaded.edges(data=True)))
+            print("结果一致" if same else "警告: 结果不一致")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+对比 Agent 工具查询 CONTAINS 层次结构的两种方式（对抽样的函数节点各查询一次）：
+  - scan:  原来 Agent/tools/utils 的做法，遍历所有边找父节点和兄弟节点，逐级拼接名称前缀找所在的模块、类、函数
+  - index: HierarchyIndex，加载图时建立的父节点、按源码位置排序的子节点和各类型祖先
+查询为 Agent 工具的 get_context_above / get_context_below / get_import_statements / get_involved_names 所需的
+父节点、上下文兄弟节点、模块祖先和涉及的名称。图经过 node-link JSON 往返（与 Agent 加载图的方式相同）。
+输出两种方式的耗时、建立索引的耗时，以及兄弟节点的顺序（边的顺序 / 源码位置）不同的父节点个数。
+
+用法: python CodeGraph/benchmarks/bench_hierarchy_index.py <项目目录> [查询的节点数]
+"""
+import os
+import sys
+import json
+import time
+import logging
+import networkx as nx
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(current_dir))
+
+from parsers.repo_parser import RepoParser
+from code_graph import CodeGraph
+from module_classifier import ModuleClassifier
+from hierarchy_index import HierarchyIndex
+
+
+def load_graph(project_path):
+    repo_name = os.path.basename(os.path.normpath(project_path))
+    repo_parser = RepoParser(project_path, repo_name)
+    repo_parser.parse()
+    code_graph = CodeGraph(ModuleClassifier(repo_parser.local_modules()))
+    code_graph.build_graph_from_tree(repo_parser.root)
+    for importer, imported_module in repo_parser.imports:
+        code_graph.add_import(importer, imported_module)
+    data = json.loads(json.dumps(nx.node_link_data(code_graph.graph, edges="links")))
+    return nx.node_link_graph(data, edges="links")
+
+
+def scan_query(graph, node):
+    """原来的 find_target_node_and_parent + get_context_siblings + find_module_ancestor + get_involved_names"""
+    parent = next(source for source, target, data in graph.edges(data=True)
+                  if data.get('relationship') == 'CONTAINS' and target == node)
+    siblings = [child for _, child, data in graph.edges(parent, data=True) if data.get('relationship') == 'CONTAINS']
+    position = siblings.index(node)
+    parts = node.split('.')
+    names = {}
+    for i in range(len(parts), 0, -1):
+        prefix = '.'.join(parts[:i])
+        if prefix in graph.nodes and graph.nodes[prefix].get('type') in ('module', 'class', 'function'):
+            names[graph.nodes[prefix]['type']] = prefix
+    return parent, siblings[:position], siblings[position + 1:], names.get('module'), names
+
+
+def index_query(hierarchy, node):
+    above, below = hierarchy.siblings(node)
+    return hierarchy.parent(node), above, below, hierarchy.nearest_ancestor(node, 'module'), hierarchy.involved_names(node)
+
+
+def main():
+    logging.disable(logging.CRITICAL)
+    project_path = os.path.abspath(sys.argv[1])
+    limit = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    graph = load_graph(project_path)
+    print(f"节点: {graph.number_of_nodes()}, 边: {graph.number_of_edges()}")
+
+    start = time.perf_counter()
+    hierarchy = HierarchyIndex.from_graph(graph)
+    print(f"建立索引: {(time.perf_counter() - start) * 1000:.1f} ms, {len(hierarchy)} 个节点")
+
+    functions = [node for node, data in graph.nodes(data=True) if data.get('type') == 'function']
+    functions = functions[::max(1, len(functions) // limit)][:limit]
+    start = time.perf_counter()
+    expected = [scan_query(graph, node) for node in functions]
+    scan_time = time.perf_counter() - start
+    start = time.perf_counter()
+    results = [index_query(hierarchy, node) for node in functions]
+    index_time = time.perf_counter() - start
+    print(f"{'method':>8} {'nodes':>6} {'time (ms)':>10}")
+    print(f"{'scan':>8} {len(functions):>6} {scan_time * 1000:>10.1f}")
+    print(f"{'index':>8} {len(functions):>6} {index_time * 1000:>10.2f}")
+
+    # 父节点和模块应一致；兄弟节点的集合一致，顺序可能因按源码位置排序而不同
+    same = all(old[0] == new[0] and old[3] == new[3] and set(old[1] + old[2]) == set(new[1] + new[2])
+               for old, new in zip(expected, results))
+    reordered = sum(1 for parent, children in hierarchy.children.items()
+                    if children != [child for _, child, data in graph.edges(parent, data=True)
+                                    if data.get('relationship') == 'CONTAINS'])
+    print("结果一致" if same else "警告: 结果不一致")
+    print(f"兄弟节点顺序与边的顺序不同的父节点: {reordered} / {len(hierarchy.children)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+对比 LSP 定义请求的两种发送方式：
+  - sequential: 逐个调用 find_definition，每个请求等待上一个返回
+  - pipelined: find_definitions 并发发送，同时在途的请求数不超过窗口大小
+
+请求取自项目中需要 LSP 消歧的调用点（同名定义不止一个的调用）。需要可用的 multilspy 语言服务器。
+
+用法: python CodeGraph/benchmarks/bench_lsp_pipeline.py <项目目录> [最多请求数]
+"""
+import os
+import sys
+import time
+import logging
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(current_dir))
+
+from parsers.repo_parser import RepoParser
+from lsp_client import LspClientWrapper
+
+WINDOWS = [4, 16, 64]
+
+
+def collect_requests(project_path, limit):
+    repo_parser = RepoParser(project_path, os.path.basename(os.path.normpath(project_path)))
+    repo_parser.parse()
+    call_parser = repo_parser.call_parser
+    requests = []
+    for call_site in call_parser.call_sites:
+        _, lookup = call_parser._handle_call(call_site)
+        if lookup is not None:
+            position = lookup[0]
+            requests.append((call_site.file_path, position[0], position[1]))
+    return requests[:limit]
+
+
+def normalized(result):
+    # 有多个定义位置时语言服务器返回的顺序不固定，比较前先排序
+    if not result:
+        return result
+    return sorted((item['uri'], item['range']['start']['line'], item['range']['start']['character'])
+                  for item in result)
+
+
+def main():
+    logging.disable(logging.WARNING)
+    project_path = os.path.abspath(sys.argv[1])
+    limit = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    requests = collect_requests(project_path, limit)
+    print(f"LSP 请求数: {len(requests)}")
+
+    lsp_client = LspClientWrapper(project_path)
+    lsp_client.start_server()
+    try:
+        # 预热：语言服务器首次分析项目的开销不计入结果
+        list(lsp_client.find_definitions(requests[:20]))
+
+        start = time.perf_counter()
+        expected = [normalized(lsp_client.find_definition(*request)) for request in requests]
+        sequential = time.perf_counter() - start
+        print(f"{'mode':>12} {'window':>7} {'time (s)':>10} {'req/s':>8} {'same':>6}")
+        print(f"{'sequential':>12} {1:>7} {sequential:>10.2f} {len(requests) / sequential:>8.1f} {'-':>6}")
+
+        for window in WINDOWS:
+            results = [None] * len(requests)
+            start = time.perf_counter()
+            for index, result in lsp_client.find_definitions(requests, max_in_flight=window):
+                results[index] = normalized(result)
+            elapsed = time.perf_counter() - start
+            print(f"{'pipelined':>12} {window:>7} {elapsed:>10.2f} {len(requests) / elapsed:>8.1f} "
+                  f"{str(results == expected):>6}")
+    finally:
+        lsp_client.stop_server()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+对比不同大小的语言服务器池（LspPool）完成同一批定义请求的耗时。
+请求按文件分片到池中的各个服务器，每个服务器同时在途的请求数相同。
+请求取自项目中需要 LSP 消歧的调用点，结果与单个服务器的结果比较。需要可用的 multilspy 语言服务器。
+
+用法: python CodeGraph/benchmarks/bench_lsp_pool.py <项目目录> [最多请求数] [池大小,...]
+"""
+import os
+import sys
+import time
+import logging
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(current_dir))
+
+from lsp_client import LspPool, default_pool_size
+from bench_lsp_pipeline import collect_requests, normalized
+
+
+def run(project_path, requests, size):
+    with LspPool(project_path, size=size) as pool:
+        # 预热：每个服务器首次分析项目的开销不计入结果
+        list(pool.find_definitions(requests[:20 * size]))
+        results = [None] * len(requests)
+        start = time.perf_counter()
+        for index, result in pool.find_definitions(requests):
+            results[index] = normalized(result)
+        return time.perf_counter() - start, results
+
+
+def main():
+    logging.disable(logging.WARNING)
+    project_path = os.path.abspath(sys.argv[1])
+    limit = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    if len(sys.argv) > 3:
+        sizes = [int(size) for size in sys.argv[3].split(",")]
+    else:
+        sizes = sorted({1, 2, 4, default_pool_size()})
+    requests = collect_requests(project_path, limit)
+    print(f"LSP 请求数: {len(requests)}, 默认池大小: {default_pool_size()}")
+
+    print(f"{'size':>6} {'time (s)':>10} {'req/s':>8} {'same':>6}")
+    expected = None
+    for size in sizes:
+        elapsed, results = run(project_path, requests, size)
+        if expected is None:
+            expected = results
+        print(f"{size:>6} {elapsed:>10.2f} {len(requests) / elapsed:>8.1f} {str(results == expected):>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+对比添加 IMPORTS 边的两种方式（对项目中的每一条 import 关系各处理一次）：
+  - string: 原来的 CodeGraph.add_import，被导入的文本与节点全名按字符串匹配，匹配不上时创建虚拟节点
+  - index:  ModuleIndex，从 CONTAINS 树建立的导入路径索引，解析相对导入，指向项目内的模块、类或函数节点
+
+输出建立索引和处理全部 import 的耗时，指向项目内节点的 IMPORTS 边数，以及为项目内导入创建的虚拟节点
+（类型为 local_module，或名称以 '.' 开头、以项目名开头的节点）个数。
+
+用法: python CodeGraph/benchmarks/bench_module_index.py <项目目录>
+"""
+import os
+import sys
+import time
+import logging
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(current_dir))
+
+from parsers.repo_parser import RepoParser
+from code_graph import CodeGraph
+from module_classifier import ModuleClassifier, LOCAL
+from module_index import ModuleIndex
+
+
+def add_import_by_string(code_graph, importer_fullname, imported_fullname):
+    """原来的 add_import"""
+    if imported_fullname not in code_graph.graph:
+        module_type = code_graph.module_classifier.classify(imported_fullname)
+        code_graph.graph.add_node(imported_fullname, type=module_type, code=None, signature=None)
+    if importer_fullname in code_graph.graph:
+        code_graph.graph.add_edge(importer_fullname, imported_fullname, relationship="IMPORTS")
+
+
+def summarize(code_graph, tree_nodes, repo_name):
+    graph = code_graph.graph
+    in_repo = sum(1 for _, target, data in graph.edges(data=True)
+                  if data.get('relationship') == "IMPORTS" and target in tree_nodes)
+    phantoms = [node for node, data in graph.nodes(data=True)
+                if node not in tree_nodes and (data.get('type') == LOCAL or node.startswith('.')
+                                               or node.split('.')[0] == repo_name)]
+    return in_repo, phantoms
+
+
+def main():
+    logging.disable(logging.CRITICAL)
+    project_path = os.path.abspath(sys.argv[1])
+    repo_name = os.path.basename(os.path.normpath(project_path))
+    repo_parser = RepoParser(project_path, repo_name)
+    repo_parser.parse()
+    imports = repo_parser.imports
+    tree_nodes = set(repo_parser.nodes)
+    print(f"节点: {len(tree_nodes)}, import 关系: {len(imports)}")
+
+    start = time.perf_counter()
+    index = ModuleIndex(repo_name)
+    for fullname, node in repo_parser.nodes.items():
+        index.add(fullname, node.node_type)
+    print(f"建立索引: {(time.perf_counter() - start) * 1000:.1f} ms, {len(index)} 个路径")
+
+    print(f"{'method':>8} {'time (ms)':>10} {'in-repo edges':>14} {'phantoms':>9}")
+    for name in ("string", "index"):
+        code_graph = CodeGraph(ModuleClassifier(repo_parser.local_modules()))
+        code_graph.build_graph_from_tree(repo_parser.root)
+        if name == "string":
+            code_graph.module_index = None
+        start = time.perf_counter()
+        for importer, imported_module in imports:
+            if name == "string":
+                add_import_by_string(code_graph, importer, imported_module)
+            else:
+                code_graph.add_import(importer, imported_module)
+        elapsed = time.perf_counter() - start
+        in_repo, phantoms = summarize(code_graph, tree_nodes, repo_name)
+        print(f"{name:>8} {elapsed * 1000:>10.1f} {in_repo:>14} {len(phantoms):>9}  {' '.join(sorted(phantoms)[:3])}")
+
+
+if __name__ == "__main__":
+    main()
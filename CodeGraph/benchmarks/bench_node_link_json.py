@@ -0,0 +1,107 @@
+"""
+对比整体方式与流式方式读写 node-link JSON 的耗时和 Python 堆内存峰值（tracemalloc）：
+  - export:        json.dump(nx.node_link_data(graph), f, indent=4) / save_node_link_json（输出逐字节相同）
+  - load:          json.load + nx.node_link_graph / load_node_link_graph
+  - load no code:  加载整个图后去掉 code / load_node_link_graph(exclude=("code",))
+  - function ids:  json.load 后筛选函数节点 / iter_nodes(fields=(), node_types={"function"})
+导出的图的 code 为 SourceSpan（与 data_process 中建图后导出时相同），整体方式需要先解码全部源码。
+
+用法: python CodeGraph/benchmarks/bench_node_link_json.py <项目目录>
+"""
+import os
+import sys
+import json
+import time
+import logging
+import tempfile
+import tracemalloc
+import networkx as nx
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(current_dir))
+
+from parsers.repo_parser import RepoParser
+from code_graph import CodeGraph
+from module_classifier import ModuleClassifier
+from node_link_json import save_node_link_json, load_node_link_graph, iter_nodes
+
+
+def export_whole(graph, path):
+    with open(path, 'w') as f:
+        json.dump(nx.node_link_data(graph), f, indent=4)
+
+
+def load_whole(path):
+    with open(path, 'r') as f:
+        return nx.node_link_graph(json.load(f))
+
+
+def load_whole_without_code(path):
+    graph = load_whole(path)
+    for _, data in graph.nodes(data=True):
+        data.pop("code", None)
+    return graph
+
+
+def function_ids_whole(path):
+    with open(path, 'r') as f:
+        return [node["id"] for node in json.load(f)["nodes"] if node.get("type") == "function"]
+
+
+def function_ids_stream(path):
+    return [node["id"] for node in iter_nodes(path, fields=(), node_types={"function"})]
+
+
+def measure(function, *args):
+    """返回 (耗时, 堆内存峰值, 结果)，耗时与内存分两次测量（tracemalloc 会拖慢执行）"""
+    start = time.perf_counter()
+    function(*args)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    result = function(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, result
+
+
+def main():
+    logging.disable(logging.CRITICAL)
+    project_path = os.path.abspath(sys.argv[1])
+    repo_name = os.path.basename(os.path.normpath(project_path))
+    repo_parser = RepoParser(project_path, repo_name)
+    repo_parser.parse()
+    code_graph = CodeGraph(ModuleClassifier(repo_parser.local_modules()))
+    code_graph.build_graph_from_tree(repo_parser.root)
+    for importer, imported_module in repo_parser.imports:
+        code_graph.add_import(importer, imported_module)
+    graph = code_graph.graph
+
+    with tempfile.TemporaryDirectory() as tmp:
+        whole_path = os.path.join(tmp, "whole.json")
+        stream_path = os.path.join(tmp, "stream.json")
+        results = []
+        print(f"节点: {graph.number_of_nodes()}, 边: {graph.number_of_edges()}")
+        print(f"{'operation':>13} {'whole (ms)':>11} {'whole (MB)':>11} {'stream (ms)':>12} {'stream (MB)':>12}")
+        for name, whole, stream, args in (
+                ("export", lambda: export_whole(graph, whole_path), lambda: save_node_link_json(graph, stream_path), ()),
+                ("load", load_whole, load_node_link_graph, None),
+                ("load no code", load_whole_without_code, lambda path: load_node_link_graph(path, exclude=("code",)), None),
+                ("function ids", function_ids_whole, function_ids_stream, None)):
+            whole_args = (whole_path,) if args is None else args
+            whole_time, whole_peak, whole_result = measure(whole, *whole_args)
+            stream_time, stream_peak, stream_result = measure(stream, *whole_args)
+            results.append((whole_result, stream_result))
+            print(f"{name:>13} {whole_time * 1000:>11.1f} {whole_peak / 1024 / 1024:>11.1f} "
+                  f"{stream_time * 1000:>12.1f} {stream_peak / 1024 / 1024:>12.1f}")
+        print(f"JSON: {os.path.getsize(whole_path) / 1024 / 1024:.1f} MB")
+
+        with open(whole_path, 'rb') as whole_file, open(stream_path, 'rb') as stream_file:
+            same_bytes = whole_file.read() == stream_file.read()
+        same = all(nx.node_link_data(whole_result) == nx.node_link_data(stream_result)
+                   if isinstance(whole_result, nx.Graph) else whole_result == stream_result
+                   for whole_result, stream_result in results[1:])
+        print("结果一致" if same_bytes and same else "警告: 结果不一致")
+
+
+if __name__ == "__main__":
+    main()
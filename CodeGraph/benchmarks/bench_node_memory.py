@@ -0,0 +1,45 @@
+"""
+统计构建 CONTAINS 树和代码图（不添加 IMPORTS 和 CALLS 边）后的内存占用：
+  - 进程的峰值 RSS（ru_maxrss）
+  - 节点个数、节点 code 文本的总长度（各层重复计算）与实际保存的源码字节数
+
+在修改前后的代码上分别运行即可比较。ContainsParser 没有 sources 属性时（旧版本）每个节点各自保存 code 文本。
+
+用法: python CodeGraph/benchmarks/bench_node_memory.py <项目目录> [解析进程数]
+"""
+import os
+import sys
+import time
+import logging
+import resource
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(current_dir))
+
+from parsers.repo_parser import RepoParser
+from code_graph import CodeGraph
+
+
+def main():
+    logging.disable(logging.CRITICAL)
+    project_path = os.path.abspath(sys.argv[1])
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+
+    start = time.perf_counter()
+    repo_parser = RepoParser(project_path, os.path.basename(os.path.normpath(project_path)), workers=workers)
+    repo_parser.parse()
+    code_graph = CodeGraph()
+    code_graph.build_graph_from_tree(repo_parser.root)
+    elapsed = time.perf_counter() - start
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    code_chars = sum(len(node.code or "") for node in repo_parser.nodes.values())
+    sources = getattr(repo_parser.contains_parser, "sources", None)
+    stored = sources.size() if sources is not None else code_chars
+    print(f"节点: {len(repo_parser.nodes)}, 图节点: {code_graph.graph.number_of_nodes()}, 耗时 {elapsed:.2f}s")
+    print(f"code 总长度: {code_chars / 1024 / 1024:.1f} MB, 实际保存的源码: {stored / 1024 / 1024:.1f} MB")
+    print(f"峰值 RSS: {peak_mb:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
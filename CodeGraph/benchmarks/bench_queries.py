@@ -0,0 +1,154 @@
+"""
+对比两种提取引擎的耗时：
+  - walker: 在 Python 中用显式栈遍历语法树，逐个节点检查 child.type
+  - query: 每个解析器执行自己的预编译 tree-sitter Query，匹配在原生代码中完成，Python 只处理匹配结果
+  - merged: 每个文件只执行一次合并查询 EXTRACTION_QUERY，三个解析器共享匹配结果（RepoParser 的做法）
+
+各引擎在同一批已解析的语法树上提取定义、import 和调用点，并检查结果是否一致。
+
+用法: python CodeGraph/benchmarks/bench_queries.py [项目目录]
+      不指定目录时使用合成模块。
+"""
+import os
+import sys
+import time
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(current_dir))
+sys.path.append(current_dir)
+
+from parsers.contains_parser import ContainsParser, Node
+from parsers.import_parser import ImportParser
+from parsers.call_parser import CallParser
+from parsers.queries import EXTRACTION_QUERY, ordered_matches
+from bench_traversal import load_sources
+
+# 可能包含类、函数定义或 import 语句的节点类型
+DEFINITION_CONTAINERS = frozenset({
+    'class_definition', 'function_definition', 'decorated_definition', 'block',
+    'if_statement', 'elif_clause', 'else_clause', 'for_statement', 'while_statement',
+    'try_statement', 'except_clause', 'except_group_clause', 'finally_clause',
+    'with_statement', 'match_statement', 'case_clause', 'ERROR',
+})
+IMPORT_CANDIDATES = DEFINITION_CONTAINERS | {'import_statement', 'import_from_statement'}
+NO_CALL_TYPES = frozenset({'comment', 'import_statement', 'import_from_statement', 'future_import_statement'})
+
+
+class WalkerContainsParser(ContainsParser):
+    def _extract_items(self, node, source, parent_node, matches=None):
+        stack = [(child, parent_node) for child in reversed(node.children) if child.type in DEFINITION_CONTAINERS]
+        while stack:
+            child, parent_node = stack.pop()
+            item_node = parent_node
+            if child.type == 'class_definition':
+                name = self._get_node_text(child.child_by_field_name('name'), source)
+                item_node = Node(name, 'class', self._get_code_segment(child, source), name, parent_node.fullname)
+            elif child.type == 'function_definition':
+                name = self._get_node_text(child.child_by_field_name('name'), source)
+                item_node = Node(name, 'function', self._get_code_segment(child, source),
+                                 self._get_signature(child, source), parent_node.fullname)
+            if item_node is not parent_node:
+                parent_node.add_child(item_node)
+                self.nodes[item_node.fullname] = item_node
+                self._register_symbol(item_node.name, item_node.fullname)
+            stack.extend((grandchild, item_node) for grandchild in reversed(child.children)
+                         if grandchild.type in DEFINITION_CONTAINERS)
+
+
+class WalkerImportParser(ImportParser):
+    def _extract_imports(self, node, source, current_fullname, matches=None):
+        stack = list(reversed(node.children))
+        while stack:
+            child = stack.pop()
+            if child.type == 'import_statement':
+                for name_node in child.named_children:
+                    if name_node.type == 'dotted_name':
+                        self.imports.append((current_fullname, self._get_node_text(name_node, source)))
+            elif child.type == 'import_from_statement':
+                self._handle_from_import_statement(child, current_fullname, source)
+            elif child.type in DEFINITION_CONTAINERS:
+                stack.extend(grandchild for grandchild in reversed(child.children)
+                             if grandchild.type in IMPORT_CANDIDATES)
+
+
+class WalkerCallParser(CallParser):
+    def _extract_calls(self, node, source, current_fullname, matches=None):
+        stack = [(node, current_fullname)]
+        while stack:
+            current, current_fullname = stack.pop()
+            children = current.children
+            if current.type == 'class_definition' or current.type == 'function_definition':
+                name = self._get_node_text(current.child_by_field_name('name'), source)
+                current_fullname = f"{current_fullname}.{name}"
+            elif current.type == 'call':
+                func_name_node = current.child_by_field_name('function')
+                if func_name_node:
+                    callee_name = self._get_node_text(func_name_node, source)
+                    self.call_sites.append(self._make_call_site(func_name_node, callee_name, current_fullname, source))
+            elif current.type == 'string':
+                children = [part for part in children if part.type == 'interpolation']
+            stack.extend((child, current_fullname) for child in reversed(children)
+                         if child.child_count and child.type not in NO_CALL_TYPES)
+
+
+def make_parsers(engine):
+    contains_cls, import_cls, call_cls = (
+        (WalkerContainsParser, WalkerImportParser, WalkerCallParser) if engine == "walker"
+        else (ContainsParser, ImportParser, CallParser))
+    contains = contains_cls("bench", "bench")
+    return contains, import_cls("bench", "bench"), call_cls("bench", "bench", None, contains.defined_symbols)
+
+
+def run(trees, engine):
+    contains, imports, calls = make_parsers(engine)
+    timings = {"match": 0.0}
+    matches = {}
+    if engine == "merged":
+        start = time.perf_counter()
+        for file_path, _, tree in trees:
+            matches[file_path] = ordered_matches(EXTRACTION_QUERY, tree.root_node)
+        timings["match"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for file_path, source, tree in trees:
+        contains.parse_tree(file_path, contains.root, source, tree, matches.get(file_path))
+    timings["contains"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for file_path, source, tree in trees:
+        imports.parse_tree(file_path, tree, source, matches.get(file_path))
+    timings["imports"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for file_path, source, tree in trees:
+        calls.collect_calls(file_path, tree, source, matches.get(file_path))
+    timings["calls"] = time.perf_counter() - start
+
+    result = (
+        [(fullname, node.signature) for fullname, node in contains.nodes.items()],
+        imports.imports,
+        [site.to_tuple() for site in calls.call_sites],
+    )
+    return timings, result
+
+
+def main():
+    project_path = sys.argv[1] if len(sys.argv) > 1 else None
+    sources = load_sources(project_path)
+    parser = ContainsParser(".", "bench").parser
+    trees = [(file_path, source, parser.parse(source.data)) for file_path, source in sources]
+    total_nodes = sum(tree.root_node.descendant_count for _, _, tree in trees)
+    print(f"文件数: {len(trees)}, AST 节点数: {total_nodes}")
+
+    print(f"{'engine':>8} {'match (s)':>10} {'contains (s)':>13} {'imports (s)':>12} {'calls (s)':>10} {'total (s)':>10}")
+    results = {}
+    for engine in ("walker", "query", "merged"):
+        timings, results[engine] = run(trees, engine)
+        print(f"{engine:>8} {timings['match']:>10.4f} {timings['contains']:>13.4f} {timings['imports']:>12.4f} "
+              f"{timings['calls']:>10.4f} {sum(timings.values()):>10.4f}")
+    consistent = results["walker"] == results["query"] == results["merged"]
+    print("结果一致" if consistent else "警告: 各引擎的提取结果不一致")
+
+
+if __name__ == "__main__":
+    main()
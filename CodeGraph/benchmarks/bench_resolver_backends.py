@@ -0,0 +1,57 @@
+"""
+对比两种查找定义后端在同一批请求上的吞吐量（每秒完成的定义请求数）：
+  - lsp:  LspPool，multilspy 与 jedi-language-server 进程之间通过 JSON-RPC 通信
+  - jedi: JediResolver，在当前进程内直接调用 jedi
+
+请求取自项目中需要 LSP 消歧的调用点，各后端的结果与第一次运行（lsp 后端）的结果比较，diff 为结果不同的请求数。
+jedi 对依赖运行时类型的调用（例如测试中对多个图类参数化的调用）推断结果不固定，
+即使同一后端两次运行也可能有少量不同。需要可用的 multilspy 语言服务器和 jedi。
+
+用法: python CodeGraph/benchmarks/bench_resolver_backends.py <项目目录> [最多请求数] [工作者个数,...]
+"""
+import os
+import sys
+import time
+import logging
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(current_dir))
+
+from lsp_client import create_resolver, RequestPolicy
+from bench_lsp_pipeline import collect_requests, normalized
+
+
+def run(project_path, requests, backend, size):
+    # 不限制请求期限，只比较吞吐量
+    policy = RequestPolicy(request_timeout=None, breaker_threshold=None)
+    with create_resolver(project_path, backend, size=size, policy=policy) as resolver:
+        # 预热：首次分析项目的开销不计入结果
+        list(resolver.find_definitions(requests[:20 * size]))
+        results = [None] * len(requests)
+        start = time.perf_counter()
+        for index, result in resolver.find_definitions(requests):
+            results[index] = normalized(result)
+        return time.perf_counter() - start, results
+
+
+def main():
+    logging.disable(logging.WARNING)
+    project_path = os.path.abspath(sys.argv[1])
+    limit = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    sizes = [int(size) for size in sys.argv[3].split(",")] if len(sys.argv) > 3 else [1]
+    requests = collect_requests(project_path, limit)
+    print(f"定义请求数: {len(requests)}")
+
+    print(f"{'backend':>8} {'size':>5} {'time (s)':>10} {'defs/s':>8} {'diff':>6}")
+    expected = None
+    for backend in ("lsp", "jedi"):
+        for size in sizes:
+            elapsed, results = run(project_path, requests, backend, size)
+            if expected is None:
+                expected = results
+            diff = sum(result != expected_result for result, expected_result in zip(results, expected))
+            print(f"{backend:>8} {size:>5} {elapsed:>10.2f} {len(requests) / elapsed:>8.1f} {diff:>6}")
+
+
+if __name__ == "__main__":
+    main()
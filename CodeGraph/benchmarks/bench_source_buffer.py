@@ -0,0 +1,89 @@
+"""
+对比两种节点文本提取方式在不同文件大小下的单文件耗时：
+  - legacy: 每个 AST 节点重新打开并读取整个文件（旧版 _get_node_text 的做法）
+  - buffer: 每个文件只读取一次，通过 SourceBuffer 按字节范围切片
+
+用法: python CodeGraph/benchmarks/bench_source_buffer.py
+"""
+import os
+import sys
+import time
+import tempfile
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(current_dir))
+
+from parsers.contains_parser import ContainsParser
+from parsers.source_buffer import SourceBuffer
+
+SIZES = [250, 500, 1000, 2000, 4000]  # 每个合成模块中的函数个数（每个函数 5 行）
+
+
+def make_module(num_functions):
+    lines = []
+    for i in range(num_functions):
+        lines.append(f"def func_{i}(a, b=1, *args, **kwargs):")
+        lines.append(f"    value = helper_{i % 7}(a, b)")
+        lines.append("    return value")
+        lines.append("")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def legacy_node_text(node, file_path):
+    with open(file_path, "r", encoding="utf-8") as file:
+        file_content = file.read()
+    return file_content[node.start_byte:node.end_byte]
+
+
+def walk_definitions(node):
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if current.type == 'function_definition':
+            yield current
+        stack.extend(current.children)
+
+
+def run_legacy(parser, file_path):
+    with open(file_path, "r", encoding="utf-8") as file:
+        tree = parser.parse(bytes(file.read(), "utf8"))
+    for func in walk_definitions(tree.root_node):
+        legacy_node_text(func.child_by_field_name('name'), file_path)
+        legacy_node_text(func.child_by_field_name('parameters'), file_path)
+        legacy_node_text(func, file_path)
+
+
+def run_buffer(parser, file_path):
+    source = SourceBuffer.from_file(file_path)
+    tree = parser.parse(source.data)
+    for func in walk_definitions(tree.root_node):
+        source.node_text(func.child_by_field_name('name'))
+        source.node_text(func.child_by_field_name('parameters'))
+        source.node_text(func)
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = ContainsParser(".", "bench").parser
+    print(f"{'lines':>8} {'legacy (s)':>12} {'buffer (s)':>12} {'legacy us/line':>15} {'buffer us/line':>15}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size in SIZES:
+            file_path = os.path.join(tmp_dir, f"module_{size}.py")
+            with open(file_path, "w", encoding="utf-8") as file:
+                file.write(make_module(size))
+            num_lines = size * 5
+
+            legacy = timed(run_legacy, parser, file_path)
+            buffer = timed(run_buffer, parser, file_path)
+            print(f"{num_lines:>8} {legacy:>12.4f} {buffer:>12.4f} "
+                  f"{legacy / num_lines * 1e6:>15.2f} {buffer / num_lines * 1e6:>15.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+对比解析出的定义是否属于候选定义的两种判断方式：
+  - linear: 在 defined_symbols[name] 的全部候选上逐个 fullname.startswith(path)
+  - index:  SymbolIndex.definition_prefix，只检查全名中以 name 结尾的前缀
+
+查询取自项目中所有同名定义不止一个的名称：对每个候选定义及其内部的定义各查询一次。
+同时输出符号表序列化、加载的耗时与重新解析项目的耗时。
+
+用法: python CodeGraph/benchmarks/bench_symbol_index.py <项目目录>
+"""
+import os
+import sys
+import time
+import logging
+import tempfile
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(current_dir))
+
+from parsers.repo_parser import RepoParser
+from parsers.symbol_index import SymbolIndex
+
+REPEAT = 20
+
+
+def main():
+    logging.disable(logging.WARNING)
+    project_path = os.path.abspath(sys.argv[1])
+    start = time.perf_counter()
+    repo_parser = RepoParser(project_path, os.path.basename(os.path.normpath(project_path)))
+    repo_parser.parse()
+    parse_time = time.perf_counter() - start
+    index = repo_parser.defined_symbols
+
+    queries = []
+    for name, fullnames in index.items():
+        if len(fullnames) > 1:
+            for fullname in fullnames:
+                queries.append((fullname, name))
+                queries.extend((inner, name) for inner in index.with_prefix(fullname) if inner != fullname)
+    print(f"名称: {len(index)}, 定义: {len(index.fullnames)}, 查询: {len(queries)}")
+
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        linear = [any(fullname.startswith(path) for path in index[name]) for fullname, name in queries]
+    linear_time = (time.perf_counter() - start) / REPEAT
+
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        indexed = [index.definition_prefix(fullname, name) is not None for fullname, name in queries]
+    index_time = (time.perf_counter() - start) / REPEAT
+
+    print(f"{'mode':>8} {'time (ms)':>10}")
+    print(f"{'linear':>8} {linear_time * 1000:>10.2f}")
+    print(f"{'index':>8} {index_time * 1000:>10.2f}")
+    print(f"加速比: {linear_time / index_time:.2f}x")
+    print("结果一致" if linear == indexed else "警告: 结果不一致")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "symbols.json")
+        start = time.perf_counter()
+        index.save(path)
+        save_time = time.perf_counter() - start
+        start = time.perf_counter()
+        loaded = SymbolIndex.load(path)
+        load_time = time.perf_counter() - start
+        size = os.path.getsize(path)
+    print(f"保存 {save_time * 1000:.1f} ms, 加载 {load_time * 1000:.1f} ms ({size / 1024:.0f} KB), "
+          f"重新解析 {parse_time * 1000:.0f} ms")
+    print("加载结果一致" if dict(loaded.items()) == dict(index.items()) else "警告: 加载结果不一致")
+
+
+if __name__ == "__main__":
+    main()
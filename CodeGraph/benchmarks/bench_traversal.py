@@ -0,0 +1,169 @@
+"""
+对比 AST 遍历方式的耗时与吞吐量：
+  - legacy: 旧版递归遍历，访问每一个 AST 节点（包括表达式内部）
+  - current: 当前实现（不递归，见 bench_queries.py 中查询引擎与显式栈遍历的对比）
+
+同时构造一个深度嵌套的表达式，验证旧版遍历会触发 RecursionError，而当前实现可以正常完成。
+
+用法: python CodeGraph/benchmarks/bench_traversal.py [项目目录]
+      不指定目录时使用合成模块。
+"""
+import os
+import sys
+import time
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(current_dir))
+
+from parsers.contains_parser import ContainsParser, Node
+from parsers.import_parser import ImportParser
+from parsers.call_parser import CallParser
+from parsers.source_buffer import SourceBuffer
+
+NESTING_DEPTH = 2000  # 深度嵌套用例中括号的层数
+
+
+class LegacyContainsParser(ContainsParser):
+    def _extract_items(self, node, source, parent_node, matches=None):
+        for child in node.children:
+            if child.type == 'class_definition':
+                class_name = self._get_node_text(child.child_by_field_name('name'), source)
+                class_node = Node(class_name, 'class', self._get_code_segment(child, source), class_name, parent_node.fullname)
+                parent_node.add_child(class_node)
+                self.nodes[class_node.fullname] = class_node
+                self._register_symbol(class_name, class_node.fullname)
+                self._extract_items(child, source, class_node)
+            elif child.type == 'function_definition':
+                func_name = self._get_node_text(child.child_by_field_name('name'), source)
+                func_signature = self._get_signature(child, source)
+                func_node = Node(func_name, 'function', self._get_code_segment(child, source), func_signature, parent_node.fullname)
+                parent_node.add_child(func_node)
+                self.nodes[func_node.fullname] = func_node
+                self._register_symbol(func_name, func_node.fullname)
+                self._extract_items(child, source, func_node)
+            else:
+                self._extract_items(child, source, parent_node)
+
+
+class LegacyImportParser(ImportParser):
+    def _extract_imports(self, node, source, current_fullname, matches=None):
+        for child in node.children:
+            if child.type == 'import_statement':
+                self._handle_import_statement(child, current_fullname, source)
+            elif child.type == 'import_from_statement':
+                self._handle_from_import_statement(child, current_fullname, source)
+            else:
+                self._extract_imports(child, source, current_fullname)
+
+    def _handle_import_statement(self, node, current_fullname, source):
+        for name_node in node.named_children:
+            if name_node.type == 'dotted_name' or name_node.type == 'identifier':
+                self.imports.append((current_fullname, self._get_node_text(name_node, source)))
+
+
+class LegacyCallParser(CallParser):
+    def _extract_calls(self, node, source, current_fullname, matches=None):
+        for child in node.children:
+            if child.type == 'class_definition' or child.type == 'function_definition':
+                name = self._get_node_text(child.child_by_field_name('name'), source)
+                self._extract_calls(child, source, f"{current_fullname}.{name}")
+            elif child.type == 'call':
+                func_name_node = child.child_by_field_name('function')
+                if func_name_node:
+                    callee_name = self._get_node_text(func_name_node, source)
+                    self.call_sites.append(self._make_call_site(func_name_node, callee_name, current_fullname, source))
+                self._extract_calls(child, source, current_fullname)
+            else:
+                self._extract_calls(child, source, current_fullname)
+
+
+def make_module(num_classes):
+    lines = ["import os", "from collections import OrderedDict", ""]
+    for i in range(num_classes):
+        lines.append(f"class Model{i}:")
+        lines.append("    def __init__(self, items):")
+        lines.append("        self.items = OrderedDict((k, [v * 2 for v in vs]) for k, vs in items.items())")
+        lines.append("")
+        lines.append("    def run(self, path):")
+        lines.append("        if os.path.exists(path):")
+        lines.append(f"            return {{'name': f'model_{i}', 'size': len(self.items), 'path': os.path.join(path, str({i}))}}")
+        lines.append("        return sorted(self.items, key=lambda k: (len(k), k))")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def load_sources(project_path):
+    if project_path is None:
+        return [("bench/module.py", SourceBuffer.from_text(make_module(500)))]
+    sources = []
+    for root, _, files in os.walk(project_path):
+        for name in files:
+            if name.endswith(".py"):
+                file_path = os.path.join(root, name)
+                try:
+                    sources.append((file_path, SourceBuffer.from_file(file_path)))
+                except (OSError, UnicodeDecodeError):
+                    continue
+    return sources
+
+
+def make_parsers(legacy):
+    contains_cls, import_cls, call_cls = (
+        (LegacyContainsParser, LegacyImportParser, LegacyCallParser) if legacy
+        else (ContainsParser, ImportParser, CallParser))
+    contains = contains_cls("bench", "bench")
+    imports = import_cls("bench", "bench")
+    calls = call_cls("bench", "bench", None, contains.defined_symbols)
+    return contains, imports, calls
+
+
+def run(trees, legacy):
+    contains, imports, calls = make_parsers(legacy)
+    start = time.perf_counter()
+    for file_path, source, tree in trees:
+        contains.parse_tree(file_path, contains.root, source, tree)
+        imports.parse_tree(file_path, tree, source)
+        calls.collect_calls(file_path, tree, source)
+    elapsed = time.perf_counter() - start
+    return elapsed, (len(contains.nodes), len(imports.imports), len(calls.call_sites))
+
+
+def check_deep_nesting():
+    code = "x = " + "(" * NESTING_DEPTH + "1" + ")" * NESTING_DEPTH + "\nprint(x)\n"
+    source = SourceBuffer.from_text(code)
+    for legacy in (True, False):
+        contains, _, _ = make_parsers(legacy)
+        tree = contains.parser.parse(source.data)
+        label = "legacy" if legacy else "current"
+        try:
+            contains._extract_items(tree.root_node, source, contains.root)
+            print(f"  {label:>10}: OK")
+        except RecursionError:
+            print(f"  {label:>10}: RecursionError")
+
+
+def main():
+    project_path = sys.argv[1] if len(sys.argv) > 1 else None
+    sources = load_sources(project_path)
+    parser = ContainsParser(".", "bench").parser
+    trees = [(file_path, source, parser.parse(source.data)) for file_path, source in sources]
+    total_nodes = sum(tree.root_node.descendant_count for _, _, tree in trees)
+    print(f"文件数: {len(trees)}, AST 节点数: {total_nodes}")
+
+    print(f"{'walker':>10} {'time (s)':>10} {'nodes/s':>14} {'defs':>8} {'imports':>8} {'calls':>8}")
+    results = {}
+    for legacy in (True, False):
+        label = "legacy" if legacy else "current"
+        elapsed, counts = run(trees, legacy)
+        results[label] = counts
+        print(f"{label:>10} {elapsed:>10.4f} {total_nodes / elapsed:>14.0f} "
+              f"{counts[0]:>8} {counts[1]:>8} {counts[2]:>8}")
+    if results["legacy"] != results["current"]:
+        print("警告: 两种遍历方式提取的结果数量不一致")
+
+    print(f"深度嵌套表达式（{NESTING_DEPTH} 层括号）:")
+    check_deep_nesting()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,36 +1,124 @@
 import networkx as nx
-import sys
-import importlib.util
 import logging
+from parsers.source_buffer import SourceSpan
+from module_classifier import ModuleClassifier, LOCAL
+from module_index import ModuleIndex
+from edge_index import EdgeIndex, merge_edge_attributes, edge_relationships
+from hierarchy_index import HierarchyIndex
+
+
+class NodeAttributes(dict):
+    """
+    图节点的属性字典。code 可以保存为 SourceSpan（与 CONTAINS 树的节点共用），
+    通过 [] / get / items / values 读取或转换为普通字典（dict(...)、{**...}、node_link_data）时才解码为文本，
+    图中不再为每个嵌套的模块、类、函数各保存一份源码。
+    """
+    def __getitem__(self, key):
+        value = dict.__getitem__(self, key)
+        return value.text() if isinstance(value, SourceSpan) else value
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def __iter__(self):
+        # 重写 __iter__ 后 dict(...) 和 {**...} 通过 keys() 与 __getitem__ 复制，得到解码后的文本
+        return dict.__iter__(self)
+
+    def items(self):
+        return [(key, self[key]) for key in dict.__iter__(self)]
+
+    def values(self):
+        return [self[key] for key in dict.__iter__(self)]
+
+    def copy(self):
+        attributes = NodeAttributes()
+        dict.update(attributes, dict.items(self))
+        return attributes
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+
+class CodeDiGraph(nx.DiGraph):
+    """节点属性使用 NodeAttributes 的 DiGraph"""
+    node_attr_dict_factory = NodeAttributes
 
 
 class CodeGraph:
-    def __init__(self):
-        self.graph = nx.DiGraph()
+    def __init__(self, module_classifier=None):
+        """
+        :param module_classifier: 判断被导入模块类型的 ModuleClassifier，
+                                  为 None 时使用不知道项目本地模块的默认分类器
+        """
+        self.graph = CodeDiGraph()
+        # 按关系类型分开的双向邻接索引，同一对节点之间的多种关系互不覆盖（graph 中合并为一条边，见 merge_edge_attributes）
+        self.edge_index = EdgeIndex()
+        # CONTAINS 树的父节点、按源码位置排序的子节点和所在的模块、类、函数
+        self.hierarchy = HierarchyIndex()
+        self.module_classifier = module_classifier or ModuleClassifier()
+        self.module_index = None  # 项目内导入路径 -> 节点全名，build_graph_from_tree 时建立
         self.logger = logging.getLogger(__name__)
         self.logger.setLevel(logging.INFO)
 
+    @classmethod
+    def from_graph(cls, graph, module_classifier=None):
+        """
+        由 DiGraph（node-link JSON、图存储或快照加载的图）重建 CodeGraph，code 的 SourceSpan 不解码。
+        合并的边按 relationships 拆分为各关系的边，层次索引和导入路径索引由 CONTAINS 边重建。
+        """
+        code_graph = cls(module_classifier)
+        code_graph.graph.graph.update(graph.graph)
+        for node, attributes in graph.nodes(data=True):
+            code_graph._put_node(node, **dict(dict.items(attributes)))
+        for source, target, attributes in graph.edges(data=True):
+            extras = {key: value for key, value in attributes.items() if key not in ('relationship', 'relationships')}
+            for relationship in edge_relationships(attributes) or [None]:
+                code_graph._put_edge(source, target, relationship, **extras)
+        code_graph._index_loaded_graph(graph)
+        return code_graph
+
+    def _index_loaded_graph(self, graph):
+        """加载的图没有 CONTAINS 树：由 CONTAINS 边建立层次索引和导入路径索引，之后可以继续 add_import"""
+        self.hierarchy = HierarchyIndex.from_graph(graph)
+        roots = [node for node in self.hierarchy.nearest if self.hierarchy.parent(node) is None]
+        if roots:
+            self.module_index = ModuleIndex(roots[0])
+            for node in self.hierarchy.nearest:
+                self.module_index.add(node, dict.get(graph.nodes[node], 'type'))
+
     def build_graph_from_tree(self, tree_root):
-        # 从树的根节点开始构建图
+        # 从树的根节点开始构建图，同时建立项目内模块、类、函数的导入路径索引
+        self.module_index = ModuleIndex(tree_root.fullname)
         self._add_node(tree_root)
+        self.hierarchy.add(tree_root.fullname, None, tree_root.node_type, tree_root.span)
         self._build_edges(tree_root)
 
     def _add_node(self, node):
-        self.graph.add_node(node.fullname, type=node.node_type,
-                            code=node.code, signature=node.signature)
+        # 有源码范围的节点直接保存 span，读取 code 属性时才解码
+        code = node.span if node.span is not None else node.code
+        self._put_node(node.fullname, type=node.node_type, code=code, signature=node.signature)
+        if self.module_index is not None:
+            self.module_index.add(node.fullname, node.node_type)
         self.logger.debug(f"添加节点: {node.fullname} (类型: {node.node_type})")
 
     def _build_edges(self, node):
         for child in node.children:
-            self.graph.add_edge(node.fullname, child.fullname,
-                                relationship="CONTAINS")
-            self._add_node(child)
+            self.add_contains(node.fullname, child)
             self._build_edges(child)
 
-    def add_call(self, caller_fullname, callee_fullname):
-        if caller_fullname in self.graph and callee_fullname in self.graph:
-            self.graph.add_edge(
-                caller_fullname, callee_fullname, relationship="CALLS")
+    def add_contains(self, parent_fullname, node):
+        """添加一个节点，以及父节点指向它的 CONTAINS 边"""
+        self._add_node(node)
+        self._put_edge(parent_fullname, node.fullname, relationship="CONTAINS")
+        self.hierarchy.add(node.fullname, parent_fullname, node.node_type, node.span)
+
+    def add_call(self, caller_fullname, callee_fullname, **attributes):
+        """
+        添加 CALLS 边
+        :param attributes: 边的附加属性，例如 LSP 失败时静态推测的 resolution / fallback_reason
+        """
+        if self._has_node(caller_fullname) and self._has_node(callee_fullname):
+            self._put_edge(caller_fullname, callee_fullname, relationship="CALLS", **attributes)
             self.logger.debug(
                 f"添加调用关系: {caller_fullname} -> {callee_fullname}")
         else:
@@ -38,58 +126,104 @@ class CodeGraph:
                 f"调用关系中的节点不存在: {caller_fullname} -> {callee_fullname}")
 
     def add_import(self, importer_fullname, imported_fullname):
-        # 检测模块类型
-        module_type, module_path = self._detect_module_type(imported_fullname)
-
-        # 如果模块不存在图中，为第三方库、标准库或本地库创建虚拟节点
-        if imported_fullname not in self.graph:
-            self.logger.debug(f"创建节点: {imported_fullname} (类型: {
-                              module_type}) 路径: {module_path}")
-            self.graph.add_node(imported_fullname,
-                                type=module_type, code=None, signature=None)
-
-        if importer_fullname in self.graph:
-            self.graph.add_edge(importer_fullname,
-                                imported_fullname, relationship="IMPORTS")
-            self.logger.debug(
-                f"添加import关系: {importer_fullname} -> {imported_fullname}")
-        else:
-            self.logger.debug(f"import关系中的节点不存在: {
-                              importer_fullname} -> {imported_fullname}")
-
-    def _detect_module_type(self, module_name):
         """
-        检测模块类型：标准库、第三方库或本地库
+        添加 IMPORTS 边。被导入的名称先通过 module_index 解析为项目内的模块、类或函数节点（包括相对导入）；
+        项目外的模块不存在于图中时，为第三方库、标准库创建虚拟节点。
+        无法解析的本地导入（相对导入或项目自身的包中不存在的路径）不创建节点。
         """
-        try:
-            # 检测标准库模块
-            if module_name in sys.builtin_module_names:
-                return "standard_library", None
-
-            # 使用 importlib.util.find_spec 查找模块的元信息
-            module_spec = importlib.util.find_spec(module_name)
-            if module_spec is None:
-                self.logger.debug(f"无法找到模块 {module_name}")
-                return "unknown", None
-
-            # 判断模块类型：第三方库或标准库
-            module_path = module_spec.origin
-            if not module_path:
-                return "unknown", None
-
-            if "site-packages" in module_path or "dist-packages" in module_path:
-                return "third_party_library", module_path
-            else:
-                return "local_module", module_path
-
-        except ModuleNotFoundError:
-            self.logger.debug(f"模块 {module_name} 未安装")
-            return "unknown", None
-
-        except ValueError as e:
-            # 捕获 ValueError 并记录日志
-            self.logger.error(f"检测模块 {module_name} 时出现 ValueError: {e}")
-            return "unknown", None
+        if not self._has_node(importer_fullname):
+            self.logger.debug(f"import关系中的节点不存在: {importer_fullname} -> {imported_fullname}")
+            return
+        target = self.module_index.resolve(importer_fullname, imported_fullname) if self.module_index is not None else None
+        if target is None:
+            target = imported_fullname
+            if not self._has_node(target):
+                module_type = self.module_classifier.classify(imported_fullname)
+                if module_type == LOCAL:
+                    self.logger.debug(f"无法解析的本地导入: {importer_fullname} -> {imported_fullname}")
+                    return
+                self.logger.debug(f"创建节点: {imported_fullname} (类型: {module_type})")
+                self._put_node(imported_fullname, type=module_type, code=None, signature=None)
+        elif target == importer_fullname:
+            # 包的 __init__.py 中 from . import x 记录的模块部分就是它自身
+            return
+
+        self._put_edge(importer_fullname, target, relationship="IMPORTS")
+        self.logger.debug(
+            f"添加import关系: {importer_fullname} -> {target}")
+
+    def add_similarity_edge(self, source_fullname, target_fullname, similarity=None):
+        """
+        添加 SIMILAR 边（例如语义相似度超过阈值的两个函数）
+        :param similarity: 相似度，保存为边的 similarity 属性
+        """
+        if self._has_node(source_fullname) and self._has_node(target_fullname):
+            attributes = {} if similarity is None else {"similarity": float(similarity)}
+            self._put_edge(source_fullname, target_fullname, relationship="SIMILAR", **attributes)
+            self.logger.debug(f"添加相似关系: {source_fullname} -> {target_fullname}")
+        else:
+            self.logger.debug(f"相似关系中的节点不存在: {source_fullname} -> {target_fullname}")
+
+    def remove_node(self, fullname):
+        """删除节点及其所有关联的边"""
+        if fullname in self.graph:
+            self.graph.remove_node(fullname)
+            self.edge_index.remove_node(fullname)
+            self.hierarchy.remove(fullname)
+            if self.module_index is not None:
+                self.module_index.remove(fullname)
+            self.logger.debug(f"删除节点: {fullname}")
+
+    def remove_edge(self, source_fullname, target_fullname, relationship):
+        """删除指定关系类型的边，两个节点之间其他关系的边保留"""
+        if self.edge_index.remove(source_fullname, target_fullname, relationship):
+            self._sync_edge(source_fullname, target_fullname)
+            self.logger.debug(f"删除{relationship}关系: {source_fullname} -> {target_fullname}")
+
+    def remove_out_edges(self, fullname, relationship):
+        """删除某个节点发出的、指定关系类型的所有边"""
+        for target in self.edge_index.successors(fullname, relationship):
+            self.edge_index.remove(fullname, target, relationship)
+            self._sync_edge(fullname, target)
 
     def get_graph(self):
-        return self.graph
\ No newline at end of file
+        return self.graph
+
+    def successors(self, fullname, relationship=None):
+        """fullname 发出的边的终点；指定 relationship 时只取该关系的边（例如 CALLS 为被调用者），耗时与度数成正比"""
+        if relationship is None:
+            return list(self.graph.successors(fullname)) if fullname in self.graph else []
+        return self.edge_index.successors(fullname, relationship)
+
+    def predecessors(self, fullname, relationship=None):
+        """指向 fullname 的边的起点；指定 relationship 时只取该关系的边（例如 IMPORTS 为导入者），耗时与度数成正比"""
+        if relationship is None:
+            return list(self.graph.predecessors(fullname)) if fullname in self.graph else []
+        return self.edge_index.predecessors(fullname, relationship)
+
+    # 图存储的基本操作，CompactCodeGraph 以整数编号和数组实现
+    def _has_node(self, fullname):
+        return fullname in self.graph
+
+    def _put_node(self, fullname, **attributes):
+        self.graph.add_node(fullname, **attributes)
+
+    def _put_edge(self, source_fullname, target_fullname, relationship, **attributes):
+        self.edge_index.add(source_fullname, target_fullname, relationship, attributes)
+        self._sync_edge(source_fullname, target_fullname)
+
+    def _sync_edge(self, source_fullname, target_fullname):
+        """按 edge_index 中两个节点之间的全部关系更新 graph 中的边，没有任何关系时删除"""
+        typed_edges = self.edge_index.typed_edges(source_fullname, target_fullname)
+        if not typed_edges:
+            if self.graph.has_edge(source_fullname, target_fullname):
+                self.graph.remove_edge(source_fullname, target_fullname)
+            return
+        if len(typed_edges) == 1 and not self.graph.has_edge(source_fullname, target_fullname):
+            # 最常见的情况：新的一对节点
+            self.graph.add_edge(source_fullname, target_fullname, **merge_edge_attributes(typed_edges))
+            return
+        self.graph.add_edge(source_fullname, target_fullname)
+        data = self.graph[source_fullname][target_fullname]
+        data.clear()
+        data.update(merge_edge_attributes(typed_edges))
\ No newline at end of file
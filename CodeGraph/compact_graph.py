@@ -0,0 +1,438 @@
+import logging
+from array import array
+from collections.abc import Mapping
+import networkx as nx
+from code_graph import CodeGraph, CodeDiGraph, NodeAttributes
+from module_classifier import ModuleClassifier, STANDARD_LIBRARY, THIRD_PARTY, LOCAL, UNKNOWN
+from edge_index import RELATIONSHIPS, merge_edge_attributes, edge_relationships
+from hierarchy_index import HierarchyIndex
+
+# 节点类型和边关系的编号，数组中每个节点、每条边只占一个字节；其他类型在出现时追加编号
+NODE_TYPES = ('directory', 'module', 'class', 'function', STANDARD_LIBRARY, THIRD_PARTY, LOCAL, UNKNOWN)
+
+
+class CompactCodeGraph(CodeGraph):
+    """
+    CodeGraph 的紧凑存储：节点全名只在 names / ids 中保存一次，其余都以整数编号表示。
+      - 节点：types（类型编号，array('B')）、codes、signatures 按编号排列
+      - 边：添加时顺序追加到 (source, target, relationship) 三个数组，
+        第一次查询时一次性建立 CSR（按起点）和 CSC（按终点）邻接数组，之后再添加边会在下次查询时重建
+    add_call / add_import / add_similarity_edge / get_graph 与 CodeGraph 相同；
+    get_graph 返回只读的 CompactGraphView，networkx 的算法和 node_link_data 可以直接使用，
+    需要修改图时用 to_networkx 转换为 CodeDiGraph。
+    同一对节点之间不同关系的边各自保留，successors / predecessors 按关系查询只访问该节点的 CSR / CSC 区间；
+    视图中同一对节点的边与 CodeGraph.graph 一样合并为一条（见 merge_edge_attributes）。
+    不支持删除节点和边（watch 模式使用 CodeGraph）。
+    """
+    def __init__(self, module_classifier=None):
+        self.module_classifier = module_classifier or ModuleClassifier()
+        self.module_index = None  # 项目内导入路径 -> 节点全名，build_graph_from_tree 时建立
+        self.hierarchy = HierarchyIndex()
+        self.logger = logging.getLogger(__name__)
+        self.logger.setLevel(logging.INFO)
+
+        self.graph_attributes = {}
+        self.names = []  # 编号 -> 节点全名
+        self.ids = {}  # 节点全名 -> 编号
+        self.type_names = list(NODE_TYPES)
+        self._type_codes = {name: code for code, name in enumerate(self.type_names)}
+        self.types = array('B')
+        self.codes = []  # 编号 -> SourceSpan / str / None
+        self.signatures = []
+        self.node_extras = {}  # 编号 -> type、code、signature 以外的节点属性（很少出现）
+
+        self.relationship_names = list(RELATIONSHIPS)
+        self._relationship_codes = {name: code for code, name in enumerate(self.relationship_names)}
+        self.edge_sources = array('i')
+        self.edge_targets = array('i')
+        self.edge_relationships = array('B')
+        self.edge_extras = {}  # 边编号 -> relationship 以外的边属性（例如静态推测的 resolution）
+
+        self._built = False
+        self.out_offsets = self.out_targets = self.out_edges = None  # CSR：起点 i 的边为 out_*[out_offsets[i]:out_offsets[i + 1]]
+        self.in_offsets = self.in_sources = self.in_edges = None  # CSC：终点 i 的边为 in_*[in_offsets[i]:in_offsets[i + 1]]
+        self.out_shared = self.in_shared = None  # 区间中有重复邻居的节点标记
+        self._view = None
+
+    @classmethod
+    def from_graph(cls, graph, module_classifier=None):
+        """由 DiGraph（CodeGraph.graph 或 node_link_graph 加载的图）建立紧凑存储，code 的 SourceSpan 不解码"""
+        compact = cls(module_classifier)
+        compact.graph_attributes.update(graph.graph)
+        for node, attributes in graph.nodes(data=True):
+            compact._put_node(node, **dict(dict.items(attributes)))
+        for source, target, attributes in graph.edges(data=True):
+            extras = {key: value for key, value in attributes.items() if key not in ('relationship', 'relationships')}
+            for relationship in edge_relationships(attributes) or [None]:
+                compact._put_edge(source, target, relationship, **extras)
+        compact._index_loaded_graph(graph)
+        return compact
+
+    # ---------------------------------------------------------------
+    # 图存储的基本操作
+    # ---------------------------------------------------------------
+
+    def _has_node(self, fullname):
+        return fullname in self.ids
+
+    def _put_node(self, fullname, **attributes):
+        node_id = self.ids.get(fullname)
+        if node_id is None:
+            node_id = self._new_node(fullname)
+        for key, value in attributes.items():
+            if key == 'type':
+                self.types[node_id] = self._code_of(value, self.type_names, self._type_codes)
+            elif key == 'code':
+                self.codes[node_id] = value
+            elif key == 'signature':
+                self.signatures[node_id] = value
+            else:
+                self.node_extras.setdefault(node_id, {})[key] = value
+        return node_id
+
+    def _new_node(self, fullname):
+        node_id = len(self.names)
+        self.names.append(fullname)
+        self.ids[fullname] = node_id
+        self.types.append(self._code_of(None, self.type_names, self._type_codes))
+        self.codes.append(None)
+        self.signatures.append(None)
+        self._built = False
+        return node_id
+
+    def _put_edge(self, source_fullname, target_fullname, relationship=None, **attributes):
+        # 与 DiGraph.add_edge 相同，不存在的端点自动创建（没有任何属性）
+        source = self.ids.get(source_fullname)
+        if source is None:
+            source = self._new_node(source_fullname)
+        target = self.ids.get(target_fullname)
+        if target is None:
+            target = self._new_node(target_fullname)
+        edge_id = len(self.edge_sources)
+        self.edge_sources.append(source)
+        self.edge_targets.append(target)
+        self.edge_relationships.append(self._code_of(relationship, self.relationship_names, self._relationship_codes))
+        if attributes:
+            self.edge_extras[edge_id] = attributes
+        self._built = False
+
+    @staticmethod
+    def _code_of(name, names, codes):
+        code = codes.get(name)
+        if code is None:
+            # None 也占一个编号，表示没有该属性
+            code = codes[name] = len(names)
+            names.append(name)
+        return code
+
+    def remove_node(self, fullname):
+        raise NotImplementedError("CompactCodeGraph is built once; convert with to_networkx() to modify it")
+
+    def remove_edge(self, source_fullname, target_fullname, relationship):
+        raise NotImplementedError("CompactCodeGraph is built once; convert with to_networkx() to modify it")
+
+    def remove_out_edges(self, fullname, relationship):
+        raise NotImplementedError("CompactCodeGraph is built once; convert with to_networkx() to modify it")
+
+    # ---------------------------------------------------------------
+    # CSR / CSC
+    # ---------------------------------------------------------------
+
+    def build(self):
+        """合并重复添加的边，然后用计数排序建立 CSR 和 CSC 数组，O(N + E)"""
+        if self._built:
+            return
+        self._merge_duplicate_edges()
+        node_count = len(self.names)
+        sources, targets = self.edge_sources, self.edge_targets
+        self.out_offsets, self.out_targets, self.out_edges = _counting_sort(sources, targets, node_count)
+        self.in_offsets, self.in_sources, self.in_edges = _counting_sort(targets, sources, node_count)
+        self.out_shared = _shared_neighbors(self.out_offsets, self.out_targets, node_count)
+        self.in_shared = _shared_neighbors(self.in_offsets, self.in_sources, node_count)
+        self._built = True
+        self._view = None  # 视图引用的是上一次建立的数组
+
+    def _merge_duplicate_edges(self):
+        """同一对节点之间同一种关系的边只保留第一次添加的一条，附加属性合并"""
+        first = {}  # (source * 节点数 + target) * 256 + 关系编号 -> 这条边在 keep 中的位置
+        node_count = len(self.names)
+        keep = array('i')
+        for edge_id, (source, target, relationship) in enumerate(
+                zip(self.edge_sources, self.edge_targets, self.edge_relationships)):
+            key = (source * node_count + target) * 256 + relationship
+            kept = first.get(key)
+            if kept is None:
+                first[key] = len(keep)
+                keep.append(edge_id)
+                continue
+            extras = self.edge_extras.pop(edge_id, None)
+            if extras:
+                self.edge_extras.setdefault(keep[kept], {}).update(extras)
+        if len(keep) == len(self.edge_sources):
+            return
+        self.edge_sources = array('i', (self.edge_sources[edge_id] for edge_id in keep))
+        self.edge_targets = array('i', (self.edge_targets[edge_id] for edge_id in keep))
+        self.edge_relationships = array('B', (self.edge_relationships[edge_id] for edge_id in keep))
+        self.edge_extras = {new_id: self.edge_extras[edge_id] for new_id, edge_id in enumerate(keep)
+                            if edge_id in self.edge_extras}
+
+    # ---------------------------------------------------------------
+    # 查询
+    # ---------------------------------------------------------------
+
+    def number_of_nodes(self):
+        return len(self.names)
+
+    def number_of_edges(self):
+        """带关系类型的边数（同一对节点之间的多种关系分别计数）"""
+        self.build()
+        return len(self.edge_sources)
+
+    def node_type(self, fullname):
+        return self.type_names[self.types[self.ids[fullname]]]
+
+    def node_attributes(self, node_id):
+        """节点的属性字典，code 保持 SourceSpan（读取时才解码）"""
+        attributes = NodeAttributes()
+        dict.__setitem__(attributes, 'type', self.type_names[self.types[node_id]])
+        dict.__setitem__(attributes, 'code', self.codes[node_id])
+        dict.__setitem__(attributes, 'signature', self.signatures[node_id])
+        extras = self.node_extras.get(node_id)
+        if extras:
+            dict.update(attributes, extras)
+        return attributes
+
+    def edge_attributes(self, edge_ids):
+        """同一对节点之间若干条边合并后的属性字典，与 CodeGraph.graph 中的边相同"""
+        if len(edge_ids) == 1:
+            edge_id = edge_ids[0]
+            relationship = self.relationship_names[self.edge_relationships[edge_id]]
+            attributes = {} if relationship is None else {'relationship': relationship}
+            extras = self.edge_extras.get(edge_id)
+            if extras:
+                attributes.update(extras)
+            return attributes
+        relationships = self.edge_relationships
+        edge_ids = sorted(edge_ids, key=lambda edge_id: relationships[edge_id])
+        return merge_edge_attributes([(self.relationship_names[relationships[edge_id]], self.edge_extras.get(edge_id))
+                                      for edge_id in edge_ids])
+
+    def successor_ids(self, node_id, relationship=None):
+        """起点为 node_id 的边的终点编号，relationship 不为 None 时只取该关系的边"""
+        self.build()
+        return self._neighbor_ids(node_id, relationship, self.out_offsets, self.out_targets, self.out_edges)
+
+    def predecessor_ids(self, node_id, relationship=None):
+        """终点为 node_id 的边的起点编号，relationship 不为 None 时只取该关系的边"""
+        self.build()
+        return self._neighbor_ids(node_id, relationship, self.in_offsets, self.in_sources, self.in_edges)
+
+    def _neighbor_ids(self, node_id, relationship, offsets, neighbors, edges):
+        start, end = offsets[node_id], offsets[node_id + 1]
+        if relationship is None:
+            return neighbors[start:end]
+        code = self._relationship_codes.get(relationship)
+        relationships = self.edge_relationships
+        return [neighbors[i] for i in range(start, end) if relationships[edges[i]] == code]
+
+    def successors(self, fullname, relationship=None):
+        """与 CodeGraph.successors 相同：relationship 为 None 时返回不重复的所有后继"""
+        return self._names_of(fullname, relationship, self.successor_ids)
+
+    def predecessors(self, fullname, relationship=None):
+        """与 CodeGraph.predecessors 相同：relationship 为 None 时返回不重复的所有前驱"""
+        return self._names_of(fullname, relationship, self.predecessor_ids)
+
+    def _names_of(self, fullname, relationship, neighbor_ids):
+        node_id = self.ids.get(fullname)
+        if node_id is None:
+            return []
+        node_ids = neighbor_ids(node_id, relationship)
+        if relationship is None:
+            node_ids = dict.fromkeys(node_ids)
+        names = self.names
+        return [names[neighbor] for neighbor in node_ids]
+
+    def descendant_ids(self, node_id, relationship=None):
+        """沿 relationship 关系的边（None 表示所有边）从 node_id 可以到达的节点编号，不含自身"""
+        self.build()
+        offsets, targets, edges = self.out_offsets, self.out_targets, self.out_edges
+        relationships = self.edge_relationships
+        code = self._relationship_codes.get(relationship) if relationship is not None else None
+        seen = bytearray(len(self.names))
+        seen[node_id] = 1
+        stack = [node_id]
+        found = []
+        while stack:
+            current = stack.pop()
+            for i in range(offsets[current], offsets[current + 1]):
+                if code is not None and relationships[edges[i]] != code:
+                    continue
+                target = targets[i]
+                if not seen[target]:
+                    seen[target] = 1
+                    found.append(target)
+                    stack.append(target)
+        return found
+
+    def get_graph(self):
+        return self.graph
+
+    @property
+    def graph(self):
+        """只读的 networkx 视图，节点和边的属性在访问时由数组生成"""
+        self.build()
+        if self._view is None:
+            self._view = CompactGraphView(self)
+        return self._view
+
+    def to_networkx(self):
+        """转换为可以修改的 CodeDiGraph，code 的 SourceSpan 不解码"""
+        view = self.graph
+        graph = CodeDiGraph()
+        graph.graph.update(self.graph_attributes)
+        graph.add_nodes_from(self.names)
+        for node_id, fullname in enumerate(self.names):
+            dict.update(graph.nodes[fullname], dict.items(self.node_attributes(node_id)))
+        graph.add_edges_from(view.edges(data=True))
+        return graph
+
+
+def _counting_sort(keys, values, node_count):
+    """按 keys 对边做稳定的计数排序，返回 (偏移数组, 排序后的 values, 排序后的边编号)"""
+    offsets = array('i', bytes(4 * (node_count + 1)))
+    for key in keys:
+        offsets[key + 1] += 1
+    for i in range(node_count):
+        offsets[i + 1] += offsets[i]
+    positions = array('i', offsets)
+    sorted_values = array('i', bytes(4 * len(keys)))
+    edge_ids = array('i', bytes(4 * len(keys)))
+    for edge_id, (key, value) in enumerate(zip(keys, values)):
+        position = positions[key]
+        sorted_values[position] = value
+        edge_ids[position] = edge_id
+        positions[key] = position + 1
+    return offsets, sorted_values, edge_ids
+
+
+def _shared_neighbors(offsets, neighbors, node_count):
+    """标记哪些节点的区间中有重复的邻居（同一对节点之间有多种关系的边），其余节点的视图不必去重"""
+    shared = bytearray(node_count)
+    for node_id in range(node_count):
+        start, end = offsets[node_id], offsets[node_id + 1]
+        if end - start > 1 and len(set(neighbors[start:end])) < end - start:
+            shared[node_id] = 1
+    return shared
+
+
+class _NodeMapping(Mapping):
+    """节点全名 -> 属性字典"""
+    def __init__(self, compact):
+        self.compact = compact
+
+    def __getitem__(self, fullname):
+        return self.compact.node_attributes(self.compact.ids[fullname])
+
+    def __iter__(self):
+        return iter(self.compact.names)
+
+    def __len__(self):
+        return len(self.compact.names)
+
+    def __contains__(self, fullname):
+        return fullname in self.compact.ids
+
+
+class _Neighbors(Mapping):
+    """
+    一个节点的后继（或前驱）全名 -> 边的属性字典，按 CSR / CSC 中第一次出现的顺序。
+    同一个邻居有多种关系的边时（shared）合并为一项，与 CodeGraph.graph 相同
+    """
+    __slots__ = ('compact', 'start', 'end', 'neighbors', 'edges', 'shared')
+
+    def __init__(self, compact, node_id, offsets, neighbors, edges, shared):
+        self.compact = compact
+        self.start, self.end = offsets[node_id], offsets[node_id + 1]
+        self.neighbors = neighbors
+        self.edges = edges
+        self.shared = shared[node_id]
+
+    def _edge_ids(self, fullname):
+        node_id = self.compact.ids.get(fullname)
+        if node_id is None:
+            return []
+        neighbors, edges = self.neighbors, self.edges
+        return [edges[i] for i in range(self.start, self.end) if neighbors[i] == node_id]
+
+    def __getitem__(self, fullname):
+        edge_ids = self._edge_ids(fullname)
+        if not edge_ids:
+            raise KeyError(fullname)
+        return self.compact.edge_attributes(edge_ids)
+
+    def __contains__(self, fullname):
+        node_id = self.compact.ids.get(fullname)
+        return node_id is not None and node_id in self.neighbors[self.start:self.end]
+
+    def __iter__(self):
+        # 遍历算法对每个节点都会调用一次，尽量少创建对象
+        neighbors = self.neighbors[self.start:self.end]
+        if self.shared:
+            neighbors = dict.fromkeys(neighbors)
+        return map(self.compact.names.__getitem__, neighbors)
+
+    def __len__(self):
+        if self.shared:
+            return len(set(self.neighbors[self.start:self.end]))
+        return self.end - self.start
+
+    def items(self):
+        names, neighbors, edges = self.compact.names, self.neighbors, self.edges
+        if not self.shared:
+            return [(names[neighbors[i]], self.compact.edge_attributes((edges[i],)))
+                    for i in range(self.start, self.end)]
+        grouped = {}
+        for i in range(self.start, self.end):
+            grouped.setdefault(neighbors[i], []).append(edges[i])
+        return [(names[neighbor], self.compact.edge_attributes(edge_ids)) for neighbor, edge_ids in grouped.items()]
+
+
+class _Adjacency(Mapping):
+    """节点全名 -> _Neighbors"""
+    def __init__(self, compact, offsets, neighbors, edges, shared):
+        self.compact = compact
+        self.offsets = offsets
+        self.neighbors = neighbors
+        self.edges = edges
+        self.shared = shared
+
+    def __getitem__(self, fullname):
+        return _Neighbors(self.compact, self.compact.ids[fullname], self.offsets, self.neighbors, self.edges,
+                          self.shared)
+
+    def __iter__(self):
+        return iter(self.compact.names)
+
+    def __len__(self):
+        return len(self.compact.names)
+
+    def __contains__(self, fullname):
+        return fullname in self.compact.ids
+
+
+class CompactGraphView(nx.DiGraph):
+    """
+    CompactCodeGraph 的只读 DiGraph 视图：_node、_succ、_pred 换成由 CSR / CSC 数组实现的映射，
+    G.nodes、G.edges、G.successors、nx.descendants、node_link_data 等都可以直接使用。
+    属性字典在每次访问时生成，修改它们不会写回；修改图的方法与 nx.freeze 一样抛出异常。
+    """
+    def __init__(self, compact):
+        super().__init__()
+        compact.build()
+        self.compact = compact
+        self.graph.update(compact.graph_attributes)
+        self._node = _NodeMapping(compact)
+        self._adj = _Adjacency(compact, compact.out_offsets, compact.out_targets, compact.out_edges, compact.out_shared)
+        self._pred = _Adjacency(compact, compact.in_offsets, compact.in_sources, compact.in_edges, compact.in_shared)
+        nx.freeze(self)
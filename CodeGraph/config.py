@@ -3,3 +3,15 @@ PROJECT_PATH = "/home/sxj/Desktop/Workspace/CodeQl/gptgraph/DevEval/Source_Code/
 NEO4J_URL = "bolt://localhost:7689"     # Neo4j数据库的URL
 NEO4J_USER = "neo4j"                    # Neo4j数据库的用户名
 NEO4J_PASSWORD = "12341234"             # Neo4j数据库的密码
+PARSE_WORKERS = 1                       # 项目内部并行解析文件的进程数，1 表示串行解析
+PARSE_CACHE_DIR = None                  # 增量构建的逐文件解析缓存目录，None 表示不使用缓存
+RESOLVER_BACKEND = "lsp"                # 查找定义的后端："lsp" 为 multilspy 语言服务器，"jedi" 为进程内的 jedi
+LSP_MAX_IN_FLIGHT = 16                  # 批量查找定义时每个语言服务器同时在途的请求数上限
+LSP_POOL_SIZE = None                    # 语言服务器进程数（jedi 后端为工作者个数），None 表示按 CPU 核数和可用内存自动确定
+LSP_REQUEST_TIMEOUT = 10.0              # 单个定义请求的期限（秒），超时后改用静态推测
+LSP_REPO_BUDGET = None                  # 一个项目所有 LSP 请求的总时间预算（秒），None 表示不限
+LSP_BREAKER_THRESHOLD = 5               # 连续超时达到该次数后熔断，剩余调用点全部改用静态推测
+STATIC_RESOLVE = True                   # 解析调用前先用作用域表静态消歧，只有无法静态确定的调用点才请求 LSP
+DISCOVERY_EXCLUDES = None               # 额外的排除规则（gitignore 语法，相对项目根目录），None 表示默认规则（.git、虚拟环境、缓存等）
+MAX_FILE_SIZE = 1024 * 1024             # 超过该大小（字节）的 Python 文件视为生成文件，不解析
+GRAPH_BACKEND = "networkx"              # 代码图后端："networkx" 为 CodeGraph（nx.DiGraph），"compact" 为 CompactCodeGraph（整数编号 + CSR 数组）
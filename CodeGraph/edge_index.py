@@ -0,0 +1,161 @@
+RELATIONSHIPS = ('CONTAINS', 'IMPORTS', 'CALLS', 'SIMILAR')
+
+
+def merge_edge_attributes(typed_edges):
+    """
+    同一对节点之间多条不同关系的边在 DiGraph 中合并为一条边的属性：
+    relationship 为按 RELATIONSHIPS 顺序的第一种关系（CONTAINS 优先，层次结构不会被 CALLS 覆盖），
+    其余属性依次合并，有多种关系时 relationships 按同样的顺序列出全部关系。
+    :param typed_edges: [(关系, 附加属性字典或 None)]，按 RELATIONSHIPS 顺序排列
+    """
+    attributes = {'relationship': typed_edges[0][0]}
+    for _, extras in typed_edges:
+        if extras:
+            attributes.update(extras)
+    if len(typed_edges) > 1:
+        attributes['relationships'] = [relationship for relationship, _ in typed_edges]
+    return attributes
+
+
+def edge_relationships(attributes):
+    """DiGraph 边属性中记录的全部关系（兼容只有 relationship 的边）"""
+    relationships = attributes.get('relationships')
+    if relationships:
+        return list(relationships)
+    relationship = attributes.get('relationship')
+    return [relationship] if relationship is not None else []
+
+
+class EdgeIndex:
+    """
+    按关系类型分开的双向邻接索引：outgoing[关系][起点] = {终点: 附加属性}，incoming[关系][终点] = {起点: 附加属性}。
+    同一对节点之间可以同时有 CONTAINS、IMPORTS、CALLS、SIMILAR 等多条边，互不覆盖；
+    "X 调用了谁"、"谁调用了 X"、"谁导入了模块 M" 等查询只访问该节点的邻居，耗时与度数成正比，不扫描全部边。
+    附加属性（例如 CALLS 边的 resolution）没有时保存为 None。
+    """
+    def __init__(self):
+        self.outgoing = {relationship: {} for relationship in RELATIONSHIPS}
+        self.incoming = {relationship: {} for relationship in RELATIONSHIPS}
+
+    @classmethod
+    def from_graph(cls, graph):
+        """由 DiGraph（CodeGraph.graph、GraphStore 或 node-link JSON 加载的图）建立索引，O(E)"""
+        index = cls()
+        for source, target, attributes in graph.edges(data=True):
+            extras = {key: value for key, value in attributes.items() if key not in ('relationship', 'relationships')}
+            for relationship in edge_relationships(attributes):
+                index.add(source, target, relationship, extras)
+        return index
+
+    def _maps(self, relationship):
+        outgoing = self.outgoing.get(relationship)
+        if outgoing is None:
+            # 其他关系类型在出现时加入，排在 RELATIONSHIPS 之后
+            outgoing = self.outgoing[relationship] = {}
+            self.incoming[relationship] = {}
+        return outgoing, self.incoming[relationship]
+
+    def add(self, source, target, relationship, extras=None):
+        """添加一条边，已存在时合并附加属性"""
+        outgoing, incoming = self._maps(relationship)
+        targets = outgoing.setdefault(source, {})
+        if extras and targets.get(target):
+            extras = {**targets[target], **extras}
+        targets[target] = extras or targets.get(target) or None
+        incoming.setdefault(target, {})[source] = targets[target]
+
+    def remove(self, source, target, relationship):
+        """删除一条边，返回是否存在"""
+        outgoing = self.outgoing.get(relationship)
+        if outgoing is None or target not in outgoing.get(source, ()):
+            return False
+        self._discard(outgoing, source, target)
+        self._discard(self.incoming[relationship], target, source)
+        return True
+
+    def remove_node(self, node):
+        """删除与节点相连的所有边，返回被删除的 (起点, 终点) 对"""
+        pairs = set()
+        for relationship, outgoing in self.outgoing.items():
+            incoming = self.incoming[relationship]
+            for target in outgoing.pop(node, {}):
+                self._discard(incoming, target, node)
+                pairs.add((node, target))
+            for source in incoming.pop(node, {}):
+                self._discard(outgoing, source, node)
+                pairs.add((source, node))
+        return pairs
+
+    @staticmethod
+    def _discard(adjacency, node, neighbor):
+        neighbors = adjacency.get(node)
+        if neighbors is not None:
+            neighbors.pop(neighbor, None)
+            if not neighbors:
+                del adjacency[node]
+
+    def has_edge(self, source, target, relationship):
+        outgoing = self.outgoing.get(relationship)
+        return outgoing is not None and target in outgoing.get(source, ())
+
+    def attributes(self, source, target, relationship):
+        """边的附加属性（不含 relationship），边不存在时抛出 KeyError"""
+        return dict(self.outgoing[relationship][source][target] or {})
+
+    def relationships(self, source, target):
+        """两个节点之间所有边的关系，按 RELATIONSHIPS 顺序"""
+        return [relationship for relationship, outgoing in self.outgoing.items()
+                if target in outgoing.get(source, ())]
+
+    def typed_edges(self, source, target):
+        """两个节点之间的 [(关系, 附加属性)]，按 RELATIONSHIPS 顺序，供 merge_edge_attributes 使用"""
+        return [(relationship, outgoing[source][target]) for relationship, outgoing in self.outgoing.items()
+                if target in outgoing.get(source, ())]
+
+    def successors(self, node, relationship):
+        """node 发出的 relationship 边的终点，按添加顺序"""
+        return list(self.outgoing.get(relationship, {}).get(node, ()))
+
+    def predecessors(self, node, relationship):
+        """指向 node 的 relationship 边的起点，按添加顺序"""
+        return list(self.incoming.get(relationship, {}).get(node, ()))
+
+    def out_degree(self, node, relationship):
+        return len(self.outgoing.get(relationship, {}).get(node, ()))
+
+    def in_degree(self, node, relationship):
+        return len(self.incoming.get(relationship, {}).get(node, ()))
+
+    def edges(self, relationship):
+        """某种关系的所有边 (起点, 终点, 附加属性)"""
+        for source, targets in self.outgoing.get(relationship, {}).items():
+            for target, extras in targets.items():
+                yield source, target, dict(extras or {})
+
+    def number_of_edges(self, relationship=None):
+        relationships = [relationship] if relationship is not None else list(self.outgoing)
+        return sum(len(targets) for name in relationships for targets in self.outgoing.get(name, {}).values())
+
+    # 常用查询
+    def callees(self, node):
+        return self.successors(node, 'CALLS')
+
+    def callers(self, node):
+        return self.predecessors(node, 'CALLS')
+
+    def imports(self, module):
+        return self.successors(module, 'IMPORTS')
+
+    def importers(self, node):
+        return self.predecessors(node, 'IMPORTS')
+
+    def children(self, node):
+        return self.successors(node, 'CONTAINS')
+
+    def parent(self, node):
+        parents = self.incoming['CONTAINS'].get(node)
+        return next(iter(parents)) if parents else None
+
+    def similar(self, node):
+        """SIMILAR 边没有方向，两个方向的邻居都算"""
+        return list(dict.fromkeys(self.successors(node, 'SIMILAR') + self.predecessors(node, 'SIMILAR')))
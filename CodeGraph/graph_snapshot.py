@@ -0,0 +1,444 @@
+import os
+import sys
+import json
+import mmap
+import struct
+import logging
+from array import array
+from code_graph import CodeGraph, CodeDiGraph, NodeAttributes
+from parsers.source_buffer import SourceStore, SourceSpan
+from graph_store import source_signature, is_stale
+
+FORMAT = "codegraph-snapshot"
+MAGIC = b"CGSNAP\0\0"
+VERSION = 1  # 快照格式版本
+SNAPSHOT_SUFFIX = ".snapshot"
+_HEADER = struct.Struct("<8sIIQQ")  # 魔数、版本、保留、元数据偏移、元数据长度
+_ALIGNMENT = 8  # 每个段按 8 字节对齐，可以直接转换为数组视图
+
+# 属性列中缺失和 None 的标记
+MISSING = 0xFFFFFFFF
+NONE = 0xFFFFFFFE
+CODE_MISSING = 0xFFFFFFFFFFFFFFFF
+CODE_NONE = 0xFFFFFFFFFFFFFFFE
+_MISSING_VALUE = object()  # 写入、读取属性列时表示节点（边）没有该属性
+
+
+def snapshot_path(path):
+    """快照文件路径。path 可以是快照文件本身，也可以是同名的 node-link JSON 文件（<repo>.json -> <repo>.snapshot）"""
+    if path.endswith(SNAPSHOT_SUFFIX):
+        return path
+    base = path[:-len(".json")] if path.endswith(".json") else path
+    return base + SNAPSHOT_SUFFIX
+
+
+class _StringTable:
+    """去重的字符串表：字符串 -> 编号，按编号保存 UTF-8 字节"""
+    def __init__(self):
+        self.ids = {}
+        self.encoded = []
+
+    def add(self, value):
+        string_id = self.ids.get(value)
+        if string_id is None:
+            string_id = self.ids[value] = len(self.encoded)
+            self.encoded.append(value.encode("utf-8", errors="surrogatepass"))
+        return string_id
+
+
+def _column_kind(key, values):
+    """属性列的存储方式：code（源码段中的字节范围）、str（字符串编号）或 json（JSON 文本的字符串编号）"""
+    present = [value for value in values if value is not _MISSING_VALUE and value is not None]
+    if key == "code" and all(isinstance(value, (str, SourceSpan)) for value in present):
+        return "code"
+    if all(isinstance(value, str) for value in present):
+        return "str"
+    return "json"
+
+
+def _encode_column(kind, values, strings):
+    encoded = []
+    for value in values:
+        if value is _MISSING_VALUE:
+            encoded.append(MISSING)
+        elif value is None:
+            encoded.append(NONE)
+        elif kind == "str":
+            encoded.append(strings.add(value))
+        else:
+            if isinstance(value, SourceSpan):
+                value = value.text()
+            encoded.append(strings.add(json.dumps(value, ensure_ascii=False)))
+    return encoded
+
+
+def _collect_columns(rows, count):
+    """[(属性字典)] -> {键: 值列表}，按键第一次出现的顺序，没有该属性的位置为 _MISSING_VALUE"""
+    columns = {}
+    for position, attributes in enumerate(rows):
+        # 直接读取原始值，SourceSpan 不解码
+        for key, value in dict.items(attributes):
+            column = columns.get(key)
+            if column is None:
+                column = columns[key] = [_MISSING_VALUE] * count
+            column[position] = value
+    return columns
+
+
+def save_graph_snapshot(graph, path):
+    """
+    把代码图保存为一个二进制快照文件，打开时用 mmap 映射，不需要解析：
+      - 文件头：魔数、版本、元数据（JSON，只有段的位置、属性列的名称和类型、图属性）的位置
+      - 字符串表：所有字符串的 UTF-8 字节首尾相接，string_offsets 为每个字符串的起始偏移
+      - 节点：node_names 为每个节点全名的字符串编号，name_order 为按全名排序的节点编号（二分查找节点）
+      - 边：CSR（out_offsets / out_targets，按起点）和 CSC（in_offsets / in_sources / in_edges，按终点）
+      - 属性列：节点和边的每个属性一列，code 为源码段中的 [start, end) 字节范围，其余为字符串编号
+      - 源码段：所有源码字节首尾相接，code 为 SourceSpan 时每个源文件只写入一次
+    先写入临时文件，完成后替换原文件。path 为已经写出的 node-link JSON 时在元数据中记录它的大小和修改时间，
+    打开时据此判断快照是否过期。
+    :param graph: 有向图（CodeGraph.graph、CompactGraphView 或加载的 DiGraph）
+    :param path: 快照文件路径，或同名的 node-link JSON 文件路径
+    """
+    if graph.is_multigraph() or not graph.is_directed():
+        raise ValueError("Graph snapshot only supports simple directed graphs")
+    target_path = snapshot_path(path)
+    temp_path = target_path + ".tmp"
+    strings = _StringTable()
+    names = list(graph)
+    ids = {name: node_id for node_id, name in enumerate(names)}
+    node_columns = _collect_columns([graph.nodes[name] for name in names], len(names))
+
+    out_offsets = array('I', [0])
+    out_targets = array('I')
+    edge_rows = []
+    for name in names:
+        for target, attributes in graph.adj[name].items():
+            out_targets.append(ids[target])
+            edge_rows.append(attributes)
+        out_offsets.append(len(out_targets))
+    edge_columns = _collect_columns(edge_rows, len(edge_rows))
+    in_offsets, in_sources, in_edges = _reverse(out_offsets, out_targets, len(names))
+
+    sections = {}
+    with open(temp_path, 'wb') as f:
+        f.write(b"\0" * _HEADER.size)
+        node_schema = []
+        for key, values in node_columns.items():
+            kind = _column_kind(key, values)
+            node_schema.append([key, kind])
+            if kind == "code":
+                _write_code(f, sections, values)
+            else:
+                _write_array(f, sections, "node:" + key, 'I', _encode_column(kind, values, strings))
+        edge_schema = []
+        for key, values in edge_columns.items():
+            kind = _column_kind(None, values)
+            edge_schema.append([key, kind])
+            _write_array(f, sections, "edge:" + key, 'I', _encode_column(kind, values, strings))
+
+        node_names = array('I', map(strings.add, names))
+        name_order = sorted(range(len(names)), key=lambda node_id: strings.encoded[node_names[node_id]])
+        _write_array(f, sections, "node_names", 'I', node_names)
+        _write_array(f, sections, "name_order", 'I', name_order)
+        for name, values in (("out_offsets", out_offsets), ("out_targets", out_targets),
+                             ("in_offsets", in_offsets), ("in_sources", in_sources), ("in_edges", in_edges)):
+            _write_array(f, sections, name, 'I', values)
+
+        string_offsets = array('Q', [0])
+        for data in strings.encoded:
+            string_offsets.append(string_offsets[-1] + len(data))
+        _write_array(f, sections, "string_offsets", 'Q', string_offsets)
+        _align(f)
+        sections["strings"] = [f.tell(), string_offsets[-1], 'B']
+        for data in strings.encoded:
+            f.write(data)
+
+        meta = json.dumps({
+            "format": FORMAT,
+            "version": VERSION,
+            "nodes": len(names),
+            "edges": len(out_targets),
+            "graph": dict(graph.graph),
+            "source": source_signature(path if path.endswith(".json") else None),
+            "node_columns": node_schema,
+            "edge_columns": edge_schema,
+            "sections": sections,
+        }, ensure_ascii=False).encode("utf-8")
+        _align(f)
+        meta_offset = f.tell()
+        f.write(meta)
+        f.seek(0)
+        f.write(_HEADER.pack(MAGIC, VERSION, 0, meta_offset, len(meta)))
+    os.replace(temp_path, target_path)
+    logging.info(f"Graph snapshot saved to: {target_path} ({len(names)} nodes, {len(out_targets)} edges)")
+
+
+def _reverse(out_offsets, out_targets, node_count):
+    """由 CSR 计数排序得到 CSC：按终点排列的起点和边编号（同一终点的边保持边编号的顺序）"""
+    in_offsets = array('I', bytes(4 * (node_count + 1)))
+    for target in out_targets:
+        in_offsets[target + 1] += 1
+    for node_id in range(node_count):
+        in_offsets[node_id + 1] += in_offsets[node_id]
+    positions = array('I', in_offsets[:-1]) if node_count else array('I')
+    in_sources = array('I', bytes(4 * len(out_targets)))
+    in_edges = array('I', bytes(4 * len(out_targets)))
+    for source in range(node_count):
+        for edge_id in range(out_offsets[source], out_offsets[source + 1]):
+            target = out_targets[edge_id]
+            position = positions[target]
+            in_sources[position] = source
+            in_edges[position] = edge_id
+            positions[target] = position + 1
+    return in_offsets, in_sources, in_edges
+
+
+def _align(f):
+    padding = -f.tell() % _ALIGNMENT
+    if padding:
+        f.write(b"\0" * padding)
+
+
+def _write_array(f, sections, name, typecode, values):
+    """写入一个小端序的数组段"""
+    values = values if isinstance(values, array) and values.typecode == typecode else array(typecode, values)
+    if sys.byteorder != "little":
+        values = array(typecode, values)
+        values.byteswap()
+    _align(f)
+    sections[name] = [f.tell(), len(values) * values.itemsize, typecode]
+    values.tofile(f)
+
+
+def _write_code(f, sections, values):
+    """写入源码段和 code 列（每个节点两个 64 位整数，为源码段中的 [start, end)）"""
+    _align(f)
+    base = f.tell()
+    offsets = {}  # (id(store), file_id) -> 该文件在源码段中的起始偏移
+    ranges = array('Q')
+    position = 0
+    for value in values:
+        if value is _MISSING_VALUE:
+            ranges.extend((CODE_MISSING, CODE_MISSING))
+        elif value is None:
+            ranges.extend((CODE_NONE, CODE_NONE))
+        elif isinstance(value, SourceSpan):
+            buffer_key = (id(value.store), value.file_id)
+            start = offsets.get(buffer_key)
+            if start is None:
+                data = value.store.buffers[value.file_id]
+                f.write(data)
+                start = offsets[buffer_key] = position
+                position += len(data)
+            ranges.extend((start + value.start_byte, start + value.end_byte))
+        else:
+            data = value.encode("utf-8", errors="surrogatepass")
+            f.write(data)
+            ranges.extend((position, position + len(data)))
+            position += len(data)
+    sections["code"] = [base, position, 'B']
+    _write_array(f, sections, "node:code", 'Q', ranges)
+
+
+class GraphSnapshot:
+    """
+    打开的图快照：整个文件只读映射（mmap），除了很小的元数据外不做任何解析。
+    字符串表、节点、CSR / CSC 邻接和属性列都是直接指向映射内容的数组视图，
+    按编号或全名查询节点、邻居和属性时才解码用到的字符串；code 为指向源码段的 SourceSpan，读取时才解码。
+    需要完整的图时用 to_networkx / node_dicts / to_code_graph 转换。
+    """
+    def __init__(self, path):
+        self.path = snapshot_path(path)
+        with open(self.path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, meta_offset, meta_length = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            self._mmap.close()
+            raise ValueError(f"Unsupported graph snapshot: {self.path} version {version}")
+        meta = json.loads(self._mmap[meta_offset:meta_offset + meta_length])
+        self.graph_attributes = meta["graph"]
+        self.source = meta.get("source")  # 保存时同名 node-link JSON 的大小和修改时间
+        self.node_columns = [tuple(column) for column in meta["node_columns"]]
+        self.edge_columns = [tuple(column) for column in meta["edge_columns"]]
+        self._sections = meta["sections"]
+        self._views = []
+
+        self.string_offsets = self._array("string_offsets")
+        self._strings_base = self._sections["strings"][0]
+        self.node_names = self._array("node_names")
+        self.name_order = self._array("name_order")
+        self.out_offsets = self._array("out_offsets")
+        self.out_targets = self._array("out_targets")
+        self.in_offsets = self._array("in_offsets")
+        self.in_sources = self._array("in_sources")
+        self.in_edges = self._array("in_edges")
+        self.node_values = {key: self._array("node:" + key) for key, _ in self.node_columns}
+        self.edge_values = {key: self._array("edge:" + key) for key, _ in self.edge_columns}
+        # 源码段的 SourceSpan 直接指向映射内容（文件编号 0，偏移为文件中的绝对位置）
+        self.sources = SourceStore()
+        self.sources.add(self.path, self._mmap)
+        self._code_base = self._sections["code"][0] if "code" in self._sections else 0
+
+    def _array(self, name):
+        offset, length, typecode = self._sections[name]
+        with memoryview(self._mmap) as whole:
+            view = whole[offset:offset + length].cast(typecode)
+        if sys.byteorder != "little":
+            values = array(typecode, view)
+            values.byteswap()
+            view.release()
+            return values
+        self._views.append(view)
+        return view
+
+    def close(self):
+        """释放数组视图并关闭映射，之后不能再读取（包括转换出的图中的 code）"""
+        for view in self._views:
+            view.release()
+        self._views = []
+        self.sources.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    # ---------------------------------------------------------------
+    # 直接在映射上查询
+    # ---------------------------------------------------------------
+
+    def number_of_nodes(self):
+        return len(self.node_names)
+
+    def number_of_edges(self):
+        return len(self.out_targets)
+
+    def _string_bytes(self, string_id):
+        base = self._strings_base
+        return self._mmap[base + self.string_offsets[string_id]:base + self.string_offsets[string_id + 1]]
+
+    def string(self, string_id):
+        return self._string_bytes(string_id).decode("utf-8", errors="surrogatepass")
+
+    def node_name(self, node_id):
+        return self.string(self.node_names[node_id])
+
+    def node_id(self, name):
+        """按全名二分查找节点编号，不存在时返回 None"""
+        key = name.encode("utf-8", errors="surrogatepass")
+        order, names = self.name_order, self.node_names
+        low, high = 0, len(order)
+        while low < high:
+            middle = (low + high) // 2
+            if self._string_bytes(names[order[middle]]) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(order) and self._string_bytes(names[order[low]]) == key:
+            return order[low]
+        return None
+
+    def _value(self, kind, values, index):
+        if kind == "code":
+            start, end = values[2 * index], values[2 * index + 1]
+            if start == CODE_MISSING:
+                return _MISSING_VALUE
+            if start == CODE_NONE:
+                return None
+            return SourceSpan(self.sources, 0, self._code_base + start, self._code_base + end)
+        string_id = values[index]
+        if string_id == MISSING:
+            return _MISSING_VALUE
+        if string_id == NONE:
+            return None
+        text = self.string(string_id)
+        return text if kind == "str" else json.loads(text)
+
+    def _attributes(self, columns, column_values, index, attributes):
+        for key, kind in columns:
+            value = self._value(kind, column_values[key], index)
+            if value is not _MISSING_VALUE:
+                dict.__setitem__(attributes, key, value)
+        return attributes
+
+    def node_attributes(self, node_id):
+        """节点的属性（NodeAttributes，code 为 SourceSpan，读取时才解码）"""
+        return self._attributes(self.node_columns, self.node_values, node_id, NodeAttributes())
+
+    def edge_attributes(self, edge_id):
+        return self._attributes(self.edge_columns, self.edge_values, edge_id, {})
+
+    def successor_ids(self, node_id):
+        return list(self.out_targets[self.out_offsets[node_id]:self.out_offsets[node_id + 1]])
+
+    def predecessor_ids(self, node_id):
+        return list(self.in_sources[self.in_offsets[node_id]:self.in_offsets[node_id + 1]])
+
+    def successors(self, name):
+        node_id = self.node_id(name)
+        return [] if node_id is None else [self.node_name(target) for target in self.successor_ids(node_id)]
+
+    def predecessors(self, name):
+        node_id = self.node_id(name)
+        return [] if node_id is None else [self.node_name(source) for source in self.predecessor_ids(node_id)]
+
+    def edges(self):
+        """所有边 (起点编号, 终点编号, 边编号)，按起点排列"""
+        offsets, targets = self.out_offsets, self.out_targets
+        for source in range(len(self.node_names)):
+            for edge_id in range(offsets[source], offsets[source + 1]):
+                yield source, targets[edge_id], edge_id
+
+    # ---------------------------------------------------------------
+    # 转换
+    # ---------------------------------------------------------------
+
+    def names(self):
+        """按编号排列的所有节点全名"""
+        return [self.node_name(node_id) for node_id in range(len(self.node_names))]
+
+    def node_dicts(self):
+        """节点字典列表（与 node-link JSON 的 nodes 相同，包含 id），code 在读取时才解码"""
+        nodes = []
+        for node_id, name in enumerate(self.names()):
+            attributes = NodeAttributes()
+            dict.__setitem__(attributes, "id", name)
+            nodes.append(self._attributes(self.node_columns, self.node_values, node_id, attributes))
+        return nodes
+
+    def to_networkx(self):
+        """转换为 CodeDiGraph，节点的 code 在读取时才解码"""
+        graph = CodeDiGraph()
+        graph.graph.update(self.graph_attributes)
+        names = self.names()
+        graph.add_nodes_from(names)
+        node_data = graph.nodes
+        for node_id, name in enumerate(names):
+            # 直接写入原始值：经过 NodeAttributes 的 keys() / [] 复制会把 code 全部解码
+            self._attributes(self.node_columns, self.node_values, node_id, node_data[name])
+        graph.add_edges_from((names[source], names[target], self.edge_attributes(edge_id))
+                             for source, target, edge_id in self.edges())
+        return graph
+
+    def to_code_graph(self, graph_class=CodeGraph, module_classifier=None):
+        """转换为 CodeGraph（或 CompactCodeGraph），重建按关系的邻接索引、层次索引和导入路径索引"""
+        return graph_class.from_graph(self.to_networkx(), module_classifier)
+
+
+def open_graph_snapshot(path):
+    """
+    打开 path 对应的图快照（path 为快照文件或同名的 node-link JSON 文件），不存在时返回 None，
+    调用方可以退回到图存储或直接加载 JSON。path 为 JSON 时，快照与 JSON 不一致（JSON 重新生成或被修改后
+    没有重新导出快照）也返回 None：记录了 JSON 的大小和修改时间时逐项比较，否则比较修改时间
+    """
+    json_path = path if path.endswith(".json") else None
+    path = snapshot_path(path)
+    if not os.path.exists(path):
+        return None
+    snapshot = GraphSnapshot(path)
+    if is_stale(json_path, path, snapshot.source):
+        snapshot.close()
+        logging.info(f"Graph snapshot {path} does not match {json_path}, ignored")
+        return None
+    return snapshot
@@ -0,0 +1,190 @@
+import os
+import json
+import logging
+from code_graph import CodeDiGraph, NodeAttributes
+from parsers.source_buffer import SourceStore, SourceSpan
+
+FORMAT = "codegraph-store"
+VERSION = 1  # 存储格式版本
+STORE_SUFFIX = ".store.json"  # 结构与元数据文件
+CODE_SUFFIX = ".code.bin"  # 源码文件
+
+
+def store_paths(path):
+    """
+    图存储的两个文件路径 (结构文件, 源码文件)。
+    path 可以是结构文件本身，也可以是同名的 node-link JSON 文件（<repo>.json -> <repo>.store.json / <repo>.code.bin）
+    """
+    if path.endswith(STORE_SUFFIX):
+        base = path[:-len(STORE_SUFFIX)]
+    else:
+        base = path[:-len(".json")] if path.endswith(".json") else path
+    return base + STORE_SUFFIX, base + CODE_SUFFIX
+
+
+def _source_json(path):
+    """path 为 node-link JSON 文件（不是结构文件本身）时返回它，否则返回 None"""
+    if path.endswith(".json") and not path.endswith(STORE_SUFFIX):
+        return path
+    return None
+
+
+def source_signature(json_path):
+    """
+    node-link JSON 文件的大小和修改时间，保存到由它派生的图存储、快照的元数据中；
+    json_path 为 None 或文件不存在时返回 None
+    """
+    if json_path is None or not os.path.exists(json_path):
+        return None
+    stat = os.stat(json_path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def is_stale(json_path, derived_path, recorded=None):
+    """
+    由 node-link JSON 派生的文件（图存储或快照）是否已经过期：JSON 重新生成或被修改后没有重新导出。
+    记录了 JSON 的大小和修改时间（source_signature）时逐项比较，没有记录时比较两个文件的修改时间。
+    json_path 为 None 或 JSON 不存在时不检查
+    """
+    signature = source_signature(json_path)
+    if signature is None:
+        return False
+    if recorded is not None:
+        return recorded != signature
+    return os.stat(derived_path).st_mtime_ns < signature["mtime_ns"]
+
+
+def save_graph_store(graph, path):
+    """
+    把代码图保存为两个文件：
+      - 结构文件（JSON）：与 node-link 格式相同的节点、边和属性，节点的 code 替换为源码文件中的 [start, end] 字节范围
+      - 源码文件：所有源码字节首尾相接。code 为 SourceSpan 时每个源文件只写入一次，嵌套的模块、类、函数指向同一段字节
+    先写源码文件，结构文件写完才算保存完成。path 为已经写出的 node-link JSON 时记录它的大小和修改时间，
+    打开时据此判断存储是否过期。
+    :param graph: 有向图（CodeGraph.graph 或 node_link_graph 加载的 DiGraph）
+    :param path: 结构文件路径，或同名的 node-link JSON 文件路径
+    """
+    if graph.is_multigraph() or not graph.is_directed():
+        raise ValueError("Graph store only supports simple directed graphs")
+    meta_path, code_path = store_paths(path)
+    offsets = {}  # (id(store), file_id) -> 该文件在源码文件中的起始偏移
+    nodes = []
+    position = 0
+    with open(code_path, 'wb') as blob:
+        for node, attributes in graph.nodes(data=True):
+            entry = {"id": node}
+            # 直接读取原始值，SourceSpan 不解码
+            for key, value in dict.items(attributes):
+                if key == "code" and isinstance(value, SourceSpan):
+                    buffer_key = (id(value.store), value.file_id)
+                    base = offsets.get(buffer_key)
+                    if base is None:
+                        data = value.store.buffers[value.file_id]
+                        blob.write(data)
+                        base = offsets[buffer_key] = position
+                        position += len(data)
+                    value = [base + value.start_byte, base + value.end_byte]
+                elif key == "code" and isinstance(value, str):
+                    data = value.encode("utf-8", errors="surrogatepass")
+                    blob.write(data)
+                    value = [position, position + len(data)]
+                    position += len(data)
+                entry[key] = value
+            nodes.append(entry)
+
+    links = [{**attributes, "source": source, "target": target}
+             for source, target, attributes in graph.edges(data=True)]
+    meta = {
+        "format": FORMAT,
+        "version": VERSION,
+        "code_file": os.path.basename(code_path),
+        "source": source_signature(_source_json(path)),
+        "graph": dict(graph.graph),
+        "nodes": nodes,
+        "links": links,
+    }
+    with open(meta_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False)
+    logging.info(f"Graph store saved to: {meta_path} ({position} bytes of code)")
+
+
+class GraphStore:
+    """
+    打开的图存储：结构文件一次性加载（不含源码，体积小），源码文件只读映射（mmap）。
+    nodes / links 保持结构文件中的格式，节点的 code 为 [start, end]；
+    转换为节点字典或 networkx 图时 code 变为指向映射内容的 SourceSpan，首次读取时才从映射中切片解码。
+    """
+    def __init__(self, path):
+        meta_path, _ = store_paths(path)
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get("format") != FORMAT or meta.get("version") != VERSION:
+            raise ValueError(f"Unsupported graph store: {meta.get('format')} version {meta.get('version')}")
+        self.path = meta_path
+        self.source = meta.get("source")  # 保存时同名 node-link JSON 的大小和修改时间
+        self.graph_attributes = meta["graph"]
+        self.nodes = meta["nodes"]
+        self.links = meta["links"]
+        self.sources = SourceStore.mapped(os.path.join(os.path.dirname(meta_path), meta["code_file"]))
+
+    def code(self, entry):
+        """结构文件中一个节点的源码文本，没有源码时返回 None"""
+        code = entry.get("code")
+        return self.sources.slice(0, code[0], code[1]) if code is not None else None
+
+    def _raw_attributes(self, entry):
+        """节点的属性（包含 id），code 为 SourceSpan"""
+        attributes = dict(entry)
+        code = attributes.get("code")
+        if code is not None:
+            attributes["code"] = SourceSpan(self.sources, 0, code[0], code[1])
+        return attributes
+
+    def node_dicts(self):
+        """节点字典列表（与 node-link JSON 的 nodes 相同，包含 id），code 在读取时才解码"""
+        return [NodeAttributes(self._raw_attributes(entry)) for entry in self.nodes]
+
+    def to_networkx(self):
+        """转换为 CodeDiGraph，节点的 code 在读取时才解码"""
+        graph = CodeDiGraph()
+        graph.graph.update(self.graph_attributes)
+        graph.add_nodes_from(entry["id"] for entry in self.nodes)
+        for entry in self.nodes:
+            attributes = self._raw_attributes(entry)
+            del attributes["id"]
+            # 直接写入原始值：经过 NodeAttributes 的 keys() / [] 复制会把 code 全部解码
+            dict.update(graph.nodes[entry["id"]], attributes)
+        graph.add_edges_from((link["source"], link["target"],
+                              {key: value for key, value in link.items() if key not in ("source", "target")})
+                             for link in self.links)
+        return graph
+
+    def close(self):
+        self.sources.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def open_graph_store(path):
+    """
+    打开 path 对应的图存储（path 为结构文件或同名的 node-link JSON 文件），不存在时返回 None，
+    调用方可以退回到直接加载 JSON。path 为 JSON 时，存储比 JSON 旧（JSON 重新生成后没有重新导出存储）也返回 None
+    """
+    meta_path, code_path = store_paths(path)
+    if not (os.path.exists(meta_path) and os.path.exists(code_path)):
+        return None
+    json_path = _source_json(path)
+    # 先比较修改时间，明显过期时不必加载结构文件
+    if is_stale(json_path, meta_path):
+        logging.info(f"Graph store {meta_path} is older than {json_path}, ignored")
+        return None
+    store = GraphStore(meta_path)
+    if store.source is not None and is_stale(json_path, meta_path, store.source):
+        store.close()
+        logging.info(f"Graph store {meta_path} does not match {json_path}, ignored")
+        return None
+    return store
@@ -0,0 +1,168 @@
+import bisect
+from parsers.source_buffer import SourceSpan
+from edge_index import edge_relationships
+
+SCOPE_TYPES = ('module', 'class', 'function')  # nearest / outermost 中各位置对应的节点类型
+_NO_SCOPE = (None, None, None)
+
+
+class HierarchyIndex:
+    """
+    CONTAINS 树的层次索引，建图（CodeGraph）或加载图（from_graph）时建立：
+      - parents:   节点 -> 父节点
+      - children:  节点 -> 子节点列表，按源码中的位置排序（目录下的模块等没有位置的子节点保持添加顺序）
+      - nearest:   节点 -> (module, class, function)，包含节点自身在内离它最近的各类型祖先
+      - outermost: 节点 -> (module, class, function)，同上，但取最外层的祖先（与按名称前缀逐级查找的结果相同）
+    查询父节点、所在模块、涉及的名称为 O(1)，上下文兄弟节点与兄弟节点个数成正比，不再扫描全部边或逐级拼接名称前缀。
+    nearest / outermost 的元组在不改变作用域的节点之间共享。
+    """
+    def __init__(self):
+        self.parents = {}
+        self.children = {}
+        self.positions = {}  # 节点 -> 排序位置（SourceSpan 的起始字节或在父节点源码中的位置），没有时为 None
+        self.nearest = {}
+        self.outermost = {}
+        self._files = {}  # 节点 -> code 所在的 (SourceStore, 文件编号)
+
+    @classmethod
+    def from_graph(cls, graph):
+        """
+        由 DiGraph 的 CONTAINS 边建立索引（CodeGraph.graph、GraphStore 或 node-link JSON 加载的图），O(V + E)。
+        code 为 SourceSpan 时按起始字节排序；为文本时按子节点源码在父节点源码中出现的位置排序。
+        """
+        index = cls()
+        contains = {}  # 父节点 -> 子节点，按边的顺序
+        has_parent = set()
+        for source, target, attributes in graph.edges(data=True):
+            if 'CONTAINS' in edge_relationships(attributes):
+                contains.setdefault(source, []).append(target)
+                has_parent.add(target)
+
+        nodes = graph.nodes
+        stack = [(root, None, None) for root in reversed(contains) if root not in has_parent]
+        while stack:
+            node, parent, position = stack.pop()
+            if node in index.nearest:
+                continue
+            # 直接读取原始值，SourceSpan 不解码
+            code = dict.get(nodes[node], 'code')
+            index.add(node, parent, dict.get(nodes[node], 'type'), code, position)
+            children = contains.get(node, ())
+            positions = _text_positions(code, [dict.get(nodes[child], 'code') for child in children])
+            stack.extend(zip(reversed(children), [node] * len(children), reversed(positions)))
+        return index
+
+    def __contains__(self, node):
+        return node in self.nearest
+
+    def __len__(self):
+        return len(self.nearest)
+
+    def add(self, node, parent, node_type, code=None, position=None):
+        """
+        添加或更新一个节点（父节点先于子节点添加）。
+        :param code: 节点的源码（SourceSpan 或文本）。与父节点在同一个文件的 SourceSpan 按起始字节排序
+        :param position: code 不是 SourceSpan 时的排序位置
+        """
+        if node in self.nearest and self.parents.get(node) != parent:
+            self._detach(node)
+        if isinstance(code, SourceSpan):
+            source_file = self._files[node] = (code.store, code.file_id)
+            position = code.start_byte if parent is not None and self._files.get(parent) == source_file else None
+        else:
+            self._files.pop(node, None)
+        self.positions[node] = position
+        if parent is not None:
+            self.parents[node] = parent
+            self._place(node, parent)
+
+        nearest = self.nearest.get(parent, _NO_SCOPE)
+        outermost = self.outermost.get(parent, _NO_SCOPE)
+        if node_type in SCOPE_TYPES:
+            slot = SCOPE_TYPES.index(node_type)
+            nearest = nearest[:slot] + (node,) + nearest[slot + 1:]
+            if outermost[slot] is None:
+                outermost = outermost[:slot] + (node,) + outermost[slot + 1:]
+        self.nearest[node] = nearest
+        self.outermost[node] = outermost
+
+    def _sort_key(self, node):
+        position = self.positions.get(node)
+        return -1 if position is None else position
+
+    def _place(self, node, parent):
+        siblings = self.children.setdefault(parent, [])
+        if node in siblings:
+            # 更新已有节点（例如 watch 模式重新解析文件）：位置可能改变，重新排序（基本有序，耗时与兄弟节点个数成正比）
+            siblings.sort(key=self._sort_key)
+        elif not siblings or self._sort_key(node) >= self._sort_key(siblings[-1]):
+            siblings.append(node)
+        else:
+            bisect.insort(siblings, node, key=self._sort_key)
+
+    def _detach(self, node):
+        parent = self.parents.pop(node, None)
+        siblings = self.children.get(parent)
+        if siblings is not None and node in siblings:
+            siblings.remove(node)
+            if not siblings:
+                del self.children[parent]
+
+    def remove(self, node):
+        """删除一个节点，它的子节点不再有父节点"""
+        if node not in self.nearest:
+            return
+        self._detach(node)
+        for child in self.children.pop(node, ()):
+            self.parents.pop(child, None)
+        for mapping in (self.positions, self.nearest, self.outermost, self._files):
+            mapping.pop(node, None)
+
+    def parent(self, node):
+        return self.parents.get(node)
+
+    def ordered_children(self, node):
+        """按源码位置排序的子节点"""
+        return list(self.children.get(node, ()))
+
+    def siblings(self, node):
+        """(位于 node 之前的兄弟节点, 位于 node 之后的兄弟节点)，按源码位置排序"""
+        siblings = self.children.get(self.parents.get(node), ())
+        if node not in siblings:
+            return [], []
+        position = siblings.index(node)
+        return siblings[:position], siblings[position + 1:]
+
+    def nearest_ancestor(self, node, node_type):
+        """包含 node 自身在内、离它最近的 module / class / function 节点，没有时返回 None"""
+        return self.nearest.get(node, _NO_SCOPE)[SCOPE_TYPES.index(node_type)]
+
+    def involved_names(self, node):
+        """{类型: 节点}，包含 node 自身在内各类型最外层的 module / class / function 祖先"""
+        return {node_type: name for node_type, name in zip(SCOPE_TYPES, self.outermost.get(node, _NO_SCOPE))
+                if name is not None}
+
+
+def _text_positions(parent_code, child_codes):
+    """
+    文本源码的子节点在父节点源码中出现的位置，找不到时沿用前一个子节点的位置（保持边的顺序）。
+    重复的源码（例如两个相同的函数）从上一次出现之后继续查找。
+    """
+    positions = []
+    if not isinstance(parent_code, str):
+        return [None] * len(child_codes)
+    used = set()
+    previous = 0
+    for code in child_codes:
+        position = -1
+        if isinstance(code, str) and code:
+            position = parent_code.find(code)
+            while position in used:
+                position = parent_code.find(code, position + 1)
+        if position < 0:
+            position = previous
+        else:
+            used.add(position)
+        positions.append(position)
+        previous = position
+    return positions
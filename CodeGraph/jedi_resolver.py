@@ -0,0 +1,161 @@
+import os
+import zlib
+import time
+import logging
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import jedi
+from jedi import settings
+from parsers.discovery import discover
+from lsp_client import DefinitionResolver, RequestPolicy, MAX_IN_FLIGHT, default_pool_size, _pipeline
+
+WORKER_WINDOW = 2  # 每个工作者同时提交的请求数上限：工作者逐个执行，多排一个请求只为了不让它空闲
+
+_projects = {}  # 项目根目录 -> jedi.Project，fork 出的工作进程继承父进程中已经创建的实例
+# 在当前解释器内推断编译模块（jedi 默认的环境通过管道与一个子进程通信，fork 出的工作进程不能共用这个子进程）
+_environment = jedi.InterpreterEnvironment()
+
+
+def _project_for(project_root):
+    project = _projects.get(project_root)
+    if project is None:
+        # 与 jedi-language-server 初始化工作区时使用的参数一致
+        project = jedi.Project(project_root, smart_sys_path=True, load_unsafe_extensions=False)
+        _projects[project_root] = project
+    return project
+
+
+def _goto_definition(project_root, abs_file_path, line, character):
+    """
+    在工作者中执行一次定义查找，与 jedi-language-server 的 textDocument/definition 相同：
+    goto(follow_imports=True, follow_builtin_imports=True)，行号从 0 开始，
+    结果转换为 multilspy 的 Location 格式，没有位置信息的定义（如模块的 __file__）被跳过。
+    """
+    script = jedi.Script(path=abs_file_path, project=_project_for(project_root), environment=_environment)
+    names = script.goto(line + 1, character, follow_imports=True, follow_builtin_imports=True)
+    locations = []
+    for name in names:
+        if name.module_path is None or name.line is None or name.column is None:
+            continue
+        absolute_path = str(name.module_path)
+        relative_path = os.path.relpath(absolute_path, project_root)
+        locations.append({
+            "uri": name.module_path.as_uri(),
+            "range": {
+                "start": {"line": name.line - 1, "character": name.column},
+                "end": {"line": name.line - 1, "character": name.column + len(name.name)},
+            },
+            "absolutePath": absolute_path,
+            "relativePath": None if relative_path.startswith(os.pardir) else relative_path,
+        })
+    return locations
+
+
+def _warm_up():
+    """工作进程启动后立即返回，用来让执行器马上 fork 出进程"""
+    return os.getpid()
+
+
+class _JediWorker:
+    """一个工作者：单线程执行器，或 fork 出的单进程执行器。接口与 _pipeline 使用的 LspServer 部分一致"""
+    def __init__(self, project_root, executor):
+        self.project_root = project_root
+        self.executor = executor
+
+    def submit_definition(self, abs_file_path, line, character):
+        return self.executor.submit(_goto_definition, self.project_root, abs_file_path, line, character)
+
+
+class JediResolver(DefinitionResolver):
+    """
+    在当前进程内用 jedi 查找定义，省去 multilspy 与语言服务器进程之间的 JSON-RPC 序列化和管道通信，
+    结果与 jedi-language-server 的 textDocument/definition 相同。
+    jedi 不是线程安全的，所以 size 为 1 时在一个后台线程上逐个执行请求（后台线程使 RequestPolicy 的期限仍然生效）；
+    size 大于 1 时，先在当前进程中解析项目的全部 Python 文件（parso 的内存缓存），再 fork 出 size 个工作进程，
+    各工作进程共享（写时复制）这些已经解析好的语法树，请求像 LspPool 一样按文件分片。
+    超过期限的请求只是不再等待：工作进程在 stop_server 时被终止，而单线程模式无法取消正在执行的 jedi.goto，
+    卡住的请求会一直占用后台线程，并使解释器在退出时等待它结束。
+    :param size: 工作者个数，None 表示按 CPU 核数和可用内存自动确定；不支持 fork 的平台上固定为 1
+    """
+    def __init__(self, project_root, size=None, max_in_flight=MAX_IN_FLIGHT, policy=None):
+        self.project_root = os.path.abspath(project_root)
+        self.size = max(1, size or default_pool_size())
+        if self.size > 1 and "fork" not in multiprocessing.get_all_start_methods():
+            logging.warning("fork is not available, JediResolver falls back to a single worker")
+            self.size = 1
+        self.max_in_flight = max(1, max_in_flight)
+        self.policy = policy or RequestPolicy()
+        self.workers = []
+        self.active = False
+        logging.info(f"Jedi resolver workers: {self.size}")
+
+    def start_server(self):
+        if self.active:
+            return
+        start = time.perf_counter()
+        _project_for(self.project_root)
+        if self.size == 1:
+            self.workers = [_JediWorker(self.project_root, ThreadPoolExecutor(max_workers=1))]
+        else:
+            parsed = self._preload()
+            context = multiprocessing.get_context("fork")
+            executors = [ProcessPoolExecutor(max_workers=1, mp_context=context) for _ in range(self.size)]
+            for future in [executor.submit(_warm_up) for executor in executors]:
+                future.result()
+            self.workers = [_JediWorker(self.project_root, executor) for executor in executors]
+            logging.info(f"Preloaded {parsed} files for {self.size} jedi workers")
+        self.active = True
+        logging.info(f"Jedi resolver started in {time.perf_counter() - start:.2f}s")
+
+    def stop_server(self):
+        """
+        取消排队的请求。工作进程直接终止（超过期限仍在执行的请求随之结束）；
+        单线程模式下正在执行的请求无法取消，只能等它自己返回
+        """
+        if self.active:
+            for worker in self.workers:
+                # shutdown 之后执行器不再保留进程表，先取出
+                processes = list((getattr(worker.executor, "_processes", None) or {}).values())
+                worker.executor.shutdown(wait=False, cancel_futures=True)
+                for process in processes:
+                    if process.is_alive():
+                        process.terminate()
+                for process in processes:
+                    process.join()
+            self.workers = []
+            self.active = False
+            logging.info("Jedi resolver stopped")
+
+    def _preload(self):
+        """用 jedi 加载被 import 的模块时相同的参数解析发现阶段找到的 Python 文件，语法树留在 parso 的缓存中"""
+        grammar = _environment.get_grammar()
+        parsed = 0
+        for entry in discover(self.project_root).files:
+            try:
+                grammar.parse(path=entry.path, cache=True,
+                              diff_cache=settings.fast_parser, cache_path=settings.cache_directory)
+                parsed += 1
+            except Exception as e:
+                logging.debug(f"Failed to preload {entry.path}: {e}")
+        return parsed
+
+    def shard(self, file_path):
+        """文件对应的工作者下标，与 LspPool.shard 相同按绝对路径的 CRC32 分片"""
+        return zlib.crc32(os.path.abspath(file_path).encode("utf-8")) % len(self.workers)
+
+    def find_definitions(self, requests, max_in_flight=None):
+        """
+        与 LspPool.find_definitions 相同：请求按文件分片到各个工作者。
+        工作者一次只执行一个请求，同时提交的请求不超过 min(max_in_flight, WORKER_WINDOW) 个，
+        排队的时间因此不会占用后面请求的期限。
+        """
+        if not requests:
+            return
+        self.start_server()
+        shards = [[] for _ in self.workers]
+        for index, request in enumerate(requests):
+            shards[self.shard(request[0])].append((index, request))
+        workers = [worker for worker, shard in zip(self.workers, shards) if shard]
+        queues = [shard for shard in shards if shard]
+        window = max(1, min(max_in_flight or self.max_in_flight, WORKER_WINDOW))
+        yield from _pipeline(workers, queues, window, self.policy)
@@ -1,21 +1,173 @@
 import os
+import zlib
+import time
+import atexit
+import asyncio
 import logging
+from contextlib import ExitStack
+from concurrent.futures import wait, FIRST_COMPLETED
 from multilspy import SyncLanguageServer
 from multilspy.multilspy_config import MultilspyConfig
 from multilspy.multilspy_logger import MultilspyLogger
 
-class LspClientWrapper:
-    _instance = None  # 单例模式实现
+MAX_IN_FLIGHT = 16  # 批量查找定义时每个语言服务器同时在途的请求数上限
+SERVER_MEMORY_MB = 512  # 估算的单个语言服务器进程的内存占用，用来确定默认的池大小
+REQUEST_TIMEOUT = 10.0  # 单个定义请求的超时时间（秒）
+BREAKER_THRESHOLD = 5  # 连续超时多少次后熔断，不再向语言服务器发送请求
 
-    def __new__(cls, project_root):
-        if cls._instance is None:
-            cls._instance = super(LspClientWrapper, cls).__new__(cls)
-            cls._instance.initialize_server(project_root)
-        return cls._instance
 
-    def initialize_server(self, project_root):
-        """初始化并启动 LSP 服务器，只在首次调用时运行"""
+class RequestFailed:
+    """
+    find_definitions 中请求没有得到结果时产出的值，与语言服务器返回“没有定义”（None）区分开，
+    调用方可以改用静态推测，并且不缓存这个结果。
+    reason: 'timeout'（超过单个请求的期限）、'error'（请求出错）、
+            'budget'（代码库的总时间预算已用完）、'circuit_open'（已熔断）
+    """
+    def __init__(self, reason):
+        self.reason = reason
+
+    def __repr__(self):
+        return f"RequestFailed({self.reason!r})"
+
+
+class RequestPolicy:
+    """
+    一个代码库的 LSP 请求期限：单个请求的超时、总时间预算和熔断器，并记录每个请求的耗时。
+    同一个 LspPool 中的服务器共享一个实例。
+    :param request_timeout: 单个请求的期限（秒），None 表示不限
+    :param total_budget: 所有请求累计占用的时间预算（秒），None 表示不限
+    :param breaker_threshold: 连续超时达到该次数后熔断，之后的请求直接失败
+    """
+    def __init__(self, request_timeout=REQUEST_TIMEOUT, total_budget=None, breaker_threshold=BREAKER_THRESHOLD):
+        self.request_timeout = request_timeout
+        self.total_budget = total_budget
+        self.breaker_threshold = breaker_threshold
+        self.latencies = []  # 成功完成的请求耗时（秒）
+        self.spent = 0.0  # 已结束的批次占用的时间
+        self.batch_start = None
+        self.consecutive_timeouts = 0
+        self.circuit_open = False
+        self.failures = {}  # reason -> 次数
+
+    def begin_batch(self):
+        self.batch_start = time.monotonic()
+
+    def end_batch(self):
+        if self.batch_start is not None:
+            self.spent += time.monotonic() - self.batch_start
+            self.batch_start = None
+
+    def remaining_budget(self):
+        """剩余的总时间预算（秒），不限时返回 None"""
+        if self.total_budget is None:
+            return None
+        elapsed = self.spent + (time.monotonic() - self.batch_start if self.batch_start is not None else 0.0)
+        return self.total_budget - elapsed
+
+    def refusal(self):
+        """当前不应再发送请求的原因，可以发送时返回 None"""
+        if self.circuit_open:
+            return 'circuit_open'
+        remaining = self.remaining_budget()
+        if remaining is not None and remaining <= 0:
+            return 'budget'
+        return None
+
+    def record_success(self, latency):
+        self.latencies.append(latency)
+        self.consecutive_timeouts = 0
+
+    def record_failure(self, reason):
+        self.failures[reason] = self.failures.get(reason, 0) + 1
+        if reason == 'timeout':
+            self.consecutive_timeouts += 1
+            if self.breaker_threshold and self.consecutive_timeouts >= self.breaker_threshold and not self.circuit_open:
+                self.circuit_open = True
+                logging.error(f"LSP circuit breaker opened after {self.consecutive_timeouts} consecutive timeouts")
+        elif reason == 'error':
+            self.consecutive_timeouts = 0
+
+    def stats(self):
+        """请求数、各类失败次数，以及成功请求耗时的 p50/p95/p99（毫秒）"""
+        latencies = sorted(self.latencies)
+        stats = {"lsp_requests": len(latencies) + sum(self.failures.values())}
+        for reason in ('timeout', 'error', 'budget', 'circuit_open'):
+            stats[f"lsp_{reason}"] = self.failures.get(reason, 0)
+        for percentile in (50, 95, 99):
+            value = _percentile(latencies, percentile)
+            stats[f"lsp_p{percentile}_ms"] = round(value * 1000, 1) if value is not None else None
+        return stats
+
+
+def _percentile(sorted_values, percentile):
+    """最近秩法计算百分位数，没有数据时返回 None"""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-percentile * len(sorted_values) // 100))
+    return sorted_values[rank - 1]
+
+
+class DefinitionResolver:
+    """
+    查找定义的后端接口，CallParser 通过它为需要消歧的调用点查找定义。
+    实现有两类：LspServer / LspClientWrapper / LspPool 通过 multilspy 向语言服务器进程发送 JSON-RPC 请求，
+    JediResolver 在当前进程内直接调用 jedi 分析。用 create_resolver 按配置选择。
+    子类提供 start_server / stop_server / active / find_definitions，并持有 policy（RequestPolicy）。
+    find_definitions 返回的定义列表与 multilspy 的 Location 格式相同（uri、range、absolutePath、relativePath）。
+    """
+    def start_server(self):
+        raise NotImplementedError
+
+    def stop_server(self):
+        raise NotImplementedError
+
+    def find_definitions(self, requests, max_in_flight=None):
+        """
+        批量查找定义，按完成顺序逐个产出 (index, result)，index 是请求在 requests 中的下标；
+        result 为定义列表，没有找到定义时为 None，请求超时、出错或被 policy 拒绝时为 RequestFailed。
+        :param requests: [(file_path, line, character)]
+        """
+        raise NotImplementedError
+
+    def find_definition(self, file_path, line, character):
+        """同步接口，查找定义；没有找到定义、请求超时或失败时返回 None"""
+        logging.debug(f"Finding definition in file: {file_path} at line: {line}, character: {character}")
+        for _, result in self.find_definitions([(file_path, line, character)]):
+            return None if isinstance(result, RequestFailed) else result
+        return None
+
+    def set_policy(self, policy):
+        """换用新的 RequestPolicy（同一个后端用于下一个代码库时）"""
+        self.policy = policy
+
+    def stats(self):
+        return self.policy.stats()
+
+    def __enter__(self):
+        """支持上下文管理器，进入时启动服务器"""
+        self.start_server()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """退出上下文管理器时，停止服务器"""
+        self.stop_server()
+
+
+class LspServer(DefinitionResolver):
+    """
+    一个语言服务器进程（multilspy SyncLanguageServer）及其定义查询接口。
+    LspClientWrapper 是它的进程内单例，LspPool 持有多个实例。
+    """
+    MAX_IN_FLIGHT = MAX_IN_FLIGHT
+
+    def __init__(self, project_root, max_in_flight=MAX_IN_FLIGHT, policy=None):
+        self.initialize_server(project_root, max_in_flight, policy)
+
+    def initialize_server(self, project_root, max_in_flight=MAX_IN_FLIGHT, policy=None):
+        """初始化 LSP 服务器（在 start_server 时才真正启动进程）"""
         self.project_root = os.path.abspath(project_root)
+        self.max_in_flight = max(1, max_in_flight)
+        self.policy = policy or RequestPolicy()  # 请求期限、预算和熔断器
         self.config = MultilspyConfig.from_dict({"code_language": "python"})  # 配置语言
         self.logger = MultilspyLogger()
         self.slsp = SyncLanguageServer.create(self.config, self.logger, self.project_root)
@@ -36,8 +188,7 @@ class LspClientWrapper:
             self.active = False
             logging.info("LSP server stopped")
 
-    def find_definition(self, file_path, line, character):
-        """同步接口，查找定义"""
+    def _ensure_started(self):
         if not self.active:
             try:
                 self.start_server()
@@ -45,32 +196,289 @@ class LspClientWrapper:
                 logging.error(f"Failed to start LSP server: {e}")
                 raise RuntimeError("LSP server not started or stopped")
 
-        abs_file_path = os.path.abspath(file_path)
-        logging.debug(f"Finding definition in file: {abs_file_path} at line: {line}, character: {character}")
-
-        try:
-            # 请求 LSP 查找定义
-            result = self.slsp.request_definition(abs_file_path, line, character)
-            if not result:
-                logging.warning(f"No definition found for {abs_file_path} at line {line}, character {character}")
-                return None  # 返回 None 以表示未找到定义
-            return result
-        except AssertionError as ae:
-            logging.error(f"LSP request failed with assertion error: {ae}")
-            return None  # 返回 None 表示解析失败
-        except Exception as e:
-            logging.error(f"Error finding definition for {abs_file_path} at line {line}, character {character}: {e}")
-            return None  # 捕获其他异常并返回 None
+    def find_definitions(self, requests, max_in_flight=None):
+        """
+        批量查找定义：通过 multilspy 的异步接口把请求提交到语言服务器的事件循环上并发执行，
+        同时在途的请求不超过 max_in_flight 个，一个请求完成后立即补发下一个。
+        产出的结果见 DefinitionResolver.find_definitions。
+        """
+        if not requests:
+            return
+        self._ensure_started()
+        window = max(1, max_in_flight or self.max_in_flight)
+        with self.open_documents(request[0] for request in requests):
+            yield from _pipeline([self], [list(enumerate(requests))], window, self.policy)
 
-    def __enter__(self):
-        """支持上下文管理器，进入时启动服务器"""
-        self.start_server()
-        return self
+    def open_documents(self, file_paths):
+        """
+        一次性打开一批文档（didOpen），返回的 ExitStack 关闭时再统一 didClose。
+        文档保持打开期间，对同一文件的多个定义请求不再逐个打开、关闭文档，语言服务器也不必反复重新分析该文件。
+        """
+        documents = ExitStack()
+        for abs_file_path in sorted({os.path.abspath(file_path) for file_path in file_paths}):
+            try:
+                documents.enter_context(self.slsp.open_file(abs_file_path))
+            except Exception as e:
+                logging.warning(f"Failed to open {abs_file_path} in LSP server: {e}")
+        return documents
 
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        """退出上下文管理器时，停止服务器"""
-        self.stop_server()
+    def submit_definition(self, abs_file_path, line, character):
+        """把一个定义请求提交到语言服务器的事件循环上，返回 concurrent.futures.Future"""
+        return asyncio.run_coroutine_threadsafe(
+            self.slsp.language_server.request_definition(abs_file_path, line, character), self.slsp.loop)
 
     def __del__(self):
         """对象销毁时确保资源被释放"""
         self.stop_server()
+
+
+class LspClientWrapper(LspServer):
+    """
+    进程内共享的单个语言服务器。
+    以不同的项目根目录再次创建时，先停止原来的服务器，再针对新的根目录重新初始化。
+    """
+    _instance = None  # 单例模式实现
+
+    def __new__(cls, project_root, max_in_flight=MAX_IN_FLIGHT, policy=None):
+        project_root = os.path.abspath(project_root)
+        if cls._instance is not None and cls._instance.project_root != project_root:
+            cls._instance.stop_server()
+            cls._instance = None
+        if cls._instance is None:
+            cls._instance = super(LspClientWrapper, cls).__new__(cls)
+            cls._instance.initialize_server(project_root, max_in_flight, policy)
+        return cls._instance
+
+    def __init__(self, project_root, max_in_flight=MAX_IN_FLIGHT, policy=None):
+        # 初始化只在 __new__ 首次创建实例时进行
+        pass
+
+
+def default_pool_size():
+    """默认的语言服务器个数：不超过 CPU 核数，并且按 SERVER_MEMORY_MB 估算能放进当前可用内存"""
+    cpus = os.cpu_count() or 1
+    available_mb = _available_memory_mb()
+    if available_mb is None:
+        return 1
+    return max(1, min(cpus, available_mb // SERVER_MEMORY_MB))
+
+
+def _available_memory_mb():
+    """当前可用内存（MB），优先读取 /proc/meminfo 的 MemAvailable，无法获取时返回 None"""
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) // 1024
+    except (OSError, ValueError):
+        pass
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE') // (1024 * 1024)
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+class LspPool(DefinitionResolver):
+    """
+    针对同一个项目根目录启动多个语言服务器进程，按文件把定义请求分片到各个服务器上并发执行。
+    同一个文件的请求总是发给同一个服务器，服务器对该文件的分析结果可以复用。
+    接口与 LspClientWrapper 一致（start_server / stop_server / find_definition / find_definitions），
+    CallParser 不需要区分二者。池中的服务器共享同一个 RequestPolicy（期限、预算和熔断状态）。
+    """
+    def __init__(self, project_root, size=None, max_in_flight=MAX_IN_FLIGHT, policy=None):
+        self.project_root = os.path.abspath(project_root)
+        self.size = max(1, size or default_pool_size())
+        self.max_in_flight = max(1, max_in_flight)
+        self.policy = policy or RequestPolicy()
+        self.servers = [LspServer(self.project_root, max_in_flight, self.policy) for _ in range(self.size)]
+        logging.info(f"LSP pool size: {self.size}")
+
+    @property
+    def active(self):
+        return any(server.active for server in self.servers)
+
+    def start_server(self):
+        for server in self.servers:
+            server.start_server()
+
+    def stop_server(self):
+        for server in self.servers:
+            server.stop_server()
+
+    def shard(self, file_path):
+        """文件对应的服务器下标，按绝对路径的 CRC32 分片，结果在多次运行之间保持稳定"""
+        return zlib.crc32(os.path.abspath(file_path).encode("utf-8")) % self.size
+
+    def set_policy(self, policy):
+        self.policy = policy
+        for server in self.servers:
+            server.policy = policy
+
+    def find_definitions(self, requests, max_in_flight=None):
+        """
+        与 LspServer.find_definitions 相同，请求按文件分片到各个服务器，
+        每个服务器同时在途的请求不超过 max_in_flight 个
+        """
+        if not requests:
+            return
+        shards = [[] for _ in self.servers]
+        for index, request in enumerate(requests):
+            shards[self.shard(request[0])].append((index, request))
+        servers = []
+        queues = []
+        with ExitStack() as documents:
+            for server, shard in zip(self.servers, shards):
+                if shard:
+                    server._ensure_started()
+                    documents.enter_context(server.open_documents(request[0] for _, request in shard))
+                    servers.append(server)
+                    queues.append(shard)
+            yield from _pipeline(servers, queues, max(1, max_in_flight or self.max_in_flight), self.policy)
+
+
+def create_resolver(project_root, backend="lsp", size=None, max_in_flight=MAX_IN_FLIGHT, policy=None):
+    """
+    按配置创建查找定义的后端（尚未启动）：
+      - 'lsp':  LspPool，size 个 multilspy 语言服务器进程
+      - 'jedi': JediResolver，在当前进程内调用 jedi，size 个工作者
+    :param size: 服务器或工作者个数，None 表示按 CPU 核数和可用内存自动确定
+    """
+    if backend == "lsp":
+        return LspPool(project_root, size=size, max_in_flight=max_in_flight, policy=policy)
+    if backend == "jedi":
+        from jedi_resolver import JediResolver  # 只有选用该后端时才需要 jedi
+        return JediResolver(project_root, size=size, max_in_flight=max_in_flight, policy=policy)
+    raise ValueError(f"Unknown resolver backend: {backend}")
+
+
+class LspService:
+    """
+    批量构建时每个工作进程持有一个：按代码库管理查找定义后端（语言服务器池或 JediResolver）的生命周期。
+    client_for 切换到另一个代码库时先停止原来的服务器再针对新的根目录启动，
+    同一个代码库再次使用时直接复用仍在运行的（已经预热的）服务器。进程退出时停止服务器。
+    每个代码库使用新的 RequestPolicy：请求期限、总时间预算和熔断器按代码库计算。
+    """
+    def __init__(self, pool_size=1, max_in_flight=MAX_IN_FLIGHT, request_timeout=REQUEST_TIMEOUT,
+                 repo_budget=None, breaker_threshold=BREAKER_THRESHOLD, backend="lsp"):
+        self.backend = backend
+        self.pool_size = pool_size
+        self.max_in_flight = max_in_flight
+        self.request_timeout = request_timeout
+        self.repo_budget = repo_budget
+        self.breaker_threshold = breaker_threshold
+        self.client = None
+        atexit.register(self.close)
+
+    def client_for(self, project_root):
+        project_root = os.path.abspath(project_root)
+        if self.client is not None and self.client.project_root == project_root and self.client.active:
+            self.client.set_policy(self._new_policy())
+            return self.client
+        self.close()
+        self.client = create_resolver(project_root, self.backend, size=self.pool_size,
+                                      max_in_flight=self.max_in_flight, policy=self._new_policy())
+        self.client.start_server()
+        return self.client
+
+    def close(self):
+        if self.client is not None:
+            self.client.stop_server()
+            self.client = None
+
+    def _new_policy(self):
+        return RequestPolicy(self.request_timeout, self.repo_budget, self.breaker_threshold)
+
+
+def _definition_or_failure(abs_file_path, line, character, fetch):
+    """获取一次定义请求的结果，没有找到定义时返回 None，请求出错时返回 RequestFailed('error')"""
+    try:
+        result = fetch()
+        if not result:
+            logging.warning(f"No definition found for {abs_file_path} at line {line}, character {character}")
+            return None  # 返回 None 以表示未找到定义
+        return result
+    except AssertionError as ae:
+        logging.error(f"LSP request failed with assertion error: {ae}")
+        return RequestFailed('error')
+    except Exception as e:
+        logging.error(f"Error finding definition for {abs_file_path} at line {line}, character {character}: {e}")
+        return RequestFailed('error')
+
+
+def _pipeline(servers, queues, window, policy):
+    """
+    在多个服务器上并发执行定义请求。queues[i] 是发给 servers[i] 的 [(index, (file_path, line, character))]，
+    每个服务器同时在途的请求不超过 window 个，一个请求完成后立即给同一个服务器补发下一个。
+    超过 policy 期限的请求被取消；policy 拒绝（预算用完或已熔断）后剩余的请求不再发送。
+    按完成顺序产出 (index, result)。
+    """
+    pending = {}  # future -> (服务器下标, index, abs_file_path, line, character, 提交时间)
+    in_flight = [0] * len(servers)
+    iterators = [iter(queue) for queue in queues]
+    refused = []  # (index, RequestFailed)
+
+    def submit(server_index):
+        for index, (file_path, line, character) in iterators[server_index]:
+            reason = policy.refusal()
+            if reason is not None:
+                policy.record_failure(reason)
+                refused.append((index, RequestFailed(reason)))
+                continue
+            abs_file_path = os.path.abspath(file_path)
+            future = servers[server_index].submit_definition(abs_file_path, line, character)
+            pending[future] = (server_index, index, abs_file_path, line, character, time.monotonic())
+            in_flight[server_index] += 1
+            if in_flight[server_index] >= window:
+                break
+
+    def next_deadline():
+        deadlines = []
+        if policy.request_timeout is not None:
+            deadlines.append(min(item[5] for item in pending.values()) + policy.request_timeout)
+        remaining = policy.remaining_budget()
+        if remaining is not None:
+            deadlines.append(time.monotonic() + remaining)
+        return min(deadlines) if deadlines else None
+
+    policy.begin_batch()
+    try:
+        for server_index in range(len(servers)):
+            submit(server_index)
+        while pending or refused:
+            while refused:
+                yield refused.pop()
+            if not pending:
+                break
+            deadline = next_deadline()
+            timeout = max(0.0, deadline - time.monotonic()) if deadline is not None else None
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            now = time.monotonic()
+            refill = set()
+            for future in done:
+                server_index, index, abs_file_path, line, character, submitted = pending.pop(future)
+                in_flight[server_index] -= 1
+                refill.add(server_index)
+                result = _definition_or_failure(abs_file_path, line, character, future.result)
+                if isinstance(result, RequestFailed):
+                    policy.record_failure(result.reason)
+                else:
+                    policy.record_success(now - submitted)
+                yield index, result
+
+            # 超过单个请求期限，或总预算已经用完时，取消仍在途的请求
+            budget_exhausted = policy.refusal() == 'budget'
+            for future, (server_index, index, abs_file_path, line, character, submitted) in list(pending.items()):
+                if budget_exhausted or (policy.request_timeout is not None
+                                        and now - submitted >= policy.request_timeout):
+                    del pending[future]
+                    future.cancel()
+                    in_flight[server_index] -= 1
+                    refill.add(server_index)
+                    reason = 'budget' if budget_exhausted else 'timeout'
+                    logging.warning(f"LSP definition request {reason}: {abs_file_path} at line {line}, character {character}")
+                    policy.record_failure(reason)
+                    yield index, RequestFailed(reason)
+            for server_index in refill:
+                submit(server_index)
+    finally:
+        policy.end_batch()
@@ -1,10 +1,11 @@
 import os
 from code_graph import CodeGraph
+from compact_graph import CompactCodeGraph
+from module_classifier import ModuleClassifier
 from neo4j_utils import Neo4jHandler
-from parsers.contains_parser import ContainsParser  # 引入包含关系的解析器
-from parsers.import_parser import ImportParser  # 引入 import 关系的解析器
-from parsers.call_parser import CallParser  # 引入调用关系的解析器
-from lsp_client import LspClientWrapper  # LSP 客户端包装器
+from parsers.repo_parser import RepoParser  # 统一解析前端：一次遍历、一次解析，供三种关系共享
+from lsp_client import create_resolver, RequestPolicy  # 查找定义的后端及请求期限
+from graph_snapshot import save_graph_snapshot, SNAPSHOT_SUFFIX
 import config
 import logging
 
@@ -22,47 +23,49 @@ def main():
     # 获取项目名称
     repo_name = os.path.basename(os.path.normpath(config.PROJECT_PATH))
 
-    # 第一步：解析 CONTAINS 关系
-    contains_parser = ContainsParser(config.PROJECT_PATH, repo_name)
-    contains_parser.parse()  # 解析目录结构和类、函数定义
+    # 第一步：一次遍历项目，同时解析 CONTAINS、IMPORTS 关系并收集调用点
+    repo_parser = RepoParser(config.PROJECT_PATH, repo_name, workers=config.PARSE_WORKERS,
+                             cache_dir=config.PARSE_CACHE_DIR, static_resolve=config.STATIC_RESOLVE,
+                             excludes=config.DISCOVERY_EXCLUDES, max_file_size=config.MAX_FILE_SIZE)
+    repo_parser.parse()
 
     # 构建代码图
-    code_graph = CodeGraph()
+    graph_class = CompactCodeGraph if config.GRAPH_BACKEND == "compact" else CodeGraph
+    code_graph = graph_class(ModuleClassifier(repo_parser.local_modules()))
 
     # 遍历树形结构并构建图，从根节点开始
-    code_graph.build_graph_from_tree(contains_parser.root)
+    code_graph.build_graph_from_tree(repo_parser.root)
 
-    # 第二步：解析 import 关系
-    import_parser = ImportParser(config.PROJECT_PATH, repo_name)
-    import_parser.parse()
-    print(f"import_parser.imports: {import_parser.imports}")
-    # 处理 import 关系
-    for import_data in import_parser.imports:
+    # 第二步：处理 import 关系
+    print(f"import_parser.imports: {repo_parser.imports}")
+    for import_data in repo_parser.imports:
         importer = import_data[0]
         imported_module = import_data[1]
         print(f"importer: {importer}, imported_module: {imported_module}")
         code_graph.add_import(importer, imported_module)
 
     # 第三步：解析调用关系并启动 LSP 服务器
-    lsp_client = LspClientWrapper(config.PROJECT_PATH)  # 初始化 LSP 客户端包装器
+    policy = RequestPolicy(config.LSP_REQUEST_TIMEOUT, config.LSP_REPO_BUDGET, config.LSP_BREAKER_THRESHOLD)
+    lsp_client = create_resolver(config.PROJECT_PATH, config.RESOLVER_BACKEND, size=config.LSP_POOL_SIZE,
+                                 max_in_flight=config.LSP_MAX_IN_FLIGHT, policy=policy)  # 按文件分片的语言服务器池或 jedi 工作者
     lsp_client.start_server()  # 手动启动 LSP 服务器
 
     try:
-        call_parser = CallParser(config.PROJECT_PATH, repo_name, code_graph, contains_parser.defined_symbols, lsp_client)
-        call_parser.parse()  # 使用已解析的符号来处理调用关系
+        calls = repo_parser.resolve_calls(code_graph, lsp_client)  # 使用已解析的符号来处理调用关系
 
         # 输出已定义的符号（调试用）
-        print('-'*50+'\n',f"已定义的符号: {call_parser.defined_symbols}\n",'-'*50+'\n')
+        print('-'*50+'\n',f"已定义的符号: {repo_parser.defined_symbols}\n",'-'*50+'\n')
 
         # 处理调用关系
-        for caller, callee in call_parser.calls:
-            code_graph.add_call(caller, callee)
+        for caller, callee in calls:
+            code_graph.add_call(caller, callee, **repo_parser.call_attributes(caller, callee))
 
     finally:
         lsp_client.stop_server()  # 手动停止 LSP 服务器
 
-    # 保存代码图
-    code_graph.export_to_gml(f"{RESULTDIR}/code_graph.gml")
+    # 保存代码图：二进制快照，Agent 工具、prompt 生成和社区检测可以直接加载（GraphSnapshot）
+    os.makedirs(RESULTDIR, exist_ok=True)
+    save_graph_snapshot(code_graph.get_graph(), os.path.join(RESULTDIR, f"{repo_name}{SNAPSHOT_SUFFIX}"))
     # 最后，将图导入到 Neo4j 数据库
     # neo4j_handler.import_graph(code_graph)
 
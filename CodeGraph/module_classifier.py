@@ -0,0 +1,144 @@
+import os
+import sys
+import sysconfig
+import logging
+import importlib.metadata
+
+STANDARD_LIBRARY = "standard_library"
+THIRD_PARTY = "third_party_library"
+LOCAL = "local_module"
+UNKNOWN = "unknown"
+
+_environments = {}  # 搜索路径 -> 已安装的顶层模块名集合，同一个环境只扫描一次
+
+
+def standard_library_names():
+    """标准库的顶层模块名，不导入任何模块（Python 3.10 之前扫描标准库目录）"""
+    names = set(sys.builtin_module_names)
+    if hasattr(sys, "stdlib_module_names"):
+        return names | set(sys.stdlib_module_names)
+    paths = sysconfig.get_paths()
+    for directory in (paths["stdlib"], paths.get("platstdlib"), os.path.join(paths["stdlib"], "lib-dynload")):
+        names.update(_module_names(directory))
+    names.discard("site-packages")
+    return names
+
+
+def _module_names(directory):
+    """目录中可以作为顶层模块导入的名称：包目录、.py 文件和扩展模块（取第一个 '.' 之前的部分）"""
+    names = set()
+    try:
+        entries = list(os.scandir(directory))
+    except (OSError, TypeError):
+        return names
+    for entry in entries:
+        name = entry.name
+        if entry.is_dir():
+            if name.isidentifier():
+                names.add(name)
+        elif name.endswith((".py", ".so", ".pyd")):
+            module = name.split(".", 1)[0]
+            if module.isidentifier():
+                names.add(module)
+    return names
+
+
+def _site_directories():
+    """当前环境中安装第三方包的目录：sys.path 中的 site-packages / dist-packages，以及其中 .pth 文件添加的目录"""
+    directories = []
+    for path in sys.path:
+        if path and os.path.basename(os.path.normpath(path)) in ("site-packages", "dist-packages") \
+                and os.path.isdir(path) and path not in directories:
+            directories.append(path)
+    for directory in list(directories):
+        try:
+            pth_files = [name for name in os.listdir(directory) if name.endswith(".pth")]
+        except OSError:
+            continue
+        for name in pth_files:
+            try:
+                with open(os.path.join(directory, name), "r", encoding="utf-8", errors="replace") as f:
+                    lines = f.read().splitlines()
+            except OSError:
+                continue
+            for line in lines:
+                line = line.strip()
+                # import 开头的行是要执行的代码，不处理
+                if not line or line.startswith(("#", "import ", "import\t")):
+                    continue
+                path = os.path.join(directory, line)
+                if os.path.isdir(path) and path not in directories:
+                    directories.append(path)
+    return directories
+
+
+def installed_names():
+    """
+    已安装的分发包提供的顶层模块名：扫描 site-packages 等目录的目录项，
+    再加上各分发包元数据中的 top_level.txt（覆盖可编辑安装等不在 site-packages 中的包）。
+    只读取目录和元数据文件，不导入任何模块；结果按 sys.path 缓存，同一个环境只扫描一次。
+    """
+    key = tuple(sys.path)
+    names = _environments.get(key)
+    if names is None:
+        names = set()
+        for directory in _site_directories():
+            names.update(_module_names(directory))
+        for distribution in importlib.metadata.distributions():
+            try:
+                top_level = distribution.read_text("top_level.txt")
+            except Exception:
+                continue
+            if top_level:
+                names.update(name.strip() for name in top_level.splitlines() if name.strip().isidentifier())
+        names.discard("__pycache__")
+        _environments[key] = names
+    return names
+
+
+class ModuleClassifier:
+    """
+    判断被导入的模块属于标准库、第三方库还是本地代码，不导入任何模块，结果按顶层包缓存。
+    依次检查：
+      - 内置模块（不能被同名文件覆盖）-> 标准库
+      - 项目自身的顶层模块（local_modules）-> 本地库
+      - 标准库模块名集合 -> 标准库
+      - 当前环境中已安装的顶层模块名 -> 第三方库
+      - 相对导入（以 '.' 开头）-> 本地库
+    其余为 unknown。与运行时的导入顺序一致：项目目录在 sys.path 中位于 site-packages 之前。
+    :param local_modules: 项目中可以直接导入的顶层模块名（项目根目录下的包和模块）
+    """
+    def __init__(self, local_modules=()):
+        self.local_modules = set(local_modules)
+        self.builtin_modules = set(sys.builtin_module_names)
+        self.standard_library = standard_library_names()
+        self._installed = None  # 首次遇到既不是本地也不是标准库的模块时才扫描环境
+        self._cache = {}  # 顶层包名 -> 模块类型
+        self.logger = logging.getLogger(__name__)
+
+    @property
+    def installed(self):
+        if self._installed is None:
+            self._installed = installed_names()
+        return self._installed
+
+    def classify(self, module_name):
+        """模块类型：STANDARD_LIBRARY、THIRD_PARTY、LOCAL 或 UNKNOWN"""
+        if module_name.startswith("."):
+            return LOCAL
+        top_level = module_name.split(".", 1)[0]
+        module_type = self._cache.get(top_level)
+        if module_type is None:
+            if top_level in self.builtin_modules:
+                module_type = STANDARD_LIBRARY
+            elif top_level in self.local_modules:
+                module_type = LOCAL
+            elif top_level in self.standard_library:
+                module_type = STANDARD_LIBRARY
+            elif top_level in self.installed:
+                module_type = THIRD_PARTY
+            else:
+                self.logger.debug(f"无法确定模块 {module_name} 的类型")
+                module_type = UNKNOWN
+            self._cache[top_level] = module_type
+        return module_type
@@ -0,0 +1,111 @@
+import logging
+
+# 同一个点分路径对应多个节点时的优先级：包的 __init__.py 中定义的类、函数 > 模块 > 目录
+_PRIORITY = {'class': 3, 'function': 3, 'module': 2, 'directory': 1}
+
+
+def canonical_path(fullname):
+    """节点全名对应的导入路径：去掉其中的 __init__（repo.pkg.__init__.Foo -> repo.pkg.Foo）"""
+    if '__init__' not in fullname:
+        return fullname
+    return '.'.join(part for part in fullname.split('.') if part != '__init__')
+
+
+class ModuleIndex:
+    """
+    项目内导入路径到代码图节点的索引，由 CONTAINS 树建立一次（CodeGraph 添加、删除节点时同步维护）。
+    键是去掉 __init__ 后的点分路径，值是图中的节点全名，因此 import 语句中的模块、类、函数都是一次字典查找：
+      - 绝对导入 a.b.c 依次在 repo_name、repo_name.src 下查找（与 RepoParser.local_modules 一致），
+        以项目名开头时也按原样查找
+      - 相对导入 ..models 从导入者所在的包向上 level - 1 层后查找
+    路径本身不在索引中时取最长的已索引前缀（例如从包中导入的名称不是定义而是再导出时，指向该包），
+    找不到项目内的节点时返回 None。
+    """
+    def __init__(self, repo_name):
+        self.repo_name = repo_name
+        self.paths = {}  # 点分路径 -> 节点全名
+        self._candidates = {}  # 点分路径 -> {节点全名: 节点类型}，删除节点后据此重新选出对应的节点
+        self.logger = logging.getLogger(__name__)
+
+    def add(self, fullname, node_type):
+        path = canonical_path(fullname)
+        candidates = self._candidates.setdefault(path, {})
+        candidates[fullname] = node_type
+        self._select(path, candidates)
+
+    def remove(self, fullname):
+        path = canonical_path(fullname)
+        candidates = self._candidates.get(path)
+        if candidates is None or candidates.pop(fullname, None) is None:
+            return
+        if candidates:
+            self._select(path, candidates)
+        else:
+            del self._candidates[path]
+            del self.paths[path]
+
+    def _select(self, path, candidates):
+        self.paths[path] = max(candidates, key=lambda fullname: _PRIORITY.get(candidates[fullname], 0))
+
+    def resolve(self, importer_fullname, imported_name):
+        """
+        import 语句中的名称（ImportParser 记录的文本，相对导入以 '.' 开头）对应的项目内节点全名
+        :param importer_fullname: 导入者的模块全名
+        """
+        level = len(imported_name) - len(imported_name.lstrip('.'))
+        parts = imported_name[level:].split('.') if imported_name[level:] else []
+        if level:
+            package = self._package_of(importer_fullname, level)
+            if package is None:
+                self.logger.debug(f"相对导入超出了项目根目录: {importer_fullname} -> {imported_name}")
+                return None
+            # 至少第一段模块要存在：from .missing import X 不回退到导入者所在的包，只有 from . import 才指向包本身
+            return self._longest_prefix(package.split('.'), parts, 1 if parts else 0)
+        if not parts:
+            return None
+        target = (self._longest_prefix([self.repo_name], parts, 1)
+                  or self._longest_prefix([self.repo_name, 'src'], parts, 1))
+        if target is None and parts[0] == self.repo_name:
+            target = self._longest_prefix([], parts, 2)
+        return target
+
+    def candidate_paths(self, importer_fullname, imported_name):
+        """
+        resolve 查找的完整点分路径，解析结果是其中某个路径的已索引前缀。
+        这些路径的某个前缀上增删节点时，该导入需要重新解析（watch 模式据此维护反向索引）
+        """
+        level = len(imported_name) - len(imported_name.lstrip('.'))
+        parts = imported_name[level:].split('.') if imported_name[level:] else []
+        if level:
+            package = self._package_of(importer_fullname, level)
+            return [] if package is None else ['.'.join(package.split('.') + parts)]
+        if not parts:
+            return []
+        paths = ['.'.join([self.repo_name] + parts), '.'.join([self.repo_name, 'src'] + parts)]
+        if parts[0] == self.repo_name:
+            paths.append('.'.join(parts))
+        return paths
+
+    @staticmethod
+    def _package_of(importer_fullname, level):
+        """导入者所在的包向上 level - 1 层（repo.pkg.mod 和 repo.pkg.__init__ 所在的包都是 repo.pkg）"""
+        package = importer_fullname.rsplit('.', 1)[0] if '.' in importer_fullname else None
+        for _ in range(level - 1):
+            if package is None or '.' not in package:
+                return None
+            package = package.rsplit('.', 1)[0]
+        return canonical_path(package) if package is not None else None
+
+    def _longest_prefix(self, base, parts, minimum):
+        """base + parts 的最长已索引前缀，至少保留 parts 的前 minimum 段"""
+        for end in range(len(parts), minimum - 1, -1):
+            target = self.paths.get('.'.join(base + parts[:end]))
+            if target is not None:
+                return target
+        return None
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __contains__(self, path):
+        return path in self.paths
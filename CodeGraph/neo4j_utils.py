@@ -2,6 +2,7 @@ import os
 import logging
 from py2neo import Graph, Node, Relationship
 from tqdm import tqdm
+from edge_index import edge_relationships
 
 class Neo4jHandler:
     def __init__(self, url, user, password):
@@ -47,11 +48,13 @@ class Neo4jHandler:
                 start_node = self.graph.nodes.match(full_name=start).first()
                 end_node = self.graph.nodes.match(full_name=end).first()
                 if start_node and end_node:
-                    existing_rel = self.graph.match_one(nodes=(start_node, end_node), r_type=edge_attrs['relationship'])
-                    if not existing_rel:
-                        rel = Relationship(start_node, edge_attrs['relationship'], end_node)
-                        self.graph.create(rel)
-                        tqdm.write(f"导入关系: {start} -> {end} (类型: {edge_attrs['relationship']})")  # 使用 tqdm.write 替代 logger
+                    # 同一对节点之间的多种关系合并在一条边上，每种关系分别创建
+                    for relationship in edge_relationships(edge_attrs):
+                        existing_rel = self.graph.match_one(nodes=(start_node, end_node), r_type=relationship)
+                        if not existing_rel:
+                            rel = Relationship(start_node, relationship, end_node)
+                            self.graph.create(rel)
+                            tqdm.write(f"导入关系: {start} -> {end} (类型: {relationship})")  # 使用 tqdm.write 替代 logger
                 else:
                     tqdm.write(f"警告: 关系的起始节点或终止节点缺失，跳过创建关系: {start} -> {end}")
                 pbar.update(1)  # 更新进度条
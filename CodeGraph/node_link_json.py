@@ -0,0 +1,283 @@
+import re
+import json
+import inspect
+import networkx as nx
+from edge_index import edge_relationships
+
+CHUNK_SIZE = 1 << 16  # 流式读取时每次读入的字符数
+_INDENT = " " * 4
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+def _default_edges_key():
+    """与所用 networkx 版本的 node_link_data 默认值相同的边列表键（3.6 起为 "edges"，之前为 "links"）"""
+    parameter = inspect.signature(nx.node_link_data).parameters.get("edges")
+    if parameter is None or parameter.default is None:
+        return "links"
+    return parameter.default
+
+
+DEFAULT_EDGES_KEY = _default_edges_key()
+
+
+# ---------------------------------------------------------------
+# 流式写出
+# ---------------------------------------------------------------
+
+def _dumps(value, level):
+    """json.dump(..., indent=4) 中位于第 level 层的值：字符串中的换行已被转义，输出中的换行只来自结构"""
+    return json.dumps(value, indent=4).replace("\n", "\n" + _INDENT * level)
+
+
+_encode_string = json.encoder.encode_basestring_ascii
+_ITEM_SEPARATOR = ",\n" + _INDENT * 3
+
+
+def _scalar(value):
+    """与 json 模块相同的标量编码，不是标量时返回 None"""
+    if isinstance(value, str):
+        return _encode_string(value)
+    if value is None:
+        return "null"
+    if value is True:
+        return "true"
+    if value is False:
+        return "false"
+    if isinstance(value, int):
+        return int.__repr__(value)
+    if isinstance(value, float):
+        if value != value:
+            return "NaN"
+        if value in (float("inf"), float("-inf")):
+            return "Infinity" if value > 0 else "-Infinity"
+        return float.__repr__(value)
+    return None
+
+
+def _dumps_item(item):
+    """
+    数组中的一个节点或边（第 2 层）。属性值都是标量时（最常见的情况）直接拼接，
+    避免每个元素都创建一次 json 的编码器；其余情况交给 json.dumps
+    """
+    if not isinstance(item, dict) or not item:
+        return _dumps(item, 2)
+    members = []
+    for key, value in item.items():
+        encoded = _scalar(value) if isinstance(key, str) else None
+        if encoded is None:
+            return _dumps(item, 2)
+        members.append(_encode_string(key) + ": " + encoded)
+    return "{\n" + _INDENT * 3 + _ITEM_SEPARATOR.join(members) + "\n" + _INDENT * 2 + "}"
+
+
+def _write_array(f, items):
+    first = True
+    for item in items:
+        f.write("[\n" + _INDENT * 2 if first else ",\n" + _INDENT * 2)
+        f.write(_dumps_item(item))
+        first = False
+    f.write("[]" if first else "\n" + _INDENT + "]")
+
+
+def write_node_link_json(graph, f, edges=None):
+    """
+    流式写出 node-link JSON：输出与 json.dump(nx.node_link_data(graph, edges=edges), f, indent=4) 逐字节相同，
+    但每次只构造并序列化一个节点或一条边，峰值内存与图的大小无关（code 为 SourceSpan 的节点逐个解码）。
+    :param f: 以文本方式打开的文件
+    :param edges: 边列表的键，None 时与所用 networkx 版本的 node_link_data 默认值相同
+    """
+    edges = edges or DEFAULT_EDGES_KEY
+    f.write("{\n")
+    f.write(f'{_INDENT}"directed": {_dumps(graph.is_directed(), 1)},\n')
+    f.write(f'{_INDENT}"multigraph": {_dumps(graph.is_multigraph(), 1)},\n')
+    f.write(f'{_INDENT}"graph": {_dumps(graph.graph, 1)},\n')
+    f.write(f'{_INDENT}"nodes": ')
+    # 与 node_link_data 相同的构造方式：属性在前，id 在后（属性中已有 id 时保持原来的位置）
+    _write_array(f, ({**graph.nodes[node], "id": node} for node in graph))
+    f.write(f",\n{_INDENT}{json.dumps(edges)}: ")
+    if graph.is_multigraph():
+        links = ({**data, "source": source, "target": target, "key": key}
+                 for source, target, key, data in graph.edges(keys=True, data=True))
+    else:
+        links = ({**data, "source": source, "target": target} for source, target, data in graph.edges(data=True))
+    _write_array(f, links)
+    f.write("\n}")
+
+
+def save_node_link_json(graph, path, edges=None):
+    """把图流式写出为 node-link JSON 文件，见 write_node_link_json"""
+    with open(path, 'w') as f:
+        write_node_link_json(graph, f, edges)
+
+
+# ---------------------------------------------------------------
+# 流式读取
+# ---------------------------------------------------------------
+
+class _Scanner:
+    """
+    在分块读入的文本上逐个解码 JSON 值：缓冲区中只保留尚未解码的部分，
+    一个值不完整时继续读入（每次读入的量加倍），峰值内存取决于最大的单个节点或边，而不是整个文件。
+    """
+    def __init__(self, f, chunk_size=CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.position = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self, size):
+        data = self.f.read(size)
+        if not data:
+            self.eof = True
+        self.buffer = self.buffer[self.position:] + data
+        self.position = 0
+
+    def peek(self):
+        """跳过空白，返回下一个字符，文件结束时返回空字符串"""
+        while True:
+            self.position = _WHITESPACE.match(self.buffer, self.position).end()
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if self.eof:
+                return ""
+            self._fill(self.chunk_size)
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Invalid node-link JSON: expected {char!r} in {getattr(self.f, 'name', 'stream')}")
+        self.position += 1
+
+    def value(self):
+        self.peek()
+        size = self.chunk_size
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            else:
+                # 缓冲区末尾的数字可能被截断，读入更多内容后重新解码
+                if end < len(self.buffer) or self.eof:
+                    self.position = end
+                    return value
+            self._fill(size)
+            size *= 2
+
+
+def _events(f, chunk_size=CHUNK_SIZE):
+    """
+    按顺序产生 node-link JSON 中的内容：nodes / links（或 edges）数组中的每个元素为 ("node", 字典) / ("link", 字典)，
+    其余的顶层键为 (键, 值)
+    """
+    scanner = _Scanner(f, chunk_size)
+    scanner.expect("{")
+    if scanner.peek() == "}":
+        return
+    while True:
+        key = scanner.value()
+        scanner.expect(":")
+        if key in ("nodes", "links", "edges") and scanner.peek() == "[":
+            kind = "node" if key == "nodes" else "link"
+            scanner.expect("[")
+            if scanner.peek() == "]":
+                scanner.expect("]")
+            else:
+                while True:
+                    yield kind, scanner.value()
+                    if scanner.peek() != ",":
+                        break
+                    scanner.expect(",")
+                scanner.expect("]")
+        else:
+            yield key, scanner.value()
+        if scanner.peek() != ",":
+            break
+        scanner.expect(",")
+    scanner.expect("}")
+
+
+def _project(item, fields, exclude, keep):
+    """只保留 fields 中的属性（keep 中的键总是保留），再去掉 exclude 中的属性"""
+    if fields is not None:
+        item = {key: value for key, value in item.items() if key in fields or key in keep}
+    if exclude:
+        item = {key: value for key, value in item.items() if key not in exclude or key in keep}
+    return item
+
+
+def iter_nodes(path, fields=None, exclude=(), node_types=None, chunk_size=CHUNK_SIZE):
+    """
+    逐个读取 node-link JSON 中的节点字典（包含 id），读完 nodes 数组即停止，不读取边。
+    例如 iter_nodes(path, fields=(), node_types={"function"}) 只取出所有函数节点的 id。
+    :param fields: 只保留这些属性（id 总是保留），None 表示全部
+    :param exclude: 去掉的属性，例如 ("code",)
+    :param node_types: 只返回 type 属于其中的节点，None 表示全部
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        seen_nodes = False
+        for kind, value in _events(f, chunk_size):
+            if kind == "node":
+                seen_nodes = True
+                if node_types is None or value.get("type") in node_types:
+                    yield _project(value, fields, exclude, ("id",))
+            elif seen_nodes:
+                return
+
+
+def iter_links(path, fields=None, exclude=(), relationships=None, chunk_size=CHUNK_SIZE):
+    """
+    逐个读取 node-link JSON 中的边字典（包含 source、target，多重图还有 key）。
+    :param fields: 只保留这些属性（source、target、key 总是保留），None 表示全部
+    :param exclude: 去掉的属性
+    :param relationships: 只返回关系（包括合并在 relationships 中的关系）属于其中的边，None 表示全部
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        for kind, value in _events(f, chunk_size):
+            if kind == "link" and (relationships is None
+                                   or any(relationship in relationships for relationship in edge_relationships(value))):
+                yield _project(value, fields, exclude, ("source", "target", "key"))
+
+
+def load_node_link_graph(path, fields=None, exclude=(), node_types=None, chunk_size=CHUNK_SIZE):
+    """
+    流式加载 node-link JSON 为 networkx 图，不需要先把整个文件 json.load 为字典，
+    不带过滤条件时与 nx.node_link_graph(json.load(f)) 的结果相同。
+    :param fields: 节点只保留这些属性，None 表示全部
+    :param exclude: 节点去掉的属性，例如 ("code",)
+    :param node_types: 只加载 type 属于其中的节点，以及两端都被加载的边
+    """
+    attributes = {"directed": False, "multigraph": False, "graph": {}}
+    graph = None
+    with open(path, 'r', encoding='utf-8') as f:
+        for kind, value in _events(f, chunk_size):
+            if kind not in ("node", "link"):
+                attributes[kind] = value
+                continue
+            if graph is None:
+                graph = _empty_graph(attributes)
+            if kind == "node":
+                if node_types is None or value.get("type") in node_types:
+                    value = _project(value, fields, exclude, ("id",))
+                    node = value.pop("id")
+                    graph.add_node(node, **value)
+                continue
+            source, target = value.pop("source"), value.pop("target")
+            if node_types is not None and not (source in graph and target in graph):
+                continue
+            if graph.is_multigraph():
+                graph.add_edge(source, target, key=value.pop("key", None), **value)
+            else:
+                graph.add_edge(source, target, **value)
+    return graph if graph is not None else _empty_graph(attributes)
+
+
+def _empty_graph(attributes):
+    if attributes["multigraph"]:
+        graph = nx.MultiDiGraph() if attributes["directed"] else nx.MultiGraph()
+    else:
+        graph = nx.DiGraph() if attributes["directed"] else nx.Graph()
+    graph.graph.update(attributes["graph"])
+    return graph
@@ -1,2 +1,4 @@
 from .contains_parser import ContainsParser
 from .contains_parser import Node
+from .symbol_index import SymbolIndex
+from .discovery import FileDiscovery
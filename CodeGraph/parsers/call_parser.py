@@ -1,16 +1,50 @@
 import os
 from tree_sitter import Parser, Language
 import tree_sitter_python as tspython
-from lsp_client import LspClientWrapper
+from lsp_client import LspClientWrapper, RequestFailed
 import logging
+from .source_buffer import SourceBuffer
+from .discovery import discover
+from .definition_cache import DefinitionFileCache
+from .static_resolver import RESOLVED, EXTERNAL, closest_definition
+from .queries import CALL_QUERY, CALL_KINDS, ordered_matches, select_matches, innermost_enclosing
+
+class CallSite:
+    """
+    一个待解析的调用点：记录调用者、被调用名称以及名称在文件中的位置（行、列）。
+    提取阶段只收集调用点，等所有文件的符号都注册完毕后再统一解析。
+    """
+    def __init__(self, caller_fullname, file_path, callee_name, position, is_method_call=False,
+                 object_name=None, object_position=None, method_name=None, method_position=None):
+        self.caller_fullname = caller_fullname
+        self.file_path = file_path
+        self.callee_name = callee_name
+        self.position = position  # 被调用表达式的起始位置 (line, column)
+        self.is_method_call = is_method_call  # 是否为 obj.method(...) 形式的调用
+        self.object_name = object_name
+        self.object_position = object_position
+        self.method_name = method_name
+        self.method_position = method_position
+
+    def to_tuple(self):
+        """转换为只包含内置类型的元组，便于写入缓存"""
+        return (self.caller_fullname, self.file_path, self.callee_name, self.position, self.is_method_call,
+                self.object_name, self.object_position, self.method_name, self.method_position)
+
+    @classmethod
+    def from_tuple(cls, data):
+        return cls(*data)
 
 class CallParser:
+    SKIP_DIRS = ['templates', 'cookiecutter-template']
+
     def __init__(self, project_path, repo_name, code_graph, defined_symbols, lsp_client=None):
         self.project_path = project_path
         self.repo_name = repo_name
         self.code_graph = code_graph
         self.defined_symbols = defined_symbols  # 从 ContainsParser 获取的符号定义
         self.calls = []  # 存储调用关系 (caller, callee)
+        self.call_sites = []  # 已提取、尚未解析的调用点
 
         # 配置日志记录
         self.logger = logging.getLogger('call_parser')
@@ -24,6 +58,12 @@ class CallParser:
         # self.lsp_client = LspClientWrapper(self.project_path)
         self.lsp_client = lsp_client 
         self.parser = self._init_parser()
+        self.definition_files = DefinitionFileCache(self.parser)  # 定义文件语法树和 namespace 的 LRU 缓存
+        self.definition_cache = None  # 持久化的 LSP 定义缓存（DefinitionCache），由 RepoParser 按需设置
+        self.static_resolver = None  # 进程内的静态解析器（StaticResolver），由 RepoParser 按需设置
+        # LSP 请求超时、出错或被熔断时改用静态推测得到的调用关系 -> 原因，写入 CALLS 边的属性
+        self.fallback_calls = {}
+        self.fallback_count = 0  # 使用静态推测的调用点个数
 
     def _init_parser(self):
         PY_LANGUAGE = Language(tspython.language())
@@ -40,41 +80,185 @@ class CallParser:
                 self._parse_file(file)
             except Exception as e:
                 self.logger.warning(f"无法解析文件 {file}: {str(e)}")
+        self.resolve()
 
-    def _get_py_files(self):
+    def resolve(self):
+        """
+        解析已收集的所有调用点，生成 (caller, callee) 调用关系。
+        需要在 defined_symbols 完整之后调用。
+        """
+        for calls in self.resolve_call_sites(self.call_sites):
+            self.calls.extend(calls)
+        self.call_sites = []
+
+    def resolve_call_site(self, call_site):
+        """
+        解析单个调用点，返回它新增的 (caller, callee) 调用关系列表
+        """
+        calls = self.resolve_call_sites([call_site])[0]
+        self.calls.extend(calls)
+        return calls
+
+    def resolve_call_sites(self, call_sites, dependencies=None):
         """
-        获取项目中所有的 Python 文件，跳过特定目录
+        批量解析调用点，返回与 call_sites 对齐的调用关系列表（不写入 self.calls）。
+        先处理能直接从 defined_symbols 确定的调用，同时收集需要消歧的调用点；
+        设置了 static_resolver 时先尝试静态解析，剩下的定义请求一次性交给 LSP 客户端并发发送，结果按到达顺序逐个解析。
+        lsp_client 为 LspPool 时请求按文件分片到池中的多个语言服务器上。
+        :param dependencies: 传入列表时填充与 call_sites 对齐的集合，记录静态解析每个调用点时查阅过的模块
         """
-        py_files = []
-        skip_dirs = ['templates', 'cookiecutter-template']
-        for root, _, files in os.walk(self.project_path):
-            if any(skip_dir in root for skip_dir in skip_dirs):
+        results = [[] for _ in call_sites]
+        if dependencies is not None:
+            dependencies[:] = [set() for _ in call_sites]
+        lookups = []  # (调用点下标, 调用点, 请求位置, 候选定义路径, 名称, 查找目标)
+        for index, call_site in enumerate(call_sites):
+            try:
+                calls, lookup = self._handle_call(call_site)
+            except Exception as e:
+                self.logger.warning(f"解析调用 {call_site.callee_name} ({call_site.file_path}) 时出错: {str(e)}")
+                continue
+            results[index] = calls
+            if lookup is not None:
+                lookups.append((index, call_site) + lookup)
+
+        if self.static_resolver is not None:
+            lookups = self._resolve_statically(lookups, results, dependencies)
+        if not lookups:
+            return results
+
+        requests = [(os.path.abspath(call_site.file_path), position[0], position[1])
+                    for _, call_site, position, _, _, _ in lookups]
+        pending = []  # 需要发送给 LSP 的请求在 requests 中的下标
+        for request_index, request in enumerate(requests):
+            if self.definition_cache is not None:
+                hit, definition = self.definition_cache.lookup(*request)
+                if hit:
+                    self._apply_definition(results, lookups[request_index], definition)
+                    continue
+            pending.append(request_index)
+
+        if pending:
+            for position, definition in self.lsp_client.find_definitions([requests[i] for i in pending]):
+                request_index = pending[position]
+                if isinstance(definition, RequestFailed):
+                    # 没有得到 LSP 的结果：使用静态推测，结果不写入定义缓存
+                    self._apply_fallback(results, lookups[request_index], definition.reason)
+                    continue
+                if self.definition_cache is not None:
+                    self.definition_cache.store(*requests[request_index], definition)
+                self._apply_definition(results, lookups[request_index], definition)
+        return results
+
+    def _resolve_statically(self, lookups, results, dependencies):
+        """
+        用 static_resolver 解析需要消歧的调用点，返回仍需交给 LSP 的 lookups
+        """
+        remaining = []
+        for lookup in lookups:
+            index, call_site, _, _, name, target = lookup
+            try:
+                status, callee_fullname, used_modules = self.static_resolver.resolve(call_site, target)
+            except Exception as e:
+                self.logger.warning(f"静态解析调用 {call_site.callee_name} ({call_site.file_path}) 时出错: {str(e)}")
+                remaining.append(lookup)
+                continue
+            if status == RESOLVED:
+                results[index] = self._record_resolved_call(call_site.caller_fullname, callee_fullname, name)
+            elif status != EXTERNAL:
+                remaining.append(lookup)
                 continue
-            for file in files:
-                if file.endswith(".py"):
-                    try:
-                        file_path = os.path.join(root, file)
-                        # 尝试打开文件以确保它是可访问的
-                        with open(file_path, "r", encoding="utf-8") as f:
-                            f.read(1)
-                        py_files.append(file_path)
-                    except Exception as e:
-                        self.logger.warning(f"跳过文件 {file_path}: {str(e)}")
-        return py_files
+            if dependencies is not None:
+                dependencies[index] = used_modules
+        return remaining
+
+    def _apply_definition(self, results, lookup, definition):
+        index, call_site, _, _, name, _ = lookup
+        try:
+            results[index] = self._resolve_call_with_lsp(call_site.caller_fullname, definition, name)
+        except Exception as e:
+            self.logger.warning(f"解析调用 {call_site.callee_name} ({call_site.file_path}) 时出错: {str(e)}")
+
+    def _apply_fallback(self, results, lookup, reason):
+        index, call_site, _, definition_paths, _, target = lookup
+        if self.static_resolver is not None:
+            callee_fullname = self.static_resolver.best_guess(call_site, target, definition_paths)
+        else:
+            callee_fullname = closest_definition(call_site.caller_fullname, definition_paths)
+        edge = (call_site.caller_fullname, callee_fullname)
+        self.logger.debug(f"LSP {reason}, static fallback: {edge[0]} -> {edge[1]}")
+        self.fallback_calls[edge] = reason
+        self.fallback_count += 1
+        results[index] = [edge]
+
+    def call_attributes(self, caller_fullname, callee_fullname):
+        """CALLS 边的附加属性：由静态推测得到的边记录 resolution 和 LSP 失败的原因"""
+        reason = self.fallback_calls.get((caller_fullname, callee_fullname))
+        if reason is None:
+            return {}
+        return {"resolution": "static_fallback", "fallback_reason": reason}
+
+    def cache_stats(self):
+        """定义文件 LRU 和持久化定义缓存的命中、未命中次数，以及静态解析的统计"""
+        stats = self.definition_files.stats()
+        if self.definition_cache is not None:
+            stats.update(self.definition_cache.stats())
+        if self.static_resolver is not None:
+            stats.update(self.static_resolver.stats())
+        return stats
+
+    def lsp_stats(self):
+        """LSP 请求数、超时/出错/被拒绝的次数、耗时的 p50/p95/p99，以及改用静态推测的调用点个数"""
+        client_stats = getattr(self.lsp_client, "stats", None)
+        stats = client_stats() if client_stats is not None else {}
+        stats["static_fallbacks"] = self.fallback_count
+        return stats
+
+    def lookup_names(self, call_site):
+        """
+        解析该调用点时会在 defined_symbols 中查找的名称，
+        这些名称对应的定义不变时，解析结果也不会改变
+        """
+        if not call_site.is_method_call:
+            return [call_site.callee_name]
+        if call_site.object_name in self.defined_symbols:
+            return [call_site.object_name]
+        return [call_site.object_name, call_site.method_name]
+
+    def should_skip(self, file_path):
+        """
+        判断文件是否位于需要跳过的模板目录中：这些文件仍然属于 CONTAINS 树，只是不收集其中的调用。
+        按相对项目根目录的路径判断，项目本身位于这类目录下时不受影响
+        """
+        root = os.path.relpath(os.path.dirname(os.path.abspath(file_path)), os.path.abspath(self.project_path))
+        return any(skip_dir in root for skip_dir in self.SKIP_DIRS)
+
+    def _get_py_files(self):
+        """
+        获取项目中所有的 Python 文件，跳过模板目录
+        """
+        return [entry.path for entry in discover(self.project_path).files if not self.should_skip(entry.path)]
 
     def _parse_file(self, file_path):
         try:
-            with open(file_path, "r", encoding="utf-8") as file:
-                file_content = file.read()
+            source = SourceBuffer.from_file(file_path)
 
             # 使用 tree-sitter 解析文件
-            tree = self.parser.parse(bytes(file_content, "utf8"))
+            tree = self.parser.parse(source.data)
+            self.collect_calls(file_path, tree, source)
+        except Exception as e:
+            self.logger.warning(f"解析文件 {file_path} 时出错: {str(e)}")
 
+    def collect_calls(self, file_path, tree, source, matches=None):
+        """
+        基于已经解析好的语法树收集调用点（供 RepoParser 复用同一棵树和源码缓冲区）
+        :param matches: RepoParser 用合并查询得到的 ordered_matches 结果，为 None 时单独执行查询
+        """
+        try:
             # 构建模块名称
             module_name = self._get_module_name(file_path)
 
             # 递归分析调用关系
-            self._extract_calls(tree.root_node, file_path, module_name)
+            self._extract_calls(tree.root_node, source, module_name, matches)
         except Exception as e:
             self.logger.warning(f"解析文件 {file_path} 时出错: {str(e)}")
 
@@ -84,115 +268,138 @@ class CallParser:
         module_name = os.path.splitext(relative_path)[0].replace(os.path.sep, '.')
         return f"{self.repo_name}.{module_name}"
 
-    def _extract_calls(self, node, file_path, current_fullname):
+    def _extract_calls(self, node, source, current_fullname, matches=None):
         """
-        递归分析文件中的函数调用关系，保持与 ContainsParser 一致的自顶向下路径
+        使用预编译的 CALL_QUERY 一次找出文件中的调用表达式和类、函数作用域，
+        调用者的完整路径由包含调用的最内层作用域确定，保持与 ContainsParser 一致的自顶向下路径。
+        调用点按先序收集，顺序与递归遍历一致。
         """
-        for child in node.children:
-            if child.type == 'class_definition' or child.type == 'function_definition':
+        if matches is None:
+            matches = ordered_matches(CALL_QUERY, node)
+        module_fullname = current_fullname
+        scopes = []
+        for kind, child, captures in select_matches(matches, CALL_KINDS):
+            current_fullname = innermost_enclosing(scopes, child) or module_fullname
+            if kind != 'call':
                 # 处理类和函数，构建它们的完整路径
-                name = self._get_node_text(child.child_by_field_name('name'), file_path)
-                fullname = f"{current_fullname}.{name}"
-
-                # 递归处理子节点
-                self._extract_calls(child, file_path, fullname)
-
-            elif child.type == 'call':
-                # 处理函数调用
-                func_name_node = child.child_by_field_name('function')
-                if func_name_node:
-                    callee_name = self._get_node_text(func_name_node, file_path)
-                    self.logger.debug("-" * 50)
-                    self._handle_call(func_name_node, callee_name, current_fullname, file_path)
-
-                # 递归处理链式调用
-                self._extract_calls(child, file_path, current_fullname)
+                name_nodes = captures.get('name')
+                name = self._get_node_text(name_nodes[0], source) if name_nodes else ""
+                scopes.append((child.end_byte, f"{current_fullname}.{name}"))
             else:
-                # 递归处理其他节点
-                self._extract_calls(child, file_path, current_fullname)
+                # 处理函数调用
+                func_name_node = captures['callee'][0]
+                callee_name = self._get_node_text(func_name_node, source)
+                self.logger.debug("-" * 50)
+                self.call_sites.append(self._make_call_site(func_name_node, callee_name, current_fullname, source))
 
-    def _handle_call(self, func_name_node, callee_name, caller_fullname, file_path):
+    def _make_call_site(self, func_name_node, callee_name, caller_fullname, source):
         """
-        处理全局函数和方法调用的统一逻辑
+        从调用表达式节点构建调用点，只保留名称和位置，不持有语法树节点
         """
-        self.logger.debug(f"Found call to {callee_name} in {caller_fullname}")
-
         if func_name_node.type == 'attribute':
-            # 处理类方法或实例方法调用
+            # 类方法或实例方法调用
             object_node = func_name_node.child_by_field_name('object')
             method_node = func_name_node.child_by_field_name('attribute')
 
-            object_name = self._get_node_text(object_node, file_path) if object_node else None
-            method_name = self._get_node_text(method_node, file_path) if method_node else None
+            return CallSite(
+                caller_fullname, source.file_path, callee_name, tuple(func_name_node.start_point), is_method_call=True,
+                object_name=self._get_node_text(object_node, source) if object_node else None,
+                object_position=tuple(object_node.start_point) if object_node else None,
+                method_name=self._get_node_text(method_node, source) if method_node else None,
+                method_position=tuple(method_node.start_point) if method_node else None,
+            )
+
+        # 全局函数调用
+        return CallSite(caller_fullname, source.file_path, callee_name, tuple(func_name_node.start_point))
+
+    def _handle_call(self, call_site):
+        """
+        处理全局函数和方法调用的统一逻辑。
+        返回 (calls, lookup)：calls 为已经确定的调用关系；
+        需要消歧时 lookup 为 (请求位置, 候选定义路径, 名称, 查找目标)，否则为 None；
+        查找目标为 'name'（请求位置上的名称本身）或 'member'（obj.method() 中的方法）
+        """
+        self.logger.debug(f"Found call to {call_site.callee_name} in {call_site.caller_fullname}")
 
-            self.logger.debug(f"Found method call: {object_name}.{method_name} in {caller_fullname}")
-            self._process_method_call(object_name, method_name, caller_fullname, file_path, object_node,method_node)
+        if call_site.is_method_call:
+            # 处理类方法或实例方法调用
+            self.logger.debug(f"Found method call: {call_site.object_name}.{call_site.method_name} in {call_site.caller_fullname}")
+            return self._process_method_call(call_site)
 
         else:
             # 处理全局函数调用
-            self._process_function_call(callee_name, caller_fullname, file_path, func_name_node)
+            return self._process_function_call(call_site)
 
-    def _process_function_call(self, callee_name, caller_fullname, file_path, func_name_node):
+    def _process_function_call(self, call_site):
         """
         处理全局函数调用
         """
+        callee_name = call_site.callee_name
+        caller_fullname = call_site.caller_fullname
         if callee_name in self.defined_symbols:
             definition_paths = self.defined_symbols[callee_name]
             if len(definition_paths) == 1:
                 # 唯一定义，直接使用
                 callee_fullname = definition_paths[0]
-                self.calls.append((caller_fullname, callee_fullname))
                 self.logger.debug(f"Recorded function call: {caller_fullname} -> {callee_fullname}")
+                return [(caller_fullname, callee_fullname)], None
             else:
                 # 多个定义路径，使用 LSP 确定具体定义
-                definition = self.lsp_client.find_definition(file_path, func_name_node.start_point[0], func_name_node.start_point[1])
-                self._resolve_call_with_lsp(caller_fullname, definition, definition_paths, callee_name)
+                return [], (call_site.position, definition_paths, callee_name, 'name')
         else:
             self.logger.debug(f"Call to external function {callee_name} in {caller_fullname}, skipping.")
+            return [], None
 
-    def _resolve_call_with_lsp(self, caller_fullname, definition, definition_paths, callee_name):
+    def _resolve_call_with_lsp(self, caller_fullname, definition, callee_name):
         """
-        使用 LSP 来确定调用函数的位置
+        使用 LSP 返回的定义位置确定被调用的函数，返回调用关系列表
         """
         self.logger.debug(f"Definition: {definition}")
         if definition:
             callee_fullname = self._get_fullname_from_definition(definition)
             self.logger.debug(f"Resolved full function name: {callee_fullname}")
-            if callee_fullname and any(callee_fullname.startswith(path) for path in definition_paths):
-                self.calls.append((caller_fullname, callee_fullname))
-                self.logger.debug(f"Recorded call: {caller_fullname} -> {callee_fullname}")
-            else:
-                self.logger.warning(f"Could not determine the correct definition for {callee_name} called in {caller_fullname}")
-
-    def _process_method_call(self, object_name, method_name, caller_fullname, file_path, object_node, method_node):
+            return self._record_resolved_call(caller_fullname, callee_fullname, callee_name)
+        return []
+
+    def _record_resolved_call(self, caller_fullname, callee_fullname, callee_name):
+        """解析出的定义属于 callee_name 的某个候选定义（是该定义本身或位于其内部）时记录调用关系"""
+        if callee_fullname and self.defined_symbols.definition_prefix(callee_fullname, callee_name) is not None:
+            self.logger.debug(f"Recorded call: {caller_fullname} -> {callee_fullname}")
+            return [(caller_fullname, callee_fullname)]
+        self.logger.warning(f"Could not determine the correct definition for {callee_name} called in {caller_fullname}")
+        return []
+
+    def _process_method_call(self, call_site):
         """
         处理类方法或实例方法调用
         """
+        object_name = call_site.object_name
+        method_name = call_site.method_name
+        caller_fullname = call_site.caller_fullname
         if object_name in self.defined_symbols:
             class_definitions = self.defined_symbols[object_name]
             if len(class_definitions) == 1:
                 # 静态方法调用，记录类方法调用
                 callee_fullname = f"{class_definitions[0]}.{method_name}"
-                self.calls.append((caller_fullname, callee_fullname))
                 self.logger.debug(f"Recorded static method call: {caller_fullname} -> {callee_fullname}")
+                return [(caller_fullname, callee_fullname)], None
             else:
                 # 多个类定义，使用 LSP 确定具体定义
-                definition = self.lsp_client.find_definition(file_path, object_node.start_point[0], object_node.start_point[1])
-                self._resolve_call_with_lsp(caller_fullname, definition, class_definitions , object_name )
-                
+                return [], (call_site.object_position, class_definitions, object_name, 'name')
+
         else:
             if method_name in self.defined_symbols:
-                method_definitions = self.defined_symbols[method_name] 
+                method_definitions = self.defined_symbols[method_name]
                 if len(method_definitions) == 1:
                     callee_fullname = method_definitions[0]
-                    self.calls.append((caller_fullname, callee_fullname))
                     self.logger.debug(f"Recorded instance method call: {caller_fullname} -> {callee_fullname}")
+                    return [(caller_fullname, callee_fullname)], None
                 else:
-                    # 修改：这里传入 method_node 以便更精确地使用 LSP 确定定义
-                    definition = self.lsp_client.find_definition(file_path, method_node.start_point[0], method_node.start_point[1])
-                    self._resolve_call_with_lsp(caller_fullname, definition, method_definitions, method_name)
+                    # 修改：这里传入 method 的位置以便更精确地使用 LSP 确定定义
+                    return [], (call_site.method_position, method_definitions, method_name, 'member')
             else:
                 self.logger.debug(f"Method {method_name} not found for object {object_name}, skipping.")
+                return [], None
 
     def _get_fullname_from_definition(self, definition):
         """
@@ -212,26 +419,29 @@ class CallParser:
 
         self.logger.debug(f"Definition file: {def_file_path}, start: ({start_line}, {start_column}), end: ({end_line}, {end_column})")
 
-        # 根据文件路径解析对应的源代码
-        with open(def_file_path, "r") as file:
-            file_content = file.read()
+        # 定义文件的源码和语法树来自 LRU 缓存，同一个文件只解析一次
+        entry = self.definition_files.get(def_file_path)
+        key = (start_line, start_column, end_line, end_column)
+        namespace = self.definition_files.namespace(
+            entry, key, lambda: self._namespace_at(entry, key))
+        if namespace is None:
+            self.logger.error(f"Could not locate node at ({start_line}, {start_column}) in {def_file_path}")
+            return None
 
-        # 使用 tree-sitter 解析文件，生成语法树
-        tree = self.parser.parse(bytes(file_content, "utf8"))
+        self.logger.debug(f"Resolved full function name: {namespace}")
+        return namespace
 
-        # 根据 LSP 的位置信息找到语法树中的精确节���
-        target_node = tree.root_node.descendant_for_point_range((start_line, start_column), (end_line, end_column))
+    def _namespace_at(self, entry, key):
+        start_line, start_column, end_line, end_column = key
+        # 根据 LSP 的位置信息找到语法树中的精确节点
+        target_node = entry.tree.root_node.descendant_for_point_range((start_line, start_column), (end_line, end_column))
         if not target_node:
-            self.logger.error(f"Could not locate node at ({start_line}, {start_column}) in {def_file_path}")
             return None
 
         # 构建命名空间路径（包括文件相对项目根路径的模块径）
-        namespace = self._build_namespace_from_node(target_node, def_file_path)
+        return self._build_namespace_from_node(target_node, entry.source)
 
-        self.logger.debug(f"Resolved full function name: {namespace}")
-        return namespace
-
-    def _build_namespace_from_node(self, node, def_file_path):
+    def _build_namespace_from_node(self, node, def_source):
         """
         从指定的 AST 节点开始，向上遍历，构建 namespace 路径
         """
@@ -245,41 +455,19 @@ class CallParser:
                 # 获取函数或类的名字
                 name_node = current_node.child_by_field_name('name')
                 if name_node:
-                    self.logger.debug(f"Adding component: {self._get_node_text(name_node, def_file_path)}")
-                    components.insert(0, self._get_node_text(name_node, def_file_path))
+                    self.logger.debug(f"Adding component: {self._get_node_text(name_node, def_source)}")
+                    components.insert(0, self._get_node_text(name_node, def_source))
             current_node = current_node.parent
 
         # 获取文件相对于项目根路径的模块路径
-        module_path = self._get_module_name(def_file_path)
+        module_path = self._get_module_name(def_source.file_path)
 
         # 返回完整的命名空间：模块路径 + 代码内部命名空间
         return f"{module_path}{'.' if components else ''}{'.'.join(components)}"
 
-    def _get_node_text(self, node, file_path):
+    def _get_node_text(self, node, source):
         """
-        提取 AST 节点对应的源代码文本，使用行列号而非字节
+        提取 AST 节点对应的源代码文本，直接按字节范围从源码缓冲区切片，
+        每行去掉首尾空白，跨多行时用空格拼接
         """
-        if node is None:
-            return ""
-
-        start_line, start_column = node.start_point
-        end_line, end_column = node.end_point
-
-        try:
-            with open(file_path, "r", encoding="utf-8") as file:
-                file_lines = file.readlines()
-
-            if start_line == end_line:
-                # 同一行的情况，直接从 start_column 到 end_column
-                return file_lines[start_line][start_column:end_column].strip()
-            else:
-                # 跨多行的情况，处理起始行、中间行和结束行
-                extracted_text = []
-                extracted_text.append(file_lines[start_line][start_column:].strip())
-                for line in range(start_line + 1, end_line):
-                    extracted_text.append(file_lines[line].strip())
-                extracted_text.append(file_lines[end_line][:end_column].strip())
-                return " ".join(extracted_text)
-        except Exception as e:
-            self.logger.warning(f"无法从文件 {file_path} 提取节点文本: {str(e)}")
-            return ""
\ No newline at end of file
+        return source.node_text_stripped(node)
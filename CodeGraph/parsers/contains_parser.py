@@ -1,13 +1,25 @@
 import tree_sitter_python as tspython
 from tree_sitter import Language, Parser
 import os
+from .source_buffer import SourceBuffer, SourceStore, SourceSpan
+from .symbol_index import SymbolIndex
+from .discovery import discover
+from .queries import DEFINITION_QUERY, DEFINITION_KINDS, ordered_matches, select_matches, innermost_enclosing
 
 class Node:
-    def __init__(self, name, node_type, code=None, signature=None, parent_fullname=None):
+    """
+    CONTAINS 树中的节点。源码不直接保存为字符串：span 指向 SourceStore 中共享的文件内容，
+    读取 code 时才解码，模块、类、方法的源码不再层层重复保存。
+    没有 span 时（例如目录节点，或直接传入 code 构造的节点）code 就是传入的文本。
+    """
+    __slots__ = ('name', 'node_type', 'children', 'signature', 'fullname', 'span', '_code')
+
+    def __init__(self, name, node_type, code=None, signature=None, parent_fullname=None, span=None):
         self.name = name
         self.node_type = node_type  # 'directory', 'module', 'class', 'function'
         self.children = []
-        self.code = code
+        self.span = span  # SourceSpan 或 None
+        self._code = code
         self.signature = signature
 
         # 生成全名：从根节点到当前节点的路径名
@@ -16,6 +28,17 @@ class Node:
         else:
             self.fullname = name
 
+    @property
+    def code(self):
+        if self.span is not None:
+            return self.span.text()
+        return self._code
+
+    @code.setter
+    def code(self, code):
+        self.span = None
+        self._code = code
+
     def add_child(self, child_node):
         self.children.append(child_node)
 
@@ -26,7 +49,8 @@ class ContainsParser:
         self.parser = self._init_parser()
         self.root = Node(repo_name, 'directory')  # 项目的根节点
         self.nodes = {repo_name: self.root}  # 存储所有创建的节点
-        self.defined_symbols = {}  # 用于存储函数和类的定义，key为name，value为定义路径列表
+        self.defined_symbols = SymbolIndex()  # 函数和类的定义，按 name 查询得到定义路径列表
+        self.sources = SourceStore()  # 各文件的源码，节点的 code 是其中的字节范围
 
     def _init_parser(self):
         PY_LANGUAGE = Language(tspython.language())
@@ -34,21 +58,17 @@ class ContainsParser:
         return parser
 
     def parse(self):
-        self._build_tree(self.project_path, self.root)
-
-    def _build_tree(self, current_path, parent_node):
-        for item in os.listdir(current_path):
-            item_path = os.path.join(current_path, item)
-            if os.path.isdir(item_path):
+        directories = {"": self.root}  # 目录相对路径 -> 目录节点
+        for entry in discover(self.project_path).entries:
+            parent_node = directories[entry.parent]
+            if entry.kind == 'directory':
                 # 创建目录节点
-                dir_node = self._create_node(item, 'directory', parent_node)
-                # 递归遍历子目录
-                self._build_tree(item_path, dir_node)
-            elif item.endswith(".py"):
+                directories[entry.relative_path] = self._create_node(entry.name, 'directory', parent_node)
+            else:
                 # 创建文件模块节点并解析
-                self._parse_file(item_path, parent_node)
+                self._parse_file(entry.path, parent_node)
 
-    def _create_node(self, name, node_type, parent_node, code=None):
+    def _create_node(self, name, node_type, parent_node, code=None, span=None):
         # 去掉文件扩展名（仅对模块节点）
         if node_type == 'module' and name.endswith('.py'):
             name = name[:-3]  # 去除 .py 后缀
@@ -60,89 +80,79 @@ class ContainsParser:
             full_name = name
 
         # 创建节点
-        node = Node(name, node_type, code=code, parent_fullname=parent_node.fullname)
+        node = Node(name, node_type, code=code, parent_fullname=parent_node.fullname, span=span)
         parent_node.add_child(node)
         self.nodes[full_name] = node
 
         return node
 
     def _parse_file(self, file_path, parent_node):
-        with open(file_path, "r") as file:
-            file_content = file.read()
-
-        # 创建 module 节点，包含文件内容作为 code
-        module_node = self._create_node(os.path.basename(file_path), 'module', parent_node, code=file_content)
+        source = SourceBuffer.from_file(file_path)
+        tree = self.parser.parse(source.data)
+        self.parse_tree(file_path, parent_node, source, tree)
 
-        tree = self.parser.parse(bytes(file_content, "utf8"))
+    def parse_tree(self, file_path, parent_node, source, tree, matches=None):
+        """
+        基于已经解析好的语法树构建模块节点及其内部的类、函数节点。
+        RepoParser 只解析一次文件，并把同一棵树和源码缓冲区交给这里复用。
+        :param matches: RepoParser 用合并查询得到的 ordered_matches 结果，为 None 时单独执行查询
+        """
+        # 创建 module 节点，整个文件内容作为 code
+        file_id = self.sources.add(file_path, source.data)
+        module_span = SourceSpan(self.sources, file_id, 0, len(source.data))
+        module_node = self._create_node(os.path.basename(file_path), 'module', parent_node, span=module_span)
 
         # 递归构建文件内的树形结构
-        self._extract_items(tree.root_node, file_path, module_node)
-
-    def _extract_items(self, node, file_path, parent_node):
-        for child in node.children:
-            if child.type == 'class_definition':
-                class_name = self._get_node_text(child.child_by_field_name('name'), file_path)
-                class_signature = class_name
-                class_node = Node(class_name, 'class', self._get_code_segment(child, file_path), class_signature, parent_node.fullname)
-                parent_node.add_child(class_node)
-                self.nodes[class_node.fullname] = class_node
-
-                # 注册类到 defined_symbols
-                self._register_symbol(class_name, class_node.fullname)
-
-                # 递归处理子节点
-                self._extract_items(child, file_path, class_node)
+        self._extract_items(tree.root_node, source, module_node, file_id, matches)
+        return module_node
 
-            elif child.type == 'function_definition':
-                func_name = self._get_node_text(child.child_by_field_name('name'), file_path)
-                func_signature = self._get_signature(child, file_path)
-                func_node = Node(func_name, 'function', self._get_code_segment(child, file_path), func_signature, parent_node.fullname)
-                parent_node.add_child(func_node)
-
-                # 注册函数到 defined_symbols
-                self.nodes[func_node.fullname] = func_node
-                self._register_symbol(func_name, func_node.fullname)
+    def _extract_items(self, node, source, parent_node, file_id, matches=None):
+        """
+        使用预编译的 DEFINITION_QUERY 一次找出文件中所有类、函数定义，按先序创建节点，
+        节点创建顺序与递归遍历一致。外层定义由字节范围确定：栈中保存尚未结束的定义节点。
+        """
+        if matches is None:
+            matches = ordered_matches(DEFINITION_QUERY, node)
+        scopes = []
+        for kind, child, captures in select_matches(matches, DEFINITION_KINDS):
+            owner = innermost_enclosing(scopes, child) or parent_node
+            name_nodes = captures.get('name')
+            name = self._get_node_text(name_nodes[0], source) if name_nodes else ""
+
+            span = SourceSpan(self.sources, file_id, child.start_byte, child.end_byte)
+            if kind == 'class':
+                class_signature = name
+                item_node = Node(name, 'class', None, class_signature, owner.fullname, span)
+            else:
+                func_signature = self._get_signature(child, source)
+                item_node = Node(name, 'function', None, func_signature, owner.fullname, span)
+            owner.add_child(item_node)
+            self.nodes[item_node.fullname] = item_node
 
-                # 递归处理子节点
-                self._extract_items(child, file_path, func_node)
+            # 注册类、函数到 defined_symbols
+            self._register_symbol(name, item_node.fullname)
 
-            else:
-                # 递归处理其他子节点
-                self._extract_items(child, file_path, parent_node)
+            # 后续位于该定义范围内的定义以它为父节点
+            scopes.append((child.end_byte, item_node))
 
     def _register_symbol(self, name, fullname):
         """
-        注册函数或类的定义到 defined_symbols 字典中。
+        注册函数或类的定义到 defined_symbols 中。
         如果符号已经存在，添加到其定义路径列表中。
         """
-        if name in self.defined_symbols:
-            self.defined_symbols[name].append(fullname)
-        else:
-            self.defined_symbols[name] = [fullname]
+        self.defined_symbols.add(name, fullname)
 
-    def _get_node_text(self, node, file_path):
+    def _get_node_text(self, node, source):
         """
         提取 AST 节点对应的源代码文本，使用 Tree-sitter 节点的字节位置信息来提取。
         :param node: Tree-sitter 的 AST 节点
-        :param file_path: 当前文件路径
+        :param source: 当前文件的 SourceBuffer
         :return: 提取的代码文本
         """
-        if node is None:
-            return ""
-
-        # 直接使用 start_byte 和 end_byte 提取代码片段
-        start_byte = node.start_byte
-        end_byte = node.end_byte
-
-        with open(file_path, "r", encoding="utf-8") as file:
-            file_content = file.read()
-
-        # 返回文件中从 start_byte 到 end_byte 的代码片段
-        return file_content[start_byte:end_byte]
-
+        # 直接使用 start_byte 和 end_byte 从共享的源码缓冲区中切片
+        return source.node_text(node)
 
-    
-    def _get_signature(self, node, file_path):
+    def _get_signature(self, node, source):
         """
         提取函数的 signature，确保格式符合 Python 标准，去掉 body 的部分。
         """
@@ -160,12 +170,12 @@ class ContainsParser:
                 signature += ":"
             elif child.type == 'identifier':
                 # 函数名紧跟 'def ' 关键字
-                signature += self._get_node_text(child, file_path)
+                signature += self._get_node_text(child, source)
             elif child.type == 'parameters':
-                signature += self._get_node_text(child, file_path)
+                signature += self._get_node_text(child, source)
             else:
                 # 处理其他部分（如修饰符）
-                signature += " "+ self._get_node_text(child, file_path)
+                signature += " "+ self._get_node_text(child, source)
 
         # 确保签名以冒号结尾
         if not signature.endswith(":"):
@@ -175,5 +185,5 @@ class ContainsParser:
 
 
 
-    def _get_code_segment(self, node, file_path):
-        return self._get_node_text(node, file_path)
+    def _get_code_segment(self, node, source):
+        return self._get_node_text(node, source)
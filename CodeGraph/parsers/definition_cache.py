@@ -0,0 +1,154 @@
+import os
+import pickle
+import logging
+from collections import OrderedDict
+from .source_buffer import SourceBuffer
+
+
+def _file_stamp(file_path):
+    """文件的 (mtime_ns, size)，用来判断内存中缓存的文件内容是否仍然有效"""
+    stat = os.stat(file_path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+class DefinitionFile:
+    """
+    一个定义文件的解析结果：源码缓冲区、语法树，以及已经计算过的 namespace
+    （键为 LSP 返回的定义范围 (start_line, start_column, end_line, end_column)）
+    """
+    def __init__(self, source, tree, stamp):
+        self.source = source
+        self.tree = tree
+        self.stamp = stamp
+        self.namespaces = {}
+
+
+class DefinitionFileCache:
+    """
+    定义文件语法树的 LRU 缓存。同一个定义文件（例如被大量调用的 utils.py）只读取、解析一次，
+    文件的修改时间或大小变化时重新解析。
+    """
+    def __init__(self, parser, capacity=128):
+        self.parser = parser
+        self.capacity = capacity
+        self.files = OrderedDict()  # def_file_path -> DefinitionFile，最近使用的在末尾
+        self.hits = 0
+        self.misses = 0
+        self.namespace_hits = 0
+        self.namespace_misses = 0
+
+    def get(self, def_file_path):
+        stamp = _file_stamp(def_file_path)
+        entry = self.files.get(def_file_path)
+        if entry is not None and entry.stamp == stamp:
+            self.files.move_to_end(def_file_path)
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        source = SourceBuffer.from_file(def_file_path)
+        entry = DefinitionFile(source, self.parser.parse(source.data), stamp)
+        self.files[def_file_path] = entry
+        self.files.move_to_end(def_file_path)
+        while len(self.files) > self.capacity:
+            self.files.popitem(last=False)
+        return entry
+
+    def namespace(self, entry, key, build):
+        """返回定义文件中 key 范围对应的 namespace，没有计算过时调用 build() 计算并记录"""
+        if key in entry.namespaces:
+            self.namespace_hits += 1
+            return entry.namespaces[key]
+        self.namespace_misses += 1
+        namespace = entry.namespaces[key] = build()
+        return namespace
+
+    def stats(self):
+        return {
+            "file_hits": self.hits,
+            "file_misses": self.misses,
+            "namespace_hits": self.namespace_hits,
+            "namespace_misses": self.namespace_misses,
+        }
+
+
+class DefinitionCache:
+    """
+    持久化的 LSP 定义查询缓存，在多次构建之间复用。
+    键为调用点位置 (文件, 行, 列)，条目中记录请求文件的内容哈希、LSP 返回的定义，
+    以及定义所在文件的内容哈希；这些文件的内容都没有变化时直接复用上次的结果。
+    """
+    VERSION = 1
+
+    def __init__(self, cache_path):
+        self.cache_path = cache_path
+        self.entries = {}  # (file_path, line, character) -> (source_hash, definition, target_hashes)
+        self.hits = 0
+        self.misses = 0
+        self.dirty = False
+        self._hashes = {}  # file_path -> (stamp, content_hash)
+        self.logger = logging.getLogger(__name__)
+        self._load()
+
+    def file_hash(self, file_path):
+        """文件内容哈希，按文件的修改时间和大小做本地缓存；文件无法读取时返回 None"""
+        try:
+            stamp = _file_stamp(file_path)
+            cached = self._hashes.get(file_path)
+            if cached is not None and cached[0] == stamp:
+                return cached[1]
+            with open(file_path, "rb") as f:
+                content_hash = SourceBuffer(f.read()).content_hash
+        except OSError:
+            return None
+        self._hashes[file_path] = (stamp, content_hash)
+        return content_hash
+
+    def lookup(self, file_path, line, character):
+        """
+        返回 (True, definition)；请求文件或任一定义文件的内容已变化、或没有缓存时返回 (False, None)
+        """
+        entry = self.entries.get((file_path, line, character))
+        if entry is not None:
+            source_hash, definition, target_hashes = entry
+            if (source_hash is not None and source_hash == self.file_hash(file_path)
+                    and all(self.file_hash(path) == target_hash for path, target_hash in target_hashes)):
+                self.hits += 1
+                return True, definition
+        self.misses += 1
+        return False, None
+
+    def store(self, file_path, line, character, definition):
+        target_paths = sorted({_definition_path(item) for item in definition or () if isinstance(item, dict)})
+        target_hashes = tuple((path, self.file_hash(path)) for path in target_paths)
+        self.entries[(file_path, line, character)] = (self.file_hash(file_path), definition, target_hashes)
+        self.dirty = True
+
+    def save(self):
+        if not self.dirty:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.cache_path)), exist_ok=True)
+        tmp_path = f"{self.cache_path}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump({"version": self.VERSION, "entries": self.entries}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.cache_path)
+        self.dirty = False
+
+    def stats(self):
+        return {"definition_hits": self.hits, "definition_misses": self.misses}
+
+    def _load(self):
+        if not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path, "rb") as f:
+                data = pickle.load(f)
+        except Exception as e:
+            self.logger.warning(f"无法读取定义缓存 {self.cache_path}: {str(e)}")
+            return
+        if data.get("version") == self.VERSION:
+            self.entries = data["entries"]
+
+
+def _definition_path(item):
+    return os.path.abspath(item['uri'].replace('file://', ''))
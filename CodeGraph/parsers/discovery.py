@@ -0,0 +1,283 @@
+import os
+import re
+import logging
+
+MAX_FILE_SIZE = 1024 * 1024  # 超过该大小（字节）的 Python 文件视为生成文件，跳过
+# 默认排除的目录：版本控制、依赖和各种工具的缓存（gitignore 语法，相对项目根目录匹配）。
+# 虚拟环境按其中的标记文件识别（见 ENVIRONMENT_MARKERS），不按目录名排除：标准库本身就有名为 venv 的包
+DEFAULT_EXCLUDES = (
+    ".git/", ".hg/", ".svn/", "__pycache__/", "node_modules/",
+    ".tox/", ".nox/", ".eggs/", ".mypy_cache/", ".pytest_cache/", "*.egg-info/",
+)
+ENVIRONMENT_MARKERS = ("pyvenv.cfg", "conda-meta")  # 包含其中之一的目录是虚拟环境或 conda 环境
+
+
+def _translate(pattern):
+    """把 gitignore 的通配符（不含开头的 '/' 和结尾的 '/'）转换为正则表达式"""
+    parts = []
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if pattern.startswith("**/", i) and (i == 0 or pattern[i - 1] == "/"):
+            parts.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i) and i + 2 == len(pattern) and (i == 0 or pattern[i - 1] == "/"):
+            parts.append(".*")
+            i += 2
+        elif c == "*":
+            parts.append("[^/]*")
+            i += 1
+        elif c == "?":
+            parts.append("[^/]")
+            i += 1
+        elif c == "[":
+            end = pattern.find("]", i + 2)
+            if end == -1:
+                parts.append(re.escape(c))
+                i += 1
+            else:
+                body = pattern[i + 1:end]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                parts.append("[" + body.replace("\\", "\\\\") + "]")
+                i = end + 1
+        elif c == "\\" and i + 1 < len(pattern):
+            parts.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            parts.append(re.escape(c))
+            i += 1
+    return "".join(parts)
+
+
+class IgnoreRules:
+    """
+    一个 .gitignore 文件（或一组排除规则）中的规则，按 gitignore 的语义匹配相对于规则所在目录的路径：
+    '!' 开头的规则重新包含，'/' 结尾的规则只匹配目录，包含 '/' 的规则从所在目录开始匹配，
+    否则匹配任意层级的文件名；同一个路径以最后一条匹配的规则为准。
+    """
+    def __init__(self, lines):
+        self.rules = []  # [(正则, 是否取反, 是否只匹配目录)]
+        for line in lines:
+            line = line.rstrip("\n")
+            if not line.endswith("\\ "):
+                line = line.rstrip()
+            if not line or line.startswith("#"):
+                continue
+            negated = line.startswith("!")
+            if negated:
+                line = line[1:]
+            elif line.startswith("\\#") or line.startswith("\\!"):
+                line = line[1:]
+            directory_only = line.endswith("/")
+            line = line.rstrip("/")
+            if not line:
+                continue
+            anchored = "/" in line
+            regex = _translate(line.lstrip("/"))
+            if not anchored:
+                regex = "(?:.*/)?" + regex
+            self.rules.append((re.compile(regex + r"\Z"), negated, directory_only))
+
+    @classmethod
+    def from_file(cls, path):
+        try:
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                return cls(f.readlines())
+        except OSError:
+            return None
+
+    def match(self, relative_path, is_dir):
+        """True 表示排除，False 表示重新包含，None 表示没有规则匹配"""
+        result = None
+        for regex, negated, directory_only in self.rules:
+            if directory_only and not is_dir:
+                continue
+            if regex.match(relative_path):
+                result = not negated
+        return result
+
+
+class ManifestEntry:
+    """清单中的一项：目录（size、mtime_ns 为 None）或 Python 文件，relative_path 使用 '/' 分隔"""
+    __slots__ = ('kind', 'path', 'relative_path', 'size', 'mtime_ns')
+
+    def __init__(self, kind, path, relative_path, size=None, mtime_ns=None):
+        self.kind = kind  # 'directory' 或 'file'
+        self.path = path
+        self.relative_path = relative_path
+        self.size = size
+        self.mtime_ns = mtime_ns
+
+    @property
+    def name(self):
+        return self.relative_path.rsplit("/", 1)[-1]
+
+    @property
+    def parent(self):
+        """所在目录相对项目根目录的路径，根目录为 ''"""
+        return self.relative_path.rpartition("/")[0]
+
+    @property
+    def stat(self):
+        return self.size, self.mtime_ns
+
+    def __repr__(self):
+        return f"ManifestEntry({self.kind!r}, {self.relative_path!r}, {self.size}, {self.mtime_ns})"
+
+
+class FileManifest:
+    """
+    一次发现阶段的结果：按遍历顺序（与 os.listdir 的深度优先遍历相同）排列的目录和 Python 文件，
+    以及被跳过的文件 (相对路径, 原因)。CONTAINS 树、各个提取器、解析缓存和 watch 模式共用同一份清单。
+    """
+    def __init__(self, project_path, entries=None, skipped=None):
+        self.project_path = project_path
+        self.entries = entries if entries is not None else []
+        self.skipped = skipped if skipped is not None else []
+        self._by_path = None
+
+    @property
+    def files(self):
+        return [entry for entry in self.entries if entry.kind == 'file']
+
+    @property
+    def directories(self):
+        return [entry for entry in self.entries if entry.kind == 'directory']
+
+    def get(self, file_path):
+        """文件路径对应的清单项，不在清单中时返回 None"""
+        if self._by_path is None:
+            self._by_path = {entry.path: entry for entry in self.entries}
+        return self._by_path.get(file_path)
+
+
+class FileDiscovery:
+    """
+    项目文件的发现阶段：用 os.scandir 遍历一次项目目录，文件大小和修改时间直接取自目录项，不打开文件。
+      - 遵循各级目录中的 .gitignore（以及 .git/info/exclude），被排除的目录不再进入
+      - excludes 为额外的排除规则（gitignore 语法，相对项目根目录），默认排除 DEFAULT_EXCLUDES
+      - 虚拟环境、conda 环境（包含 ENVIRONMENT_MARKERS 的目录）整体跳过
+      - 超过 max_file_size 的 .py 文件跳过（None 表示不限制）
+      - 不进入指向目录的符号链接，避免循环
+    二进制文件在读取时由 SourceBuffer.from_file 识别，不为此额外打开文件。
+    """
+    def __init__(self, project_path, excludes=None, max_file_size=MAX_FILE_SIZE, use_gitignore=True):
+        self.project_path = project_path
+        self.max_file_size = max_file_size
+        self.use_gitignore = use_gitignore
+        self.excludes = IgnoreRules(DEFAULT_EXCLUDES if excludes is None else excludes)
+        self.logger = logging.getLogger(__name__)
+        self._gitignores = {}  # 目录相对路径 -> IgnoreRules 或 None
+
+    def scan(self):
+        """遍历项目目录，返回 FileManifest"""
+        manifest = FileManifest(self.project_path)
+        self._scan_directory(self.project_path, "", manifest)
+        if manifest.skipped:
+            self.logger.info(f"发现阶段跳过 {len(manifest.skipped)} 个文件")
+        return manifest
+
+    def is_excluded(self, file_path):
+        """判断项目中的一个路径是否被排除（自身或任意一级上层目录被排除），供 watch 模式过滤文件事件"""
+        relative_path = os.path.relpath(os.path.abspath(file_path), os.path.abspath(self.project_path))
+        if relative_path.startswith(os.pardir):
+            return True
+        parts = relative_path.replace(os.sep, "/").split("/")
+        for depth in range(1, len(parts) + 1):
+            parent = "/".join(parts[:depth - 1])
+            is_dir = depth < len(parts)
+            if is_dir and self._is_environment(os.path.join(self.project_path, *parts[:depth])):
+                return True
+            if self._excluded("/".join(parts[:depth]), is_dir, self._chain_for(parent)):
+                return True
+        return False
+
+    def is_oversized(self, file_path):
+        """文件是否超过大小上限（不存在时返回 False）"""
+        try:
+            return self.max_file_size is not None and os.path.getsize(file_path) > self.max_file_size
+        except OSError:
+            return False
+
+    @staticmethod
+    def _is_environment(directory):
+        return any(os.path.exists(os.path.join(directory, marker)) for marker in ENVIRONMENT_MARKERS)
+
+    def _rules_for(self, relative_dir):
+        """目录中的 .gitignore（根目录还包括 .git/info/exclude），没有时返回 None"""
+        if not self.use_gitignore:
+            return None
+        if relative_dir not in self._gitignores:
+            directory = os.path.join(self.project_path, *relative_dir.split("/")) if relative_dir else self.project_path
+            rules = IgnoreRules.from_file(os.path.join(directory, ".gitignore"))
+            if relative_dir == "":
+                info = IgnoreRules.from_file(os.path.join(directory, ".git", "info", "exclude"))
+                if info is not None:
+                    # .git/info/exclude 的优先级低于根目录的 .gitignore
+                    if rules is not None:
+                        info.rules.extend(rules.rules)
+                    rules = info
+            self._gitignores[relative_dir] = rules
+        return self._gitignores[relative_dir]
+
+    def _chain_for(self, relative_dir):
+        """从根目录到 relative_dir 各级目录的 [(目录相对路径, IgnoreRules)]"""
+        chain = []
+        parts = relative_dir.split("/") if relative_dir else []
+        for depth in range(len(parts) + 1):
+            base = "/".join(parts[:depth])
+            rules = self._rules_for(base)
+            if rules is not None:
+                chain.append((base, rules))
+        return chain
+
+    def _excluded(self, relative_path, is_dir, chain):
+        if self.excludes.match(relative_path, is_dir):
+            return True
+        excluded = None
+        # 越深的 .gitignore 优先级越高
+        for base, rules in chain:
+            result = rules.match(relative_path[len(base) + 1:] if base else relative_path, is_dir)
+            if result is not None:
+                excluded = result
+        return bool(excluded)
+
+    def _scan_directory(self, directory, relative_dir, manifest):
+        chain = self._chain_for(relative_dir)
+        try:
+            with os.scandir(directory) as iterator:
+                items = list(iterator)
+        except OSError as e:
+            self.logger.warning(f"无法读取目录 {directory}: {str(e)}")
+            return
+        for item in items:
+            relative_path = f"{relative_dir}/{item.name}" if relative_dir else item.name
+            try:
+                is_dir = item.is_dir(follow_symlinks=False)
+            except OSError:
+                continue
+            if is_dir:
+                if self._excluded(relative_path, True, chain):
+                    continue
+                if self._is_environment(item.path):
+                    continue
+                manifest.entries.append(ManifestEntry('directory', item.path, relative_path))
+                self._scan_directory(item.path, relative_path, manifest)
+            elif item.name.endswith(".py"):
+                if self._excluded(relative_path, False, chain):
+                    continue
+                try:
+                    stat = item.stat()
+                except OSError as e:
+                    manifest.skipped.append((relative_path, f"stat failed: {e}"))
+                    continue
+                if self.max_file_size is not None and stat.st_size > self.max_file_size:
+                    manifest.skipped.append((relative_path, f"too large: {stat.st_size} bytes"))
+                    continue
+                manifest.entries.append(ManifestEntry('file', item.path, relative_path, stat.st_size, stat.st_mtime_ns))
+
+
+def discover(project_path, excludes=None, max_file_size=MAX_FILE_SIZE, use_gitignore=True):
+    """用默认参数执行一次发现阶段，返回 FileManifest"""
+    return FileDiscovery(project_path, excludes, max_file_size, use_gitignore).scan()
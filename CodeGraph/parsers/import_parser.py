@@ -2,6 +2,9 @@ import os
 import tree_sitter_python as tspython
 from tree_sitter import Language, Parser
 import logging
+from .source_buffer import SourceBuffer
+from .discovery import discover
+from .queries import IMPORT_QUERY, IMPORT_KINDS, ordered_matches, select_matches, innermost_enclosing
 
 class ImportParser:
     def __init__(self, project_path, repo_name):
@@ -9,6 +12,10 @@ class ImportParser:
         self.repo_name = repo_name
         self.parser = self._init_parser()
         self.imports = []  # 存储import关系 (importer, imported_module)
+        # import 语句在所在作用域中绑定的名称，供 StaticResolver 静态解析调用：
+        # (模块全名, 作用域全名, 绑定的名称, 模块路径, 导入的名称, 相对导入层级)
+        # 导入的名称为 None 表示绑定的是模块本身（import a.b / import a.b as x），为 '*' 表示星号导入
+        self.bindings = []
 
         # 配置日志记录
         self.logger = logging.getLogger('import_parser')
@@ -37,25 +44,24 @@ class ImportParser:
         """
         获取项目中所有的 Python 文件
         """
-        py_files = []
-        for root, _, files in os.walk(self.project_path):
-            for file in files:
-                if file.endswith(".py"):
-                    py_files.append(os.path.join(root, file))
-        return py_files
+        return [entry.path for entry in discover(self.project_path).files]
 
     def _parse_file(self, file_path):
-        with open(file_path, "r") as file:
-            file_content = file.read()
-
-        tree = self.parser.parse(bytes(file_content, "utf8"))
+        source = SourceBuffer.from_file(file_path)
+        tree = self.parser.parse(source.data)
+        self.parse_tree(file_path, tree, source)
 
+    def parse_tree(self, file_path, tree, source, matches=None):
+        """
+        基于已经解析好的语法树提取导入关系（供 RepoParser 复用同一棵树和源码缓冲区）
+        :param matches: RepoParser 用合并查询得到的 ordered_matches 结果，为 None 时单独执行查询
+        """
         # 构建模块名称
         module_name = self._get_module_name(file_path)
         self.logger.debug(f"Module name for file {file_path}: {module_name}")
 
         # 递归分析import关系
-        self._extract_imports(tree.root_node, file_path, module_name)
+        self._extract_imports(tree.root_node, source, module_name, matches)
 
     def _get_module_name(self, file_path):
         """
@@ -65,89 +71,110 @@ class ImportParser:
         module_name = os.path.splitext(relative_path)[0].replace(os.path.sep, '.')
         return f"{self.repo_name}.{module_name}"
 
-    def _extract_imports(self, node, file_path, current_fullname):
+    def _extract_imports(self, node, source, current_fullname, matches=None):
         """
-        递归解析文件中的 import 语句
+        使用预编译的 IMPORT_QUERY 找出文件中的 import 语句，按源码顺序记录导入关系。
+        类、函数定义只用来确定 import 语句所在的作用域（函数内的 import 只绑定局部名称）。
         """
-        for child in node.children:
-            if child.type == 'import_statement':
-                self.logger.debug(f"Found import statement in {current_fullname}")
-                # 处理import语句
-                self._handle_import_statement(child, current_fullname, file_path)
-
-            elif child.type == 'import_from_statement':
+        if matches is None:
+            matches = ordered_matches(IMPORT_QUERY, node)
+        module_fullname = current_fullname
+        scopes = []
+        for kind, child, captures in select_matches(matches, IMPORT_KINDS):
+            scope = innermost_enclosing(scopes, child) or module_fullname
+            if kind == 'class' or kind == 'function':
+                name_nodes = captures.get('name')
+                name = self._get_node_text(name_nodes[0], source) if name_nodes else ""
+                scopes.append((child.end_byte, f"{scope}.{name}"))
+            elif kind == 'import':
+                # import 语句中被导入的模块名
+                import_name = self._get_node_text(child, source)
+                self.imports.append((current_fullname, import_name))  # 确保是 (importer, imported_module)
+                self.logger.debug(f"Recorded import: {current_fullname} imports {import_name}")
+                # import a.b.c 绑定的是顶层包 a
+                top_name = import_name.split('.')[0]
+                self.bindings.append((module_fullname, scope, top_name, top_name, None, 0))
+            elif kind == 'import_alias':
+                # import a.b as x 绑定的是模块 a.b 本身
+                name_node = child.child_by_field_name('name')
+                alias_node = child.child_by_field_name('alias')
+                if name_node and alias_node:
+                    import_name = self._get_node_text(name_node, source)
+                    self.imports.append((current_fullname, import_name))
+                    self.bindings.append((module_fullname, scope, self._get_node_text(alias_node, source),
+                                          import_name, None, 0))
+            else:
                 self.logger.debug(f"Found from-import statement in {current_fullname}")
                 # 处理 from ... import ... 语句
-                self._handle_from_import_statement(child, current_fullname, file_path)
+                self._handle_from_import_statement(child, current_fullname, source)
+                self._record_from_import_bindings(child, module_fullname, scope, source)
 
+    def _record_from_import_bindings(self, node, module_fullname, scope, source):
+        """
+        记录 from ... import ... 语句绑定的名称，包括别名、相对导入和星号导入
+        """
+        module = self._from_import_module(node, source)
+        if module is None:
+            return
+        module_path, level = module
+
+        for child in node.named_children:
+            if child.type == 'wildcard_import':
+                self.bindings.append((module_fullname, scope, '*', module_path, '*', level))
+        for name_node in node.children_by_field_name('name'):
+            if name_node.type == 'aliased_import':
+                imported_node = name_node.child_by_field_name('name')
+                alias_node = name_node.child_by_field_name('alias')
+                if imported_node is None or alias_node is None:
+                    continue
+                imported_name = self._get_node_text(imported_node, source)
+                local_name = self._get_node_text(alias_node, source)
             else:
-                # 递归处理其他子节点
-                self._extract_imports(child, file_path, current_fullname)
-
-    def _handle_import_statement(self, node, current_fullname, file_path):
+                imported_name = local_name = self._get_node_text(name_node, source)
+            self.bindings.append((module_fullname, scope, local_name, module_path, imported_name, level))
+
+    def _from_import_module(self, node, source):
+        """from ... import ... 语句中的 (模块路径, 相对导入层级)，没有模块部分时返回 None"""
+        module_node = node.child_by_field_name('module_name')
+        if module_node is None:
+            return None
+        level = 0
+        module_path = self._get_node_text(module_node, source)
+        if module_node.type == 'relative_import':
+            # 相对导入：前缀中点的个数为层级，其后是可选的模块路径
+            level = len(module_path) - len(module_path.lstrip('.'))
+            module_path = module_path[level:].strip()
+        return module_path, level
+
+    def _handle_from_import_statement(self, node, current_fullname, source):
         """
-        处理普通的 import 语句
+        处理 from ... import ... 语句：记录被导入的模块，以及从中导入的每个名称（模块路径.名称）。
+        相对导入保留开头的点（如 ..models、.models.Foo），由 CodeGraph 的 ModuleIndex 根据导入者所在的包解析
         """
-        for name_node in node.named_children:
-            if name_node.type == 'dotted_name' or name_node.type == 'identifier':
-                import_name = self._get_node_text(name_node, file_path)
-                self.imports.append((current_fullname, import_name))  # 确保是 (importer, imported_module)
-                self.logger.debug(f"Recorded import: {current_fullname} imports {import_name}")
-            # 处理别名（as导入）
-            alias_node = node.child_by_field_name('alias')
-            if alias_node:
-                alias_name = self._get_node_text(alias_node, file_path)
-                self.imports.append((current_fullname, alias_name))  # 确保是 (importer, alias_name)
-                self.logger.debug(f"Recorded alias import: {current_fullname} imports {alias_name}")
-
-    def _handle_from_import_statement(self, node, current_fullname, file_path):
-        """
-        处理 from ... import ... 语句
-        """
-        module_name_node = node.child_by_field_name('module')
-        module_name = self._get_node_text(module_name_node, file_path) if module_name_node else None
-
-        if module_name:
-            # 记录从模块导入的关系
-            self.imports.append((current_fullname, module_name))  # 确保是 (importer, module_name)
-            self.logger.debug(f"Recorded from-import: {current_fullname} imports from {module_name}")
-            
-            # 处理具体导入的元素
-            for import_child in node.named_children:
-                if import_child.type == 'dotted_name' or import_child.type == 'identifier':
-                    import_element = self._get_node_text(import_child, file_path)
-                    full_import_path = f"{module_name}.{import_element}"
-                    self.imports.append((current_fullname, full_import_path))  # 确保是 (importer, full_import_path)
-                    self.logger.debug(f"Recorded from-import element: {current_fullname} imports {full_import_path}")
-                # 处理别名导入
-                alias_node = node.child_by_field_name('alias')
-                if alias_node:
-                    alias_name = self._get_node_text(alias_node, file_path)
-                    full_alias_path = f"{module_name}.{alias_name}"
-                    self.imports.append((current_fullname, full_alias_path))  # 确保是 (importer, full_alias_path)
-                    self.logger.debug(f"Recorded alias from-import: {current_fullname} imports {full_alias_path}")
-
-    def _get_node_text(self, node, file_path):
-        """
-        提取 AST 节点对应的源代码文本，使用行列号而非字节
-        """
-        if node is None:
-            return ""
-
-        start_line, start_column = node.start_point
-        end_line, end_column = node.end_point
-
-        with open(file_path, "r") as file:
-            file_lines = file.readlines()
-
-        if start_line == end_line:
-            # 同一行的情况，直接从 start_column 到 end_column
-            return file_lines[start_line][start_column:end_column].strip()
-        else:
-            # 跨多行的情况，处理起始行、中间行和结束行
-            extracted_text = []
-            extracted_text.append(file_lines[start_line][start_column:].strip())
-            for line in range(start_line + 1, end_line):
-                extracted_text.append(file_lines[line].strip())
-            extracted_text.append(file_lines[end_line][:end_column].strip())
-            return " ".join(extracted_text)
+        module = self._from_import_module(node, source)
+        if module is None:
+            return
+        module_path, level = module
+        module_name = '.' * level + module_path
+
+        # 记录从模块导入的关系
+        self.imports.append((current_fullname, module_name))  # 确保是 (importer, module_name)
+        self.logger.debug(f"Recorded from-import: {current_fullname} imports from {module_name}")
+
+        # 处理具体导入的元素，别名导入记录被导入的原名
+        separator = '.' if module_path else ''
+        for name_node in node.children_by_field_name('name'):
+            if name_node.type == 'aliased_import':
+                name_node = name_node.child_by_field_name('name')
+                if name_node is None:
+                    continue
+            full_import_path = f"{module_name}{separator}{self._get_node_text(name_node, source)}"
+            self.imports.append((current_fullname, full_import_path))  # 确保是 (importer, full_import_path)
+            self.logger.debug(f"Recorded from-import element: {current_fullname} imports {full_import_path}")
+
+    def _get_node_text(self, node, source):
+        """
+        提取 AST 节点对应的源代码文本，直接按字节范围从源码缓冲区切片，
+        每行去掉首尾空白，跨多行时用空格拼接
+        """
+        return source.node_text_stripped(node)
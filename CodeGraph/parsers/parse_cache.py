@@ -0,0 +1,93 @@
+import os
+import pickle
+import hashlib
+import logging
+
+
+class ParseCache:
+    """
+    磁盘上的逐文件解析缓存，用于增量构建代码图。
+    每个源文件对应一个缓存条目，以 (相对路径, 内容哈希) 为键，条目中保存该文件的
+    节点、符号、import 关系、调用点、作用域信息，以及上一次构建时每个调用点的解析结果。
+    条目还记录发现阶段得到的文件 (大小, 修改时间)：与清单中的一致时不必计算内容哈希即可命中。
+    条目只包含内置类型，不依赖解析器类的导入路径。
+    """
+    VERSION = 5
+
+    def __init__(self, cache_dir, project_path):
+        self.cache_dir = cache_dir
+        self.project_path = os.path.abspath(project_path)
+        self.hits = 0
+        self.misses = 0
+        self.logger = logging.getLogger(__name__)
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _relative_path(self, file_path):
+        return os.path.relpath(os.path.abspath(file_path), self.project_path)
+
+    def _entry_path(self, file_path):
+        key = hashlib.sha1(self._relative_path(file_path).encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.pkl")
+
+    def lookup(self, file_path, source, stat=None):
+        """
+        返回与当前文件内容匹配的缓存条目，文件不在缓存中或内容已变化时返回 None
+        :param source: 文件的 SourceBuffer，(大小, 修改时间) 不一致时才计算其内容哈希
+        :param stat: 发现阶段清单中的 (size, mtime_ns)，None 表示只按内容哈希判断
+        """
+        entry = self._load(file_path)
+        if (entry is None or entry["version"] != self.VERSION
+                or entry["project_path"] != self.project_path
+                or not ((stat is not None and entry["stat"] == tuple(stat))
+                        or entry["content_hash"] == source.content_hash)):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+    def store(self, file_path, content_hash, result, resolved=None, stat=None):
+        """
+        写入一个文件的缓存条目
+        :param result: FileParseResult.to_dict() 的结果
+        :param resolved: 与 call_sites 对齐的 [(fingerprint, calls, 静态解析依赖的 (模块, 内容哈希))]，尚未解析时为 None
+        :param stat: 读取文件之前（发现阶段）得到的 (size, mtime_ns)
+        """
+        entry = {
+            "version": self.VERSION,
+            "project_path": self.project_path,
+            "path": self._relative_path(file_path),
+            "content_hash": content_hash,
+            "stat": tuple(stat) if stat is not None else None,
+            "result": result,
+            "resolved": resolved,
+        }
+        entry_path = self._entry_path(file_path)
+        tmp_path = f"{entry_path}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, entry_path)
+
+    def prune(self, file_paths):
+        """
+        删除不在 file_paths 中的条目（对应已从项目中删除的文件），返回删除的条目数
+        """
+        keep = {os.path.basename(self._entry_path(path)) for path in file_paths}
+        removed = 0
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".pkl") and name not in keep:
+                os.remove(os.path.join(self.cache_dir, name))
+                removed += 1
+        if removed:
+            self.logger.info(f"已从解析缓存中删除 {removed} 个过期条目")
+        return removed
+
+    def _load(self, file_path):
+        entry_path = self._entry_path(file_path)
+        if not os.path.exists(entry_path):
+            return None
+        try:
+            with open(entry_path, "rb") as f:
+                return pickle.load(f)
+        except Exception as e:
+            self.logger.warning(f"无法读取缓存条目 {entry_path}: {str(e)}")
+            return None
@@ -0,0 +1,88 @@
+import tree_sitter_python as tspython
+from tree_sitter import Language, Query, QueryCursor
+
+PY_LANGUAGE = Language(tspython.language())
+
+# 每种关系一组查询模式，匹配在 tree-sitter 的原生代码中完成，Python 只处理匹配结果。
+# 每个模式的外层捕获（@class、@function、@import 等）是该匹配的主节点，其余捕获是名称等组成部分。
+
+# 类和函数定义（包含关系），同时也是确定调用者完整路径的作用域
+DEFINITION_PATTERNS = """
+(class_definition name: (_)? @name superclasses: (argument_list)? @bases) @class
+(function_definition name: (_)? @name) @function
+"""
+
+# import 语句：普通 import 直接捕获每个被导入的模块名（带别名的单独捕获）；from-import 语句整体交给 ImportParser 处理
+IMPORT_PATTERNS = """
+(import_statement name: (dotted_name) @import)
+(import_statement name: (aliased_import) @import_alias)
+(import_from_statement) @import_from
+"""
+
+# 调用表达式及其被调用部分
+CALL_PATTERNS = """
+(call function: (_) @callee) @call
+"""
+
+# 作用域内的名称绑定（ScopeParser 使用）：参数、赋值目标、for/with/except 的目标、海象表达式，
+# 以及 global / nonlocal 声明
+BINDING_PATTERNS = """
+(parameters) @parameters
+(lambda_parameters) @parameters
+(assignment left: (_) @target)
+(augmented_assignment left: (_) @target)
+(for_statement left: (_) @target)
+(for_in_clause left: (_) @target)
+(as_pattern_target) @target
+(named_expression name: (identifier) @target)
+(global_statement) @declaration
+(nonlocal_statement) @declaration
+"""
+
+MATCH_KINDS = ('class', 'function', 'import', 'import_alias', 'import_from', 'call',
+               'parameters', 'target', 'declaration')
+DEFINITION_KINDS = frozenset({'class', 'function'})
+IMPORT_KINDS = frozenset({'class', 'function', 'import', 'import_alias', 'import_from'})
+CALL_KINDS = frozenset({'class', 'function', 'call'})
+BINDING_KINDS = frozenset({'class', 'function', 'parameters', 'target', 'declaration'})
+
+# 单独使用某个解析器时的查询
+DEFINITION_QUERY = Query(PY_LANGUAGE, DEFINITION_PATTERNS)
+IMPORT_QUERY = Query(PY_LANGUAGE, DEFINITION_PATTERNS + IMPORT_PATTERNS)
+CALL_QUERY = Query(PY_LANGUAGE, DEFINITION_PATTERNS + CALL_PATTERNS)
+BINDING_QUERY = Query(PY_LANGUAGE, DEFINITION_PATTERNS + BINDING_PATTERNS)
+
+# 所有关系合并成一条查询，一次遍历语法树即可得到所有提取器需要的匹配（RepoParser 使用）
+EXTRACTION_QUERY = Query(PY_LANGUAGE, DEFINITION_PATTERNS + IMPORT_PATTERNS + CALL_PATTERNS + BINDING_PATTERNS)
+
+
+def ordered_matches(query, node):
+    """
+    执行查询，按主节点的先序（起始字节升序，起点相同时外层节点优先）返回匹配结果，
+    与递归遍历语法树时遇到这些节点的顺序一致。
+    :return: [(主捕获名称, 主节点, 该匹配的全部捕获)]
+    """
+    results = []
+    for _, captures in QueryCursor(query).matches(node):
+        for kind in MATCH_KINDS:
+            if kind in captures:
+                main_node = captures[kind][0]
+                results.append((main_node.start_byte, -main_node.end_byte, kind, main_node, captures))
+                break
+    results.sort(key=lambda item: (item[0], item[1]))
+    return [(kind, main_node, captures) for _, _, kind, main_node, captures in results]
+
+
+def select_matches(matches, kinds):
+    """从 ordered_matches 的结果中按主捕获名称筛选，保持原有顺序"""
+    return [match for match in matches if match[0] in kinds]
+
+
+def innermost_enclosing(stack, node):
+    """
+    stack 中保存按先序遇到、仍可能包含后续节点的 (end_byte, value)。
+    弹出已经结束的条目，返回包含 node 的最内层条目的 value；没有时返回 None。
+    """
+    while stack and stack[-1][0] <= node.start_byte:
+        stack.pop()
+    return stack[-1][1] if stack else None
@@ -0,0 +1,473 @@
+import os
+import hashlib
+import logging
+from concurrent.futures import ProcessPoolExecutor
+import tree_sitter_python as tspython
+from tree_sitter import Language, Parser
+from .contains_parser import ContainsParser, Node
+from .import_parser import ImportParser
+from .scope_parser import ScopeParser
+from .static_resolver import StaticResolver
+from .call_parser import CallParser, CallSite
+from .source_buffer import SourceBuffer, SourceStore, SourceSpan
+from .parse_cache import ParseCache
+from .discovery import FileDiscovery, MAX_FILE_SIZE
+from .definition_cache import DefinitionCache
+from .queries import EXTRACTION_QUERY, ordered_matches
+
+
+class FileParseResult:
+    """
+    单个文件的解析结果，结构紧凑、可 pickle，用于在进程之间传递和写入解析缓存。
+    nodes 按先序排列，每一项为 (parent_index, name, node_type, (start_byte, end_byte), signature)，
+    第 0 项是模块节点（parent_index 为 -1），字节范围指向文件内容 source_bytes。
+    source_bytes 不写入解析缓存：命中缓存时文件已经为计算内容哈希读取过一次。
+    """
+    def __init__(self, file_path, content_hash, nodes, symbols, imports, call_sites, scopes, source_bytes=None):
+        self.file_path = file_path
+        self.content_hash = content_hash
+        self.source_bytes = source_bytes
+        self.nodes = nodes
+        self.symbols = symbols  # [(name, fullname)]，按注册顺序
+        self.imports = imports  # [(importer, imported_module)]
+        self.call_sites = call_sites  # 尚未解析的 CallSite
+        # 静态解析用的作用域信息 (import 绑定, 其他名称绑定, 基类)，格式见 ImportParser.bindings 和 ScopeParser
+        self.scopes = scopes
+
+    def to_dict(self):
+        return {
+            "nodes": self.nodes,
+            "symbols": self.symbols,
+            "imports": self.imports,
+            "call_sites": [call_site.to_tuple() for call_site in self.call_sites],
+            "scopes": self.scopes,
+        }
+
+    @classmethod
+    def from_dict(cls, file_path, content_hash, data, source_bytes=None):
+        call_sites = [CallSite.from_tuple(item) for item in data["call_sites"]]
+        return cls(file_path, content_hash, data["nodes"], data["symbols"], data["imports"], call_sites,
+                   data["scopes"], source_bytes)
+
+
+class FileExtractor:
+    """
+    在一组独立的提取器上解析单个文件并产出 FileParseResult，
+    每个文件开始前重置提取器状态。并行解析的工作进程和增量构建共用。
+    """
+    def __init__(self, project_path, repo_name):
+        self.contains_parser = ContainsParser(project_path, repo_name)
+        self.import_parser = ImportParser(project_path, repo_name)
+        self.scope_parser = ScopeParser(project_path, repo_name)
+        self.call_parser = CallParser(project_path, repo_name, None, self.contains_parser.defined_symbols)
+        self.parser = self.contains_parser.parser
+
+    def extract(self, file_path, parent_fullname, source=None, tree=None):
+        """
+        :param source: 已读取的 SourceBuffer，为 None 时从磁盘读取
+        :param tree: 已解析（或增量重新解析）的语法树，为 None 时重新解析
+        """
+        if source is None:
+            source = SourceBuffer.from_file(file_path)
+        if tree is None:
+            tree = self.parser.parse(source.data)
+
+        self.contains_parser.nodes = {}
+        self.contains_parser.defined_symbols.clear()
+        self.contains_parser.sources = SourceStore()
+        self.import_parser.imports = []
+        self.import_parser.bindings = []
+        self.scope_parser.bindings = []
+        self.scope_parser.bases = []
+        self.call_parser.call_sites = []
+
+        # 合并查询只遍历一次语法树，各个提取器各取所需的匹配
+        matches = ordered_matches(EXTRACTION_QUERY, tree.root_node)
+        parent_stub = Node(parent_fullname, 'directory')
+        module_node = self.contains_parser.parse_tree(file_path, parent_stub, source, tree, matches)
+        self.import_parser.parse_tree(file_path, tree, source, matches)
+        self.scope_parser.parse_tree(file_path, tree, source, matches)
+        if not self.call_parser.should_skip(file_path):
+            self.call_parser.collect_calls(file_path, tree, source, matches)
+
+        nodes = []
+        symbols = []
+        stack = [(module_node, -1)]
+        while stack:
+            node, parent_index = stack.pop()
+            nodes.append((parent_index, node.name, node.node_type, (node.span.start_byte, node.span.end_byte),
+                          node.signature))
+            if node.node_type in ('class', 'function'):
+                symbols.append((node.name, node.fullname))
+            index = len(nodes) - 1
+            stack.extend((child, index) for child in reversed(node.children))
+
+        scopes = (self.import_parser.bindings, self.scope_parser.bindings, self.scope_parser.bases)
+        return FileParseResult(file_path, source.content_hash, nodes, symbols,
+                               self.import_parser.imports, self.call_parser.call_sites, scopes, source.data)
+
+
+class RepoParser:
+    """
+    统一的解析前端：发现阶段（FileDiscovery）只遍历一次项目目录，得到所有阶段共用的文件清单，
+    每个文件只读取、解析一次，
+    然后用一条合并的预编译查询匹配同一棵 tree-sitter 语法树，把结果依次交给 CONTAINS、IMPORTS、CALLS 三个提取器。
+    调用点在遍历时只做收集，等所有符号注册完毕后再通过 resolve_calls 统一解析。
+
+    workers > 1 时在进程池中并行解析文件，每个工作进程持有自己的 Parser，
+    结果按串行遍历的顺序合并，得到与串行模式一致的 root、nodes 和 defined_symbols。
+
+    指定 cache_dir 时启用增量构建：内容未变化的文件直接使用缓存的解析结果，
+    只有涉及的符号定义发生变化的调用点才会重新解析。
+
+    keep_trees=True 时在本进程内解析并保留每个文件的 SourceBuffer 和语法树（见 self.trees），
+    供 watch 模式做增量重新解析。
+
+    static_resolve=True 时解析调用前先用 StaticResolver 根据作用域表静态消歧，只有无法静态确定的调用点才请求 LSP。
+
+    excludes、max_file_size 传给 FileDiscovery：额外的排除规则（gitignore 语法，None 表示默认规则）和文件大小上限。
+    """
+    def __init__(self, project_path, repo_name, workers=1, cache_dir=None, keep_trees=False, static_resolve=True,
+                 excludes=None, max_file_size=MAX_FILE_SIZE):
+        self.project_path = project_path
+        self.repo_name = repo_name
+        self.workers = workers or 1
+        self.keep_trees = keep_trees
+        self.static_resolve = static_resolve
+        self.trees = {}  # file_path -> (SourceBuffer, Tree)，仅 keep_trees 时填充
+        self.parser = self._init_parser()
+        self.logger = logging.getLogger(__name__)
+        self.cache = ParseCache(cache_dir, project_path) if cache_dir else None
+        self.discovery = FileDiscovery(project_path, excludes, max_file_size)
+        self.manifest = None  # 发现阶段得到的 FileManifest，parse 时生成
+
+        self.contains_parser = ContainsParser(project_path, repo_name)
+        self.import_parser = ImportParser(project_path, repo_name)
+        self.scope_parser = ScopeParser(project_path, repo_name)
+        # code_graph 和 lsp_client 在解析调用关系时才需要，见 resolve_calls
+        self.call_parser = CallParser(project_path, repo_name, None, self.contains_parser.defined_symbols)
+        if cache_dir:
+            # LSP 定义查询结果也随解析缓存持久化，重复构建时未变化的调用点无需再次请求
+            self.call_parser.definition_cache = DefinitionCache(os.path.join(cache_dir, "definitions.cache"))
+
+        self.file_results = []  # 按遍历顺序保存的 FileParseResult（逐文件模式下）
+        self._cached_resolutions = {}  # file_path -> 上次构建的调用点解析结果
+        self._module_hashes = {}  # 模块全名 -> 文件内容哈希
+
+    def _init_parser(self):
+        PY_LANGUAGE = Language(tspython.language())
+        parser = Parser(PY_LANGUAGE)
+        return parser
+
+    @property
+    def root(self):
+        return self.contains_parser.root
+
+    @property
+    def nodes(self):
+        return self.contains_parser.nodes
+
+    @property
+    def defined_symbols(self):
+        return self.contains_parser.defined_symbols
+
+    @property
+    def imports(self):
+        return self.import_parser.imports
+
+    def parse(self):
+        """
+        遍历项目目录，构建 CONTAINS 树，提取 import 关系并收集调用点
+        """
+        self.manifest = self.discovery.scan()
+        if self.workers > 1 or self.cache is not None or self.keep_trees:
+            self._parse_by_file()
+        else:
+            directories = {"": self.root}  # 目录相对路径 -> 目录节点
+            for entry in self.manifest.entries:
+                parent_node = directories[entry.parent]
+                if entry.kind == 'directory':
+                    directories[entry.relative_path] = self.contains_parser._create_node(entry.name, 'directory',
+                                                                                         parent_node)
+                else:
+                    self._parse_file(entry.path, parent_node)
+
+    def local_modules(self):
+        """
+        项目中可以直接导入的顶层模块名：项目根目录（以及 src 布局的 src 目录）下的包和模块，
+        供 ModuleClassifier 识别本地导入
+        """
+        names = set()
+        for entry in self.manifest.entries:
+            parent = entry.parent
+            if parent in ("", "src"):
+                name = entry.name[:-3] if entry.kind == 'file' else entry.name
+                if name.isidentifier() and not (parent == "" and name == "src"):
+                    names.add(name)
+        return names
+
+    def resolve_calls(self, code_graph, lsp_client):
+        """
+        在所有符号注册完毕后解析收集到的调用点，返回 (caller, callee) 列表
+        """
+        self.call_parser.code_graph = code_graph
+        self.call_parser.lsp_client = lsp_client
+        if self.static_resolve:
+            self.call_parser.static_resolver = self.build_static_resolver()
+        if self.cache is None:
+            self.call_parser.resolve()
+        else:
+            self._resolve_calls_incrementally()
+            self.call_parser.definition_cache.save()
+        stats = self.call_parser.cache_stats()
+        self.logger.info("定义缓存: " + ", ".join(f"{name}={count}" for name, count in stats.items()))
+        stats = self.call_parser.lsp_stats()
+        self.logger.info("LSP 请求: " + ", ".join(f"{name}={value}" for name, value in stats.items()))
+        return self.call_parser.calls
+
+    def call_attributes(self, caller_fullname, callee_fullname):
+        """CALLS 边的附加属性，见 CallParser.call_attributes"""
+        return self.call_parser.call_attributes(caller_fullname, callee_fullname)
+
+    def build_static_resolver(self):
+        """由已解析的定义、import 绑定和名称绑定建立 StaticResolver"""
+        return StaticResolver(self.repo_name, self.nodes, self.defined_symbols, self.import_parser.bindings,
+                              self.scope_parser.bindings, self.scope_parser.bases)
+
+    def _read_source(self, file_path):
+        try:
+            return SourceBuffer.from_file(file_path)
+        except Exception as e:
+            self.logger.warning(f"无法读取文件 {file_path}: {str(e)}")
+            return None
+
+    def _parse_file(self, file_path, parent_node):
+        source = self._read_source(file_path)
+        if source is None:
+            return
+
+        # 每个文件只读取、解析一次，各个提取器共享同一个源码缓冲区、语法树和查询匹配结果
+        tree = self.parser.parse(source.data)
+        matches = ordered_matches(EXTRACTION_QUERY, tree.root_node)
+
+        self.contains_parser.parse_tree(file_path, parent_node, source, tree, matches)
+        self.import_parser.parse_tree(file_path, tree, source, matches)
+        self.scope_parser.parse_tree(file_path, tree, source, matches)
+        if not self.call_parser.should_skip(file_path):
+            self.call_parser.collect_calls(file_path, tree, source, matches)
+
+    # ---------------------------------------------------------------
+    # 逐文件解析：并行解析与增量构建
+    # ---------------------------------------------------------------
+
+    def _parse_by_file(self):
+        """
+        主进程按清单的遍历顺序逐个产出文件的 FileParseResult
+        （命中缓存、在进程池中解析或在本进程中解析），
+        然后按遍历顺序重放：创建目录节点、合并每个文件的解析结果。
+        """
+        fullnames = {"": self.root.fullname}  # 目录相对路径 -> 目录全名
+        tasks = []
+        for entry in self.manifest.entries:
+            parent_fullname = fullnames[entry.parent]
+            if entry.kind == 'directory':
+                fullnames[entry.relative_path] = f"{parent_fullname}.{entry.name}"
+            else:
+                tasks.append((entry.path, parent_fullname))
+
+        results = iter(self._extract_files(tasks))
+        directories = {"": self.root}  # 目录相对路径 -> 目录节点
+        for entry in self.manifest.entries:
+            parent_node = directories[entry.parent]
+            if entry.kind == 'directory':
+                directories[entry.relative_path] = self.contains_parser._create_node(entry.name, 'directory',
+                                                                                     parent_node)
+            else:
+                result = next(results)
+                if result is not None:
+                    self._merge_file_result(result, parent_node)
+                    self.file_results.append(result)
+
+        if self.cache is not None:
+            self.cache.prune([path for path, _ in tasks])
+            self.logger.info(f"解析缓存: 命中 {self.cache.hits} 个文件, 重新解析 {self.cache.misses} 个文件")
+
+    def _file_stat(self, file_path):
+        """清单中文件的 (size, mtime_ns)，不在清单中时返回 None"""
+        entry = self.manifest.get(file_path) if self.manifest is not None else None
+        return entry.stat if entry is not None else None
+
+    def _extract_files(self, tasks):
+        """
+        为每个 (file_path, parent_fullname) 产出 FileParseResult，顺序与 tasks 一致，
+        读取失败的文件对应 None
+        """
+        results = [None] * len(tasks)
+        sources = {}
+        pending = []
+        for index, (file_path, parent_fullname) in enumerate(tasks):
+            if self.cache is None or self.keep_trees:
+                pending.append(index)
+                continue
+            source = self._read_source(file_path)
+            if source is None:
+                continue
+            entry = self.cache.lookup(file_path, source, self._file_stat(file_path))
+            if entry is not None:
+                results[index] = FileParseResult.from_dict(file_path, entry["content_hash"], entry["result"],
+                                                           source.data)
+                if entry["resolved"] is not None:
+                    self._cached_resolutions[file_path] = entry["resolved"]
+            else:
+                sources[index] = source
+                pending.append(index)
+
+        if self.workers > 1 and len(pending) > 1 and not self.keep_trees:
+            pending_tasks = [tasks[index] for index in pending]
+            chunksize = max(1, len(pending_tasks) // (self.workers * 4))
+            with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                     initargs=(self.project_path, self.repo_name)) as executor:
+                for index, result in zip(pending, executor.map(_extract_in_worker, pending_tasks, chunksize=chunksize)):
+                    results[index] = result
+        else:
+            extractor = FileExtractor(self.project_path, self.repo_name)
+            for index in pending:
+                file_path, parent_fullname = tasks[index]
+                source = sources.pop(index, None) or self._read_source(file_path)
+                if source is None:
+                    continue
+                try:
+                    tree = None
+                    if self.keep_trees:
+                        tree = extractor.parser.parse(source.data)
+                        self.trees[file_path] = (source, tree)
+                    results[index] = extractor.extract(file_path, parent_fullname, source, tree)
+                except Exception as e:
+                    self.logger.warning(f"无法解析文件 {file_path}: {str(e)}")
+
+        if self.cache is not None:
+            for index in pending:
+                result = results[index]
+                if result is not None:
+                    self.cache.store(result.file_path, result.content_hash, result.to_dict(),
+                                     stat=self._file_stat(result.file_path))
+        return results
+
+    def _merge_file_result(self, result, parent_node):
+        sources = self.contains_parser.sources
+        file_id = sources.add(result.file_path, result.source_bytes)
+        created = []
+        for parent_index, name, node_type, (start_byte, end_byte), signature in result.nodes:
+            parent = created[parent_index] if parent_index >= 0 else parent_node
+            node = Node(name, node_type, None, signature, parent.fullname,
+                        SourceSpan(sources, file_id, start_byte, end_byte))
+            parent.add_child(node)
+            self.nodes[node.fullname] = node
+            created.append(node)
+        self._module_hashes[created[0].fullname] = result.content_hash
+
+        for name, fullname in result.symbols:
+            self.contains_parser._register_symbol(name, fullname)
+        self.import_parser.imports.extend(result.imports)
+        import_bindings, scope_bindings, bases = result.scopes
+        self.import_parser.bindings.extend(import_bindings)
+        self.scope_parser.bindings.extend(scope_bindings)
+        self.scope_parser.bases.extend(bases)
+        self.call_parser.call_sites.extend(result.call_sites)
+
+    # ---------------------------------------------------------------
+    # 增量解析调用关系
+    # ---------------------------------------------------------------
+
+    def _resolve_calls_incrementally(self):
+        """
+        对内容未变化的文件，若调用点涉及的符号定义（及定义所在文件的内容）都没有变化，
+        并且静态解析时查阅过的模块内容也没有变化，直接复用上次的解析结果，否则重新解析该调用点
+        """
+        reused = 0
+        plans = []  # (result, cached)，cached 为 None 表示该文件需要整体重新写入缓存
+        stale = []  # 需要重新解析的 (文件下标, 调用点下标, 调用点)
+        for file_index, result in enumerate(self.file_results):
+            cached = self._cached_resolutions.get(result.file_path)
+            if cached is not None and len(cached) != len(result.call_sites):
+                cached = None
+            fingerprints = [self._call_fingerprint(call_site) for call_site in result.call_sites]
+            for index, call_site in enumerate(result.call_sites):
+                if (cached is None or cached[index][0] != fingerprints[index]
+                        or any(self._module_hashes.get(module) != content_hash
+                               for module, content_hash in cached[index][2])):
+                    stale.append((file_index, index, call_site))
+            plans.append((fingerprints, cached))
+
+        # 需要重新解析的调用点一起交给 CallParser，LSP 请求可以并发发送
+        fresh = {}
+        dependencies = []
+        resolved_calls = self.call_parser.resolve_call_sites([call_site for _, _, call_site in stale], dependencies)
+        for (file_index, index, _), calls, modules in zip(stale, resolved_calls, dependencies):
+            module_hashes = tuple((module, self._module_hashes.get(module)) for module in sorted(modules))
+            fresh[(file_index, index)] = (calls, module_hashes)
+
+        for file_index, result in enumerate(self.file_results):
+            fingerprints, cached = plans[file_index]
+            resolved = []
+            changed = cached is None
+            for index, fingerprint in enumerate(fingerprints):
+                if (file_index, index) in fresh:
+                    calls, module_hashes = fresh[(file_index, index)]
+                    changed = True
+                    if any(edge in self.call_parser.fallback_calls for edge in calls):
+                        # 静态推测的结果不复用，下次构建时重新请求 LSP
+                        fingerprint = None
+                else:
+                    _, calls, module_hashes = cached[index]
+                    reused += 1
+                self.call_parser.calls.extend(calls)
+                resolved.append((fingerprint, calls, module_hashes))
+
+            if changed:
+                self.cache.store(result.file_path, result.content_hash, result.to_dict(), resolved,
+                                 self._file_stat(result.file_path))
+
+        self.call_parser.call_sites = []
+        total = sum(len(result.call_sites) for result in self.file_results)
+        self.logger.info(f"调用解析缓存: 复用 {reused} / {total} 个调用点")
+
+    def _call_fingerprint(self, call_site):
+        """
+        调用点解析结果依赖的全部输入：查找的名称及其候选定义；
+        候选不唯一（需要 LSP）时还包括候选定义所在文件的内容哈希
+        """
+        parts = []
+        for name in self.call_parser.lookup_names(call_site):
+            candidates = self.defined_symbols.get(name, [])
+            parts.append((name, tuple(candidates)))
+            if len(candidates) > 1:
+                parts.append(tuple(self._owner_hash(candidate) for candidate in candidates))
+        return hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=16).hexdigest()
+
+    def _owner_hash(self, fullname):
+        """定义所在模块文件的内容哈希"""
+        parts = fullname.split('.')
+        for i in range(len(parts), 0, -1):
+            content_hash = self._module_hashes.get('.'.join(parts[:i]))
+            if content_hash is not None:
+                return content_hash
+        return None
+
+
+# 工作进程内的提取器，由 _init_worker 在进程启动时创建一次并复用
+_worker_extractor = None
+
+
+def _init_worker(project_path, repo_name):
+    global _worker_extractor
+    _worker_extractor = FileExtractor(project_path, repo_name)
+
+
+def _extract_in_worker(task):
+    file_path, parent_fullname = task
+    try:
+        return _worker_extractor.extract(file_path, parent_fullname)
+    except Exception as e:
+        logging.getLogger(__name__).warning(f"无法解析文件 {file_path}: {str(e)}")
+        return None
@@ -0,0 +1,135 @@
+import os
+import tree_sitter_python as tspython
+from tree_sitter import Language, Parser
+import logging
+from .source_buffer import SourceBuffer
+from .queries import BINDING_QUERY, BINDING_KINDS, ordered_matches, select_matches, innermost_enclosing
+
+# 赋值目标中会继续向下查找被绑定名称的节点类型（元组解包、星号目标等）
+UNPACKING_TYPES = frozenset({
+    'pattern_list', 'tuple_pattern', 'list_pattern', 'list_splat_pattern',
+    'parenthesized_expression', 'expression_list', 'tuple', 'list',
+})
+
+# 参数列表中各类参数节点：名称在 name 字段中，或是第一个 identifier 子节点
+PARAMETER_TYPES = frozenset({
+    'default_parameter', 'typed_parameter', 'typed_default_parameter',
+    'list_splat_pattern', 'dictionary_splat_pattern',
+})
+
+
+class ScopeParser:
+    """
+    提取每个作用域（模块、类、函数）内除 def/class/import 之外的名称绑定，以及类的基类表达式，
+    与 ContainsParser 的定义、ImportParser 的 import 绑定一起构成 StaticResolver 的作用域表。
+    """
+    def __init__(self, project_path, repo_name):
+        self.project_path = project_path
+        self.repo_name = repo_name
+        self.parser = self._init_parser()
+        # (作用域全名, 名称, 绑定类型)，绑定类型为：
+        #   'local'     参数、赋值、for/with/except 目标等普通绑定
+        #   'global' / 'nonlocal'  声明
+        #   'attribute' 方法中 self.X = ... 给实例设置的属性（作用域为所在的类）
+        self.bindings = []
+        self.bases = []  # (类全名, [基类表达式])，按源码顺序
+
+        self.logger = logging.getLogger('scope_parser')
+
+    def _init_parser(self):
+        PY_LANGUAGE = Language(tspython.language())
+        parser = Parser(PY_LANGUAGE)
+        return parser
+
+    def _parse_file(self, file_path):
+        source = SourceBuffer.from_file(file_path)
+        tree = self.parser.parse(source.data)
+        self.parse_tree(file_path, tree, source)
+
+    def parse_tree(self, file_path, tree, source, matches=None):
+        """
+        基于已经解析好的语法树提取名称绑定（供 RepoParser 复用同一棵树和源码缓冲区）
+        :param matches: RepoParser 用合并查询得到的 ordered_matches 结果，为 None 时单独执行查询
+        """
+        module_name = self._get_module_name(file_path)
+        self._extract_bindings(tree.root_node, source, module_name, matches)
+
+    def _get_module_name(self, file_path):
+        """根据文件路径生成模块全名"""
+        relative_path = os.path.relpath(file_path, self.project_path)
+        module_name = os.path.splitext(relative_path)[0].replace(os.path.sep, '.')
+        return f"{self.repo_name}.{module_name}"
+
+    def _extract_bindings(self, node, source, module_fullname, matches=None):
+        """
+        使用预编译的 BINDING_QUERY 找出绑定名称的语法结构，所在作用域由包含它的最内层类、函数定义确定。
+        栈中同时记录作用域的类型，用来识别方法中的 self.X 赋值。
+        """
+        if matches is None:
+            matches = ordered_matches(BINDING_QUERY, node)
+        scopes = []  # (end_byte, (作用域全名, 类型, 外层作用域全名, 外层类型))
+        for kind, child, captures in select_matches(matches, BINDING_KINDS):
+            scope = innermost_enclosing(scopes, child) or (module_fullname, 'module', None, None)
+            scope_fullname = scope[0]
+            if kind == 'class' or kind == 'function':
+                name_nodes = captures.get('name')
+                name = self._get_node_text(name_nodes[0], source) if name_nodes else ""
+                fullname = f"{scope_fullname}.{name}"
+                if kind == 'class':
+                    bases_nodes = captures.get('bases')
+                    self.bases.append((fullname, self._get_bases(bases_nodes[0], source) if bases_nodes else []))
+                scopes.append((child.end_byte, (fullname, kind, scope_fullname, scope[1])))
+            elif kind == 'parameters':
+                for name in self._parameter_names(child, source):
+                    self.bindings.append((scope_fullname, name, 'local'))
+            elif kind == 'declaration':
+                declaration = 'global' if child.type == 'global_statement' else 'nonlocal'
+                for name_node in child.named_children:
+                    if name_node.type == 'identifier':
+                        self.bindings.append((scope_fullname, self._get_node_text(name_node, source), declaration))
+            else:
+                # 方法中的 self.X = ...：X 成为所在类实例的属性
+                owner_class = scope[2] if scope[1] == 'function' and scope[3] == 'class' else None
+                self._record_target(child, source, scope_fullname, owner_class)
+
+    def _record_target(self, node, source, scope_fullname, owner_class):
+        stack = [node]
+        while stack:
+            target = stack.pop()
+            if target.type == 'identifier':
+                self.bindings.append((scope_fullname, self._get_node_text(target, source), 'local'))
+            elif target.type == 'as_pattern_target':
+                stack.extend(target.named_children)
+            elif target.type in UNPACKING_TYPES:
+                stack.extend(reversed(target.named_children))
+            elif target.type == 'attribute' and owner_class is not None:
+                object_node = target.child_by_field_name('object')
+                attribute_node = target.child_by_field_name('attribute')
+                if object_node is not None and attribute_node is not None and object_node.type == 'identifier' \
+                        and self._get_node_text(object_node, source) in ('self', 'cls'):
+                    self.bindings.append((owner_class, self._get_node_text(attribute_node, source), 'attribute'))
+
+    def _parameter_names(self, node, source):
+        names = []
+        for parameter in node.named_children:
+            if parameter.type == 'identifier':
+                names.append(self._get_node_text(parameter, source))
+            elif parameter.type in PARAMETER_TYPES:
+                name_node = parameter.child_by_field_name('name')
+                if name_node is None:
+                    name_node = next((c for c in parameter.named_children if c.type == 'identifier'), None)
+                if name_node is not None:
+                    names.append(self._get_node_text(name_node, source))
+        return names
+
+    def _get_bases(self, node, source):
+        """类定义括号中的基类表达式，跳过 metaclass=... 等关键字参数"""
+        return [self._get_node_text(child, source) for child in node.named_children
+                if child.type not in ('keyword_argument', 'comment')]
+
+    def _get_node_text(self, node, source):
+        """
+        提取 AST 节点对应的源代码文本，直接按字节范围从源码缓冲区切片，
+        每行去掉首尾空白，跨多行时用空格拼接
+        """
+        return source.node_text_stripped(node)
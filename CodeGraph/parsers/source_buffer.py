@@ -0,0 +1,169 @@
+import bisect
+import hashlib
+import mmap
+
+BINARY_CHECK_BYTES = 8000  # 检查前多少个字节中是否有 NUL 来识别二进制文件
+
+
+class SourceBuffer:
+    """
+    单个源文件的缓冲区：文件只读取一次，保存原始字节和行起始偏移表。
+    所有解析器通过 tree-sitter 节点的 start_byte / end_byte 直接切片取文本，
+    不再为每个 AST 节点重新打开文件。
+    """
+    def __init__(self, data, file_path=None):
+        self.data = data
+        self.file_path = file_path
+        self._text = None
+        self._line_offsets = None
+
+    @classmethod
+    def from_file(cls, file_path):
+        """
+        读取文件并统一换行符（与文本模式 open 的行为一致），保证字节偏移与语法树一致
+        """
+        with open(file_path, "rb") as file:
+            data = file.read()
+        # 开头含有 NUL 字节的视为二进制文件（与 git 的判断方式相同），调用方按读取失败跳过
+        if b"\0" in data[:BINARY_CHECK_BYTES]:
+            raise ValueError("binary file")
+        if b"\r" in data:
+            data = data.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+        # 提前校验编码，与文本模式读取时的报错行为一致
+        text = data.decode("utf-8")
+        buffer = cls(data, file_path)
+        buffer._text = text
+        return buffer
+
+    @classmethod
+    def from_text(cls, text, file_path=None):
+        buffer = cls(text.encode("utf-8"), file_path)
+        buffer._text = text
+        return buffer
+
+    @property
+    def text(self):
+        """整个文件的文本，首次访问时解码"""
+        if self._text is None:
+            self._text = self.data.decode("utf-8", errors="replace")
+        return self._text
+
+    @property
+    def content_hash(self):
+        """文件内容的哈希值，用作增量构建缓存的键"""
+        return hashlib.blake2b(self.data, digest_size=16).hexdigest()
+
+    @property
+    def line_offsets(self):
+        """每一行起始位置的字节偏移"""
+        if self._line_offsets is None:
+            offsets = [0]
+            find = self.data.find
+            pos = find(b"\n")
+            while pos != -1:
+                offsets.append(pos + 1)
+                pos = find(b"\n", pos + 1)
+            self._line_offsets = offsets
+        return self._line_offsets
+
+    def point_to_byte(self, point):
+        """(line, column) -> 字节偏移，column 以字节计（与 tree-sitter 一致）"""
+        line, column = point
+        return self.line_offsets[line] + column
+
+    def byte_to_point(self, byte_offset):
+        """字节偏移 -> (line, column)"""
+        line = bisect.bisect_right(self.line_offsets, byte_offset) - 1
+        return line, byte_offset - self.line_offsets[line]
+
+    def slice(self, start_byte, end_byte):
+        return self.data[start_byte:end_byte].decode("utf-8", errors="replace")
+
+    def node_text(self, node):
+        """
+        提取 AST 节点对应的源代码文本
+        """
+        if node is None:
+            return ""
+        return self.data[node.start_byte:node.end_byte].decode("utf-8", errors="replace")
+
+    def node_text_stripped(self, node):
+        """
+        提取 AST 节点文本，每行去掉首尾空白，跨多行时用空格拼接
+        """
+        text = self.node_text(node)
+        if "\n" not in text:
+            return text.strip()
+        return " ".join(line.strip() for line in text.split("\n"))
+
+
+class SourceStore:
+    """
+    共享的源码存储：每个文件的字节只保存一份，按 file_id 索引。
+    Node 和图节点的 code 只记录 SourceSpan，读取时才从这里切片解码，
+    嵌套的模块、类、函数不再各自保存一份重叠的源码文本。
+    同一个文件再次加入时（watch 模式下文件被修改）替换原来的内容，沿用原来的 file_id。
+    """
+    def __init__(self):
+        self.buffers = []  # file_id -> bytes
+        self.file_ids = {}  # file_path -> file_id
+
+    @classmethod
+    def mapped(cls, file_path):
+        """
+        把一个文件只读映射为 file_id 为 0 的内容（例如图存储的源码文件），
+        切片时才由操作系统按页读入，不占用 Python 堆内存
+        """
+        store = cls()
+        with open(file_path, "rb") as file:
+            # 空文件不能映射
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) if file.seek(0, 2) else b""
+        store.add(file_path, data)
+        return store
+
+    def close(self):
+        """关闭映射的内容，之后不能再读取"""
+        for data in self.buffers:
+            if isinstance(data, mmap.mmap):
+                data.close()
+        self.buffers = [b"" for _ in self.buffers]
+
+    def add(self, file_path, data):
+        file_id = self.file_ids.get(file_path)
+        if file_id is None:
+            file_id = len(self.buffers)
+            self.file_ids[file_path] = file_id
+            self.buffers.append(data)
+        else:
+            self.buffers[file_id] = data
+        return file_id
+
+    def discard(self, file_path):
+        """文件被删除后释放其内容（file_id 保留，不再有节点指向它）"""
+        file_id = self.file_ids.get(file_path)
+        if file_id is not None:
+            self.buffers[file_id] = b""
+
+    def slice(self, file_id, start_byte, end_byte):
+        return self.buffers[file_id][start_byte:end_byte].decode("utf-8", errors="replace")
+
+    def size(self):
+        """保存的源码总字节数"""
+        return sum(len(data) for data in self.buffers)
+
+
+class SourceSpan:
+    """SourceStore 中一个文件的一段字节范围 (file_id, start_byte, end_byte)，text() 时才解码"""
+    __slots__ = ('store', 'file_id', 'start_byte', 'end_byte')
+
+    def __init__(self, store, file_id, start_byte, end_byte):
+        self.store = store
+        self.file_id = file_id
+        self.start_byte = start_byte
+        self.end_byte = end_byte
+
+    def text(self):
+        return self.store.slice(self.file_id, self.start_byte, self.end_byte)
+
+    def __repr__(self):
+        return f"SourceSpan({self.file_id}, {self.start_byte}, {self.end_byte})"
@@ -0,0 +1,349 @@
+import logging
+
+# resolve 的结果状态
+RESOLVED = 'resolved'  # 静态确定了定义（类、函数或项目内的模块）
+EXTERNAL = 'external'  # 静态确定名称不指向项目内的定义，不产生调用关系
+UNRESOLVED = 'unresolved'  # 无法静态确定，交给 LSP
+
+MAX_DEPTH = 16  # 追踪 import 链、基类链的最大深度，超过时放弃静态解析
+
+
+def closest_definition(caller_fullname, definition_paths):
+    """
+    没有其他线索时的静态推测：与调用者全名共同前缀最长的候选定义（同一模块、同一类中的定义优先），
+    并列时取先注册的定义
+    """
+    caller_parts = caller_fullname.split('.')
+
+    def shared_prefix(path):
+        count = 0
+        for caller_part, part in zip(caller_parts, path.split('.')):
+            if caller_part != part:
+                break
+            count += 1
+        return count
+
+    return max(definition_paths, key=shared_prefix)
+
+
+class _Unresolved(Exception):
+    """静态解析过程中遇到无法确定的情况"""
+
+
+class StaticResolver:
+    """
+    进程内的静态名称解析器，在调用 LSP 之前尝试确定同名定义不止一个的调用点指向哪个定义。
+
+    解析完成后，由各文件的定义（defined_symbols）、import 绑定（ImportParser.bindings）
+    和其余名称绑定（ScopeParser.bindings、bases）为每个作用域建立名称表，然后按 Python 的作用域规则查找：
+      - 普通调用 f()：从调用者所在作用域向外查找（跳过外层的类作用域），
+        找到 def/class 定义即确定；找到 import 绑定时沿 import 链追踪到项目内的定义，导入的是项目外模块时视为外部名称；
+      - self.method() / cls.method()：在方法所属的类及其基类中查找方法定义；
+      - module.func()：对象是导入的模块时在该模块的名称表中查找。
+    名称被重新赋值、有多个不同的绑定、涉及星号导入或动态属性等情况一律返回 UNRESOLVED，交给 LSP 处理。
+    """
+    def __init__(self, repo_name, nodes, defined_symbols, import_bindings, scope_bindings, bases):
+        self.repo_name = repo_name
+        self.logger = logging.getLogger(__name__)
+        self.scope_types = {fullname: node.node_type for fullname, node in nodes.items()}
+        self.module_suffixes = set()  # 项目内模块、包去掉项目名后的所有后缀，用来识别可能指向项目内的绝对导入
+        for fullname, node_type in self.scope_types.items():
+            if node_type in ('module', 'directory'):
+                parts = fullname.split('.')[1:]
+                for i in range(len(parts)):
+                    self.module_suffixes.add('.'.join(parts[i:]))
+
+        # 作用域全名 -> {名称: [绑定]}，绑定为 ('def', 全名)、('import', 模块全名, 模块路径, 导入的名称, 层级)、
+        # ('local',)、('global',)、('nonlocal',)
+        self.scopes = {}
+        self.star_imports = set()  # 含星号导入的作用域
+        self.attributes = {}  # 类全名 -> 方法中 self.X 赋值的属性名集合
+        self.bases = dict(bases)
+        for name, fullnames in defined_symbols.items():
+            for fullname in set(fullnames):
+                self._bind(fullname.rsplit('.', 1)[0], name, ('def', fullname))
+        for module_fullname, scope, local_name, module_path, imported_name, level in import_bindings:
+            if imported_name == '*':
+                self.star_imports.add(scope)
+            else:
+                self._bind(scope, local_name, ('import', module_fullname, module_path, imported_name, level))
+        for scope, name, kind in scope_bindings:
+            if kind == 'attribute':
+                self.attributes.setdefault(scope, set()).add(name)
+            else:
+                self._bind(scope, name, (kind,))
+
+        self.resolved = 0
+        self.external = 0
+        self.unresolved = 0
+
+    def _bind(self, scope, name, binding):
+        names = self.scopes.setdefault(scope, {})
+        bindings = names.setdefault(name, [])
+        if binding not in bindings:
+            bindings.append(binding)
+
+    def resolve(self, call_site, target):
+        """
+        :param target: 'name' 表示解析 LSP 请求位置上的单个名称（被调用的函数名或对象名），
+                       'member' 表示解析 obj.method() 中的方法
+        :return: (状态, 全名, 依赖的模块全名集合)，状态为 RESOLVED 时全名为确定的定义
+        """
+        dependencies = set()
+        try:
+            fullname = self._resolve_target(call_site, target, dependencies)
+        except _Unresolved:
+            self.unresolved += 1
+            return UNRESOLVED, None, dependencies
+        if fullname is None:
+            self.external += 1
+            return EXTERNAL, None, dependencies
+        self.resolved += 1
+        return RESOLVED, fullname, dependencies
+
+    def best_guess(self, call_site, target, definition_paths):
+        """
+        LSP 没有给出结果时（超时、熔断等）对调用点的最佳静态推测，总是返回某个候选定义：
+        静态解析能确定的候选优先，其次是调用者所在模块导入的模块中的候选，最后按 closest_definition 选择
+        """
+        try:
+            fullname = self._resolve_target(call_site, target, set())
+            if fullname and any(fullname.startswith(path) for path in definition_paths):
+                return fullname
+        except _Unresolved:
+            pass
+        try:
+            imported = self._imported_modules(self._module_of(call_site.caller_fullname))
+        except _Unresolved:
+            imported = set()
+        candidates = [path for path in definition_paths
+                      if any(path.startswith(f"{module}.") for module in imported)]
+        return closest_definition(call_site.caller_fullname, candidates or definition_paths)
+
+    def _imported_modules(self, module):
+        """模块中各个 import 绑定指向的项目内模块（无法确定的跳过）"""
+        modules = set()
+        for bindings in self.scopes.get(module, {}).values():
+            for binding in bindings:
+                if binding[0] != 'import':
+                    continue
+                _, module_fullname, module_path, imported_name, level = binding
+                try:
+                    target = self._resolve_module(module_fullname, module_path, level)
+                except _Unresolved:
+                    continue
+                if target is not None:
+                    modules.add(target)
+                    if imported_name is not None:
+                        modules.add(f"{target}.{imported_name}")
+        return modules
+
+    def _resolve_target(self, call_site, target, dependencies):
+        if target == 'name':
+            name = call_site.object_name if call_site.is_method_call else call_site.callee_name
+            return self._resolve_name(call_site.caller_fullname, name, dependencies)
+        return self._resolve_member(call_site, dependencies)
+
+    def stats(self):
+        total = self.resolved + self.external + self.unresolved
+        return {
+            "static_resolved": self.resolved,
+            "static_external": self.external,
+            "static_unresolved": self.unresolved,
+            "static_fraction": round((self.resolved + self.external) / total, 3) if total else 0.0,
+        }
+
+    # ---------------------------------------------------------------
+    # 名称查找
+    # ---------------------------------------------------------------
+
+    def _scope_chain(self, scope):
+        """
+        从 scope 向外可见的作用域：scope 本身、外层的函数作用域，直到所在模块（外层的类作用域不可见）
+        """
+        chain = [scope]
+        while self.scope_types.get(scope) != 'module':
+            if '.' not in scope or scope not in self.scope_types:
+                raise _Unresolved()
+            scope = scope.rsplit('.', 1)[0]
+            if self.scope_types.get(scope) in ('function', 'module'):
+                chain.append(scope)
+        return chain
+
+    def _module_of(self, scope):
+        while self.scope_types.get(scope) != 'module':
+            if '.' not in scope:
+                raise _Unresolved()
+            scope = scope.rsplit('.', 1)[0]
+        return scope
+
+    def _resolve_name(self, scope, name, dependencies):
+        """在 scope 中按作用域规则查找 name，返回定义全名，项目外的名称返回 None"""
+        if not name.isidentifier():
+            raise _Unresolved()
+        chain = self._scope_chain(scope)
+        dependencies.add(chain[-1])
+        for current in chain:
+            bindings = self.scopes.get(current, {}).get(name)
+            if not bindings:
+                if current in self.star_imports:
+                    raise _Unresolved()
+                continue
+            if bindings == [('nonlocal',)]:
+                continue
+            if bindings == [('global',)]:
+                return self._lookup_module_name(chain[-1], name, dependencies, 0)
+            return self._follow(self._single(bindings), dependencies, 0)
+        # 各层作用域都没有绑定：内置名称或未定义的名称
+        return None
+
+    def _single(self, bindings):
+        if len(bindings) != 1:
+            raise _Unresolved()
+        return bindings[0]
+
+    def _follow(self, binding, dependencies, depth):
+        if depth > MAX_DEPTH:
+            raise _Unresolved()
+        if binding[0] == 'def':
+            return binding[1]
+        if binding[0] != 'import':
+            # 普通赋值、参数等：需要类型推断，交给 LSP
+            raise _Unresolved()
+        _, module_fullname, module_path, imported_name, level = binding
+        target = self._resolve_module(module_fullname, module_path, level)
+        if target is None:
+            return None
+        dependencies.add(self._init_module(target))
+        if imported_name is None:
+            return target
+        return self._lookup_module_name(target, imported_name, dependencies, depth + 1)
+
+    def _lookup_module_name(self, module, name, dependencies, depth):
+        """
+        在模块（或包的 __init__）的顶层名称表中查找 name；包中没有绑定该名称时查找同名子模块
+        """
+        scope = self._init_module(module)
+        bindings = self.scopes.get(scope, {}).get(name)
+        if bindings:
+            return self._follow(self._single(bindings), dependencies, depth)
+        submodule = f"{module}.{name}"
+        if self.scope_types.get(module) == 'directory' and submodule in self.scope_types:
+            return submodule
+        raise _Unresolved()
+
+    def _init_module(self, module):
+        """包对应的 __init__ 模块，普通模块返回自身"""
+        if self.scope_types.get(module) == 'directory':
+            return f"{module}.__init__"
+        return module
+
+    def _resolve_module(self, module_fullname, module_path, level):
+        """
+        把 import 中的模块路径转换为项目内模块或包的全名；确定指向项目外时返回 None
+        """
+        if level > 0:
+            # 相对导入：从导入者所在的包向上 level - 1 层
+            package = module_fullname.rsplit('.', 1)[0]
+            for _ in range(level - 1):
+                if '.' not in package:
+                    raise _Unresolved()
+                package = package.rsplit('.', 1)[0]
+            target = f"{package}.{module_path}" if module_path else package
+            if target not in self.scope_types:
+                raise _Unresolved()
+            return target
+
+        target = f"{self.repo_name}.{module_path}"
+        if self.scope_types.get(target) in ('module', 'directory'):
+            return target
+        if module_path in self.module_suffixes or module_path.split('.')[0] == self.repo_name:
+            # 可能通过 sys.path 等方式指向项目内的模块，交给 LSP
+            raise _Unresolved()
+        return None
+
+    # ---------------------------------------------------------------
+    # 方法查找
+    # ---------------------------------------------------------------
+
+    def _resolve_member(self, call_site, dependencies):
+        object_name = call_site.object_name or ""
+        method_name = call_site.method_name
+        if not method_name or not method_name.isidentifier():
+            raise _Unresolved()
+        if object_name[:1] in ('"', "'") or object_name[:2].lower() in ('f"', "f'", 'b"', "b'", 'r"', "r'"):
+            # 字符串字面量上的方法（", ".join 等）属于内置类型
+            return None
+        if object_name in ('self', 'cls'):
+            class_fullname = self._method_class(call_site.caller_fullname, object_name)
+            dependencies.add(self._module_of(class_fullname))
+            return self._lookup_class_member(class_fullname, method_name, dependencies, 0)
+
+        parts = object_name.split('.')
+        if not all(part.isidentifier() for part in parts):
+            raise _Unresolved()
+        target = self._resolve_name(call_site.caller_fullname, parts[0], dependencies)
+        for attribute in parts[1:] + [method_name]:
+            if target is None:
+                return None
+            target = self._lookup_attribute(target, attribute, dependencies)
+        return target
+
+    def _method_class(self, caller_fullname, object_name):
+        """self / cls 所在方法所属的类；调用者不是方法或在方法中重新绑定了该名称时无法确定"""
+        class_fullname = caller_fullname.rsplit('.', 1)[0]
+        if self.scope_types.get(caller_fullname) != 'function' or self.scope_types.get(class_fullname) != 'class':
+            raise _Unresolved()
+        if self.scopes.get(caller_fullname, {}).get(object_name) != [('local',)]:
+            raise _Unresolved()
+        return class_fullname
+
+    def _lookup_attribute(self, target, attribute, dependencies):
+        """target（模块、包或类）上的属性"""
+        node_type = self.scope_types.get(target)
+        if node_type in ('module', 'directory'):
+            dependencies.add(self._init_module(target))
+            return self._lookup_module_name(target, attribute, dependencies, 0)
+        if node_type == 'class':
+            return self._lookup_class_member(target, attribute, dependencies, 0)
+        raise _Unresolved()
+
+    def _lookup_class_member(self, class_fullname, name, dependencies, depth):
+        """
+        按基类从左到右深度优先查找类成员。实例属性、类体中的普通赋值，以及位于外部基类之后的定义都交给 LSP；
+        类及其项目内的基类都没有定义、只有外部基类可能提供该成员时返回 None
+        """
+        if depth > MAX_DEPTH or name in self.attributes.get(class_fullname, ()):
+            raise _Unresolved()
+        bindings = self.scopes.get(class_fullname, {}).get(name)
+        if bindings:
+            binding = self._single(bindings)
+            if binding[0] != 'def':
+                raise _Unresolved()
+            return binding[1]
+
+        found = None
+        external_base = False
+        class_scope = class_fullname.rsplit('.', 1)[0]
+        for base in self.bases.get(class_fullname, ()):
+            parts = base.split('.')
+            if not all(part.isidentifier() for part in parts):
+                raise _Unresolved()
+            base_fullname = self._resolve_name(class_scope, parts[0], dependencies)
+            for attribute in parts[1:]:
+                if base_fullname is None:
+                    break
+                base_fullname = self._lookup_attribute(base_fullname, attribute, dependencies)
+            if base_fullname is None:
+                external_base = True
+                continue
+            if self.scope_types.get(base_fullname) != 'class':
+                raise _Unresolved()
+            dependencies.add(self._module_of(base_fullname))
+            found = self._lookup_class_member(base_fullname, name, dependencies, depth + 1)
+            if found is not None:
+                if external_base:
+                    # 排在前面的外部基类可能也定义了该成员
+                    raise _Unresolved()
+                return found
+        return None
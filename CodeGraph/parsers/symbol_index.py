@@ -0,0 +1,141 @@
+import json
+import bisect
+from collections.abc import Mapping
+
+VERSION = 1  # 序列化格式版本
+
+
+class SymbolIndex(Mapping):
+    """
+    项目中类、函数定义的符号表：每个全名驻留为一个整数 ID，并维护
+      - 名称（短名）-> ID 列表，按注册顺序，同一个全名重复定义时出现多次
+      - 全名 -> ID
+      - 按全名排序的前缀索引，用来列出某个模块、类中的所有定义
+    作为 Mapping 时与原来的 defined_symbols 字典兼容：index[name] 返回该名称的定义全名列表。
+    可以用 save / load 序列化为 JSON，后续阶段不必重新解析代码库即可加载。
+    """
+    def __init__(self):
+        self.fullnames = []  # ID -> 全名
+        self.names = []  # ID -> 名称
+        self.refs = []  # ID -> 当前注册的次数，为 0 表示已被移除
+        self._ids = {}  # 全名 -> ID（移除后仍保留，再次注册时沿用原来的 ID）
+        self._by_name = {}  # 名称 -> [ID]
+        self._sorted = None  # 按全名排序的 [(全名, ID)]，首次按前缀查询时建立，符号变化后失效
+
+    def add(self, name, fullname):
+        """注册一个定义，返回它的 ID"""
+        symbol_id = self._ids.get(fullname)
+        if symbol_id is None:
+            symbol_id = len(self.fullnames)
+            self._ids[fullname] = symbol_id
+            self.fullnames.append(fullname)
+            self.names.append(name)
+            self.refs.append(0)
+        self.refs[symbol_id] += 1
+        self._by_name.setdefault(name, []).append(symbol_id)
+        self._sorted = None
+        return symbol_id
+
+    def remove(self, name, fullname):
+        """移除一次注册（与 add 对应），名称没有剩余定义时从索引中删除"""
+        symbol_id = self._ids[fullname]
+        ids = self._by_name[name]
+        ids.remove(symbol_id)
+        if not ids:
+            del self._by_name[name]
+        self.refs[symbol_id] -= 1
+        self._sorted = None
+
+    def clear(self):
+        self.__init__()
+
+    def id_of(self, fullname):
+        """全名对应的 ID，没有注册时返回 None"""
+        symbol_id = self._ids.get(fullname)
+        return symbol_id if symbol_id is not None and self.refs[symbol_id] else None
+
+    def ids(self, name):
+        """名称对应的 ID 列表"""
+        return list(self._by_name.get(name, ()))
+
+    def definition_prefix(self, fullname, name):
+        """
+        名称为 name 的定义中，全名是 fullname 前缀的那个（fullname 是该定义本身或位于其内部），没有时返回 None。
+        等价于在 index[name] 中查找 fullname.startswith(path) 的 path，只检查 fullname 中以 name 结尾的前缀。
+        """
+        ids = self._by_name.get(name)
+        if not ids:
+            return None
+        end = fullname.find(name)
+        while end >= 0:
+            end += len(name)
+            symbol_id = self._ids.get(fullname[:end])
+            if symbol_id is not None and self.refs[symbol_id] and self.names[symbol_id] == name:
+                return self.fullnames[symbol_id]
+            end = fullname.find(name, end - len(name) + 1)
+        return None
+
+    def with_prefix(self, prefix):
+        """全名为 prefix 或位于 prefix 之内（prefix + '.' 开头）的定义全名，按全名排序"""
+        if self._sorted is None:
+            self._sorted = sorted((self.fullnames[symbol_id], symbol_id)
+                                  for symbol_id, count in enumerate(self.refs) if count)
+        start = bisect.bisect_left(self._sorted, (prefix,))
+        fullnames = []
+        for fullname, _ in self._sorted[start:]:
+            if not fullname.startswith(prefix):
+                break
+            if len(fullname) == len(prefix) or fullname[len(prefix)] == '.':
+                fullnames.append(fullname)
+        return fullnames
+
+    def __getitem__(self, name):
+        ids = self._by_name[name]
+        return [self.fullnames[symbol_id] for symbol_id in ids]
+
+    def __contains__(self, name):
+        return name in self._by_name
+
+    def __iter__(self):
+        return iter(self._by_name)
+
+    def __len__(self):
+        return len(self._by_name)
+
+    def __repr__(self):
+        return repr({name: self[name] for name in self._by_name})
+
+    def to_dict(self):
+        """转换为只包含内置类型的字典：已移除的符号不写入，ID 按注册顺序重新编号"""
+        live = [symbol_id for symbol_id, count in enumerate(self.refs) if count]
+        renumber = {symbol_id: new_id for new_id, symbol_id in enumerate(live)}
+        return {
+            "version": VERSION,
+            "symbols": [[self.names[symbol_id], self.fullnames[symbol_id]] for symbol_id in live],
+            "by_name": {name: [renumber[symbol_id] for symbol_id in ids] for name, ids in self._by_name.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get("version") != VERSION:
+            raise ValueError(f"Unsupported symbol index version: {data.get('version')}")
+        index = cls()
+        for name, fullname in data["symbols"]:
+            index._ids[fullname] = len(index.fullnames)
+            index.fullnames.append(fullname)
+            index.names.append(name)
+            index.refs.append(0)
+        for name, ids in data["by_name"].items():
+            index._by_name[name] = list(ids)
+            for symbol_id in ids:
+                index.refs[symbol_id] += 1
+        return index
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
@@ -0,0 +1,103 @@
+"""
+watch 模式增量更新的回归测试：每次更新后的代码图应与对同一工作区重新完整构建的结果相同。
+
+用法: python -m pytest CodeGraph/test_watch.py
+"""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from watch import CodeGraphWatcher
+from edge_index import edge_relationships
+
+UTILS = "def helper():\n    return 1\n\n\ndef other():\n    return 2\n"
+MODELS = ("from .utils import helper\n"
+          "from .extra import build\n\n\n"
+          "def model():\n    return helper()\n")
+
+
+class _NoDefinitions:
+    """不查找定义的解析器：调用只由符号表确定"""
+    def find_definitions(self, requests, max_in_flight=None):
+        for index, _ in enumerate(requests):
+            yield index, None
+
+
+class _BrokenResolver:
+    def find_definitions(self, requests, max_in_flight=None):
+        raise RuntimeError("LSP server not started or stopped")
+
+
+def _write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(text)
+
+
+def _project(tmp_path):
+    root = os.path.join(str(tmp_path), "proj")
+    _write(os.path.join(root, "pkg", "__init__.py"), "")
+    _write(os.path.join(root, "pkg", "utils.py"), UTILS)
+    _write(os.path.join(root, "pkg", "models.py"), MODELS)
+    return root
+
+
+def _watcher(root, resolver=None):
+    watcher = CodeGraphWatcher(root, "proj", resolver or _NoDefinitions())
+    watcher.build()
+    return watcher
+
+
+def _snapshot(code_graph):
+    graph = code_graph.graph
+    edges = {(source, target, relationship) for source, target, data in graph.edges(data=True)
+             for relationship in edge_relationships(data)}
+    return set(graph.nodes), edges
+
+
+def _assert_matches_fresh_build(watcher, root):
+    assert _snapshot(watcher.code_graph) == _snapshot(_watcher(root).code_graph)
+
+
+def test_restored_definition_gets_incoming_imports_back(tmp_path):
+    root = _project(tmp_path)
+    utils = os.path.join(root, "pkg", "utils.py")
+    watcher = _watcher(root)
+    assert ("proj.pkg.models", "proj.pkg.utils.helper", "IMPORTS") in _snapshot(watcher.code_graph)[1]
+
+    _write(utils, "def other():\n    return 2\n")
+    watcher.update_file(utils)
+    _assert_matches_fresh_build(watcher, root)
+
+    _write(utils, UTILS)
+    watcher.update_file(utils)
+    assert ("proj.pkg.models", "proj.pkg.utils.helper", "IMPORTS") in _snapshot(watcher.code_graph)[1]
+    _assert_matches_fresh_build(watcher, root)
+
+
+def test_new_module_gets_imports_from_existing_importers(tmp_path):
+    root = _project(tmp_path)
+    extra = os.path.join(root, "pkg", "extra.py")
+    watcher = _watcher(root)
+
+    _write(extra, "def build():\n    return 3\n")
+    watcher.update_file(extra)
+    assert ("proj.pkg.models", "proj.pkg.extra.build", "IMPORTS") in _snapshot(watcher.code_graph)[1]
+    _assert_matches_fresh_build(watcher, root)
+
+    os.remove(extra)
+    watcher.update_file(extra)
+    _assert_matches_fresh_build(watcher, root)
+
+
+def test_resolver_error_does_not_stop_watching(tmp_path):
+    root = _project(tmp_path)
+    models = os.path.join(root, "pkg", "models.py")
+    watcher = _watcher(root)
+    watcher.call_parser.lsp_client = _BrokenResolver()
+
+    # other 在两个模块中都有定义，需要向解析器查找定义
+    _write(models, MODELS + "\n\ndef other():\n    return 4\n\n\ndef model2():\n    return other()\n")
+    watcher._update_safely(models)
+    assert "proj.pkg.models.model2" in watcher.code_graph.graph
@@ -0,0 +1,442 @@
+import os
+import time
+import queue
+import logging
+from code_graph import CodeGraph
+from module_classifier import ModuleClassifier
+from module_index import canonical_path
+from parsers.contains_parser import Node
+from parsers.repo_parser import RepoParser, FileExtractor
+from parsers.source_buffer import SourceBuffer, SourceSpan
+from lsp_client import create_resolver, RequestPolicy
+import config
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:  # 未安装 watchdog 时退化为轮询文件修改时间
+    Observer = None
+    FileSystemEventHandler = object
+
+logging.basicConfig(level=logging.INFO, format=' %(name)s - %(levelname)s - %(message)s')
+
+
+class FileState:
+    """watch 模式下单个文件的内存状态"""
+    def __init__(self, source, tree, result, parent_fullname):
+        self.source = source
+        self.tree = tree
+        self.result = result  # FileParseResult
+        self.parent_fullname = parent_fullname
+        self.resolved = []  # 与 result.call_sites 对齐，每个调用点产生的 (caller, callee) 列表
+
+    @property
+    def fullnames(self):
+        """按先序排列的模块、类、函数全名"""
+        fullnames = []
+        for parent_index, name, _, _, _ in self.result.nodes:
+            parent = fullnames[parent_index] if parent_index >= 0 else self.parent_fullname
+            fullnames.append(f"{parent}.{name}")
+        return fullnames
+
+
+class CodeGraphWatcher:
+    """
+    常驻进程：监听项目目录的文件系统事件，让 CodeGraph 与工作区保持一致。
+    每个文件的语法树常驻内存，文件保存后通过 Tree.edit 做增量重新解析，
+    然后只更新受影响的 CONTAINS、IMPORTS、CALLS 边。
+    """
+    def __init__(self, project_path, repo_name, lsp_client, debounce=0.05, poll_interval=0.5):
+        self.project_path = os.path.abspath(project_path)
+        self.repo_name = repo_name
+        self.lsp_client = lsp_client
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.logger = logging.getLogger(__name__)
+
+        # 静态解析器的作用域表依赖其他模块的内容，watch 模式暂不维护，调用点全部交给 LSP 消歧
+        self.repo_parser = RepoParser(self.project_path, repo_name, keep_trees=True, static_resolve=False,
+                                      excludes=config.DISCOVERY_EXCLUDES, max_file_size=config.MAX_FILE_SIZE)
+        self.extractor = FileExtractor(self.project_path, repo_name)
+        self.code_graph = CodeGraph()
+        self.files = {}  # file_path -> FileState
+        self.call_counts = {}  # (caller, callee) -> 产生这条 CALLS 边的调用点个数
+        self.sites_by_name = {}  # 调用点查找的名称 -> {(file_path, 调用点下标)}
+        self.importers_by_path = {}  # 导入查找的点分路径及其前缀 -> {导入者的 file_path}
+        self.events = queue.Queue()
+
+    @property
+    def call_parser(self):
+        return self.repo_parser.call_parser
+
+    @property
+    def defined_symbols(self):
+        return self.repo_parser.defined_symbols
+
+    # ---------------------------------------------------------------
+    # 初始构建
+    # ---------------------------------------------------------------
+
+    def build(self):
+        """完整构建一次代码图，并记录每个文件的语法树和每个调用点的解析结果"""
+        start = time.perf_counter()
+        self.repo_parser.parse()
+        self.code_graph.module_classifier = ModuleClassifier(self.repo_parser.local_modules())
+        self.code_graph.build_graph_from_tree(self.repo_parser.root)
+        for importer, imported_module in self.repo_parser.imports:
+            self.code_graph.add_import(importer, imported_module)
+
+        self.call_parser.code_graph = self.code_graph
+        self.call_parser.lsp_client = self.lsp_client
+        self.call_parser.call_sites = []
+        states = []
+        for result in self.repo_parser.file_results:
+            source, tree = self.repo_parser.trees[result.file_path]
+            parent_fullname = self._parent_fullname(result.file_path)
+            state = FileState(source, tree, result, parent_fullname)
+            self.files[result.file_path] = state
+            states.append(state)
+
+        # 所有调用点一起解析，LSP 请求可以并发发送
+        resolved = iter(self._resolve([call_site for state in states for call_site in state.result.call_sites]))
+        for state in states:
+            state.resolved = [next(resolved) for _ in state.result.call_sites]
+            self._index_call_sites(state.result.file_path, state)
+            self._index_imports(state.result.file_path, state)
+        self.repo_parser.trees = {}
+        self.logger.info(f"初始构建完成: {len(self.files)} 个文件, 耗时 {time.perf_counter() - start:.2f}s")
+
+    # ---------------------------------------------------------------
+    # 监听文件系统事件
+    # ---------------------------------------------------------------
+
+    def run(self):
+        """阻塞运行，直到 KeyboardInterrupt"""
+        if Observer is None:
+            self.logger.warning("未安装 watchdog，使用轮询方式监听文件变化")
+            self._run_polling()
+            return
+
+        observer = Observer()
+        observer.schedule(_EventHandler(self.events), self.project_path, recursive=True)
+        observer.start()
+        try:
+            while True:
+                self._process_events(self.events.get())
+        except KeyboardInterrupt:
+            pass
+        finally:
+            observer.stop()
+            observer.join()
+
+    def _process_events(self, first_path):
+        # 短暂合并同一次保存产生的多个事件
+        paths = {first_path}
+        deadline = time.monotonic() + self.debounce
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                paths.add(self.events.get(timeout=remaining))
+            except queue.Empty:
+                break
+        for path in sorted(paths):
+            self._update_safely(path)
+
+    def _run_polling(self):
+        mtimes = self._scan_mtimes()
+        try:
+            while True:
+                time.sleep(self.poll_interval)
+                current = self._scan_mtimes()
+                for path in set(mtimes) | set(current):
+                    if mtimes.get(path) != current.get(path):
+                        self._update_safely(path)
+                mtimes = current
+        except KeyboardInterrupt:
+            pass
+
+    def _scan_mtimes(self):
+        # 与初始构建使用同一个发现阶段（同样的排除规则），修改时间取自清单
+        return {entry.path: entry.mtime_ns for entry in self.repo_parser.discovery.scan().files}
+
+    # ---------------------------------------------------------------
+    # 增量更新
+    # ---------------------------------------------------------------
+
+    def _update_safely(self, file_path):
+        """一个文件更新失败只记录日志，不中断监听，继续处理后面的事件"""
+        try:
+            self.update_file(file_path)
+        except Exception:
+            self.logger.exception(f"更新 {file_path} 失败，跳过")
+
+    def update_file(self, file_path):
+        """
+        文件被创建、修改或删除后调用，增量更新代码图
+        """
+        file_path = os.path.abspath(file_path)
+        if not file_path.endswith(".py") or not file_path.startswith(self.project_path + os.sep):
+            return
+        if self.repo_parser.discovery.is_excluded(file_path):
+            return
+        start = time.perf_counter()
+        old_state = self.files.get(file_path)
+
+        source = None
+        # 超过大小上限的文件与发现阶段一样不纳入代码图（已有的节点按删除处理）
+        if os.path.isfile(file_path) and not self.repo_parser.discovery.is_oversized(file_path):
+            try:
+                source = SourceBuffer.from_file(file_path)
+            except Exception as e:
+                self.logger.warning(f"无法读取文件 {file_path}: {str(e)}")
+                return
+        if old_state is not None and source is not None and old_state.source.data == source.data:
+            return
+
+        new_state = None
+        if source is not None:
+            # 解析失败时代码图还没有改动，该文件保留上一次的状态
+            try:
+                parent_fullname = self._parent_fullname(file_path)
+                tree = self._reparse(old_state, source)
+                result = self.extractor.extract(file_path, parent_fullname, source, tree)
+            except Exception as e:
+                self.logger.warning(f"无法解析文件 {file_path}，保留上一次的状态: {str(e)}")
+                return
+            new_state = FileState(source, tree, result, parent_fullname)
+
+        self._patch_graph(file_path, old_state, new_state)
+        self.call_parser.calls = []
+        self.logger.info(f"已更新 {os.path.relpath(file_path, self.project_path)}, "
+                         f"耗时 {(time.perf_counter() - start) * 1000:.1f}ms")
+
+    def _reparse(self, old_state, source):
+        """根据新旧内容的差异调用 Tree.edit，然后基于旧树增量解析"""
+        parser = self.extractor.parser
+        if old_state is None:
+            return parser.parse(source.data)
+
+        old_data, new_data = old_state.source.data, source.data
+        prefix = _common_prefix_length(old_data, new_data)
+        suffix = _common_prefix_length(old_data[prefix:][::-1], new_data[prefix:][::-1])
+        old_end, new_end = len(old_data) - suffix, len(new_data) - suffix
+
+        tree = old_state.tree
+        tree.edit(
+            start_byte=prefix,
+            old_end_byte=old_end,
+            new_end_byte=new_end,
+            start_point=old_state.source.byte_to_point(prefix),
+            old_end_point=old_state.source.byte_to_point(old_end),
+            new_end_point=source.byte_to_point(new_end),
+        )
+        return parser.parse(new_data, tree)
+
+    def _patch_graph(self, file_path, old_state, new_state):
+        old_fullnames = old_state.fullnames if old_state else []
+        new_fullnames = new_state.fullnames if new_state else []
+        removed = set(old_fullnames) - set(new_fullnames)
+
+        # 1. 该文件自身调用点产生的 CALLS 边
+        if old_state is not None:
+            for calls in old_state.resolved:
+                self._release_calls(calls)
+
+        # 2. CONTAINS：删除消失的定义，新增或更新其余节点
+        for fullname in removed:
+            self.code_graph.remove_node(fullname)
+        changed_paths = set(removed) | (set(new_fullnames) - set(old_fullnames))
+        # 图节点的 code 指向共享的源码存储，文件内容在这里整体替换为新版本
+        sources = self.repo_parser.contains_parser.sources
+        if new_state is not None:
+            file_id = sources.add(file_path, new_state.source.data)
+            changed_paths.update(self._ensure_directories(new_state.parent_fullname))
+            for (parent_index, name, node_type, (start_byte, end_byte), signature), fullname in zip(
+                    new_state.result.nodes, new_fullnames):
+                parent = new_fullnames[parent_index] if parent_index >= 0 else new_state.parent_fullname
+                span = SourceSpan(sources, file_id, start_byte, end_byte)
+                self.code_graph.add_contains(parent, Node(name, node_type, None, signature, parent, span))
+        else:
+            sources.discard(file_path)
+
+        # 3. IMPORTS：重新添加该模块的所有 import 边；删除节点时其他模块指向它们的边也已删除，
+        #    导入路径经过新增或删除的定义的其他模块同样重新添加
+        module_fullname = (new_fullnames or old_fullnames)[0]
+        self.code_graph.remove_out_edges(module_fullname, "IMPORTS")
+        if new_state is not None:
+            for importer, imported_module in new_state.result.imports:
+                self.code_graph.add_import(importer, imported_module)
+        if old_state is not None:
+            self._index_imports(file_path, old_state, remove=True)
+        if new_state is not None:
+            self._index_imports(file_path, new_state)
+        importers = set()
+        for path in map(canonical_path, changed_paths):
+            importers.update(self.importers_by_path.get(path, ()))
+        importers.discard(file_path)
+        for importer_path in sorted(importers):
+            self._reimport(self.files[importer_path])
+
+        # 4. 更新符号表，记录候选定义发生变化的名称
+        changed_names = set()
+        if old_state is not None:
+            for name, fullname in old_state.result.symbols:
+                self.defined_symbols.remove(name, fullname)
+                changed_names.add(name)
+        if new_state is not None:
+            for name, fullname in new_state.result.symbols:
+                self.repo_parser.contains_parser._register_symbol(name, fullname)
+                changed_names.add(name)
+        if old_state is not None and new_state is not None:
+            changed_names -= {name for name in changed_names
+                              if self._symbols_of(old_state, name) == self._symbols_of(new_state, name)}
+
+        if old_state is not None:
+            self._index_call_sites(file_path, old_state, remove=True)
+        if new_state is None:
+            self.files.pop(file_path, None)
+        else:
+            self.files[file_path] = new_state
+            new_state.resolved = self._resolve(new_state.result.call_sites)
+            self._index_call_sites(file_path, new_state)
+
+        # 5. 其他文件中查找了这些名称的调用点需要重新解析
+        affected = set()
+        for name in changed_names:
+            affected.update(self.sites_by_name.get(name, ()))
+        affected = sorted(site for site in affected if site[0] != file_path)
+        for other_path, index in affected:
+            self._release_calls(self.files[other_path].resolved[index])
+        resolved = self._resolve([self.files[other_path].result.call_sites[index] for other_path, index in affected])
+        for (other_path, index), calls in zip(affected, resolved):
+            self.files[other_path].resolved[index] = calls
+
+    def _index_call_sites(self, file_path, state, remove=False):
+        for index, call_site in enumerate(state.result.call_sites):
+            # 方法调用同时登记对象名和方法名：对象名是否已定义会随符号表变化
+            if call_site.is_method_call:
+                names = (call_site.object_name, call_site.method_name)
+            else:
+                names = (call_site.callee_name,)
+            for name in names:
+                sites = self.sites_by_name.setdefault(name, set())
+                if remove:
+                    sites.discard((file_path, index))
+                else:
+                    sites.add((file_path, index))
+
+    def _index_imports(self, file_path, state, remove=False):
+        """登记该文件每个导入查找的路径及其全部前缀，前缀上的节点增删都可能改变解析结果"""
+        for importer, imported_module in state.result.imports:
+            for path in self.code_graph.module_index.candidate_paths(importer, imported_module):
+                parts = path.split('.')
+                for end in range(1, len(parts) + 1):
+                    prefix = '.'.join(parts[:end])
+                    if remove:
+                        importers = self.importers_by_path.get(prefix)
+                        if importers is not None:
+                            importers.discard(file_path)
+                            if not importers:
+                                del self.importers_by_path[prefix]
+                    else:
+                        self.importers_by_path.setdefault(prefix, set()).add(file_path)
+
+    def _reimport(self, state):
+        """重新添加一个未修改的模块的所有 import 边"""
+        module_fullname = state.fullnames[0]
+        self.code_graph.remove_out_edges(module_fullname, "IMPORTS")
+        for importer, imported_module in state.result.imports:
+            self.code_graph.add_import(importer, imported_module)
+
+    def _symbols_of(self, state, name):
+        return [fullname for symbol, fullname in state.result.symbols if symbol == name]
+
+    def _resolve(self, call_sites):
+        """
+        批量解析调用点并写入代码图，返回与 call_sites 对齐的调用关系列表。
+        解析器出错（例如语言服务器已退出）时这些调用点记为未解析，代码图的其余部分仍与文件内容一致
+        """
+        try:
+            resolved = self.call_parser.resolve_call_sites(call_sites)
+        except Exception as e:
+            self.logger.warning(f"解析 {len(call_sites)} 个调用点时出错，记为未解析: {str(e)}")
+            resolved = [[] for _ in call_sites]
+        for calls in resolved:
+            for caller, callee in calls:
+                self.code_graph.add_call(caller, callee, **self.call_parser.call_attributes(caller, callee))
+                self.call_counts[(caller, callee)] = self.call_counts.get((caller, callee), 0) + 1
+        return resolved
+
+    def _release_calls(self, calls):
+        for edge in calls:
+            count = self.call_counts.get(edge, 0) - 1
+            if count > 0:
+                self.call_counts[edge] = count
+            else:
+                self.call_counts.pop(edge, None)
+                self.code_graph.remove_edge(edge[0], edge[1], "CALLS")
+
+    def _ensure_directories(self, parent_fullname):
+        """新建文件所在的目录节点可能还不存在，返回新增的目录全名"""
+        added = []
+        parts = parent_fullname.split('.')
+        for i in range(2, len(parts) + 1):
+            fullname = '.'.join(parts[:i])
+            if fullname not in self.code_graph.graph:
+                parent = '.'.join(parts[:i - 1])
+                self.code_graph.add_contains(parent, Node(parts[i - 1], 'directory', parent_fullname=parent))
+                added.append(fullname)
+        return added
+
+    def _parent_fullname(self, file_path):
+        relative_dir = os.path.relpath(os.path.dirname(file_path), self.project_path)
+        if relative_dir == os.curdir:
+            return self.repo_name
+        return f"{self.repo_name}.{relative_dir.replace(os.path.sep, '.')}"
+
+
+class _EventHandler(FileSystemEventHandler):
+    """把 watchdog 事件转换为需要更新的 .py 文件路径"""
+    def __init__(self, events):
+        super().__init__()
+        self.events = events
+
+    def on_any_event(self, event):
+        if event.is_directory:
+            return
+        for path in (event.src_path, getattr(event, 'dest_path', None)):
+            if path and path.endswith(".py"):
+                self.events.put(path)
+
+
+def _common_prefix_length(a, b):
+    """两个 bytes 的公共前缀长度（二分查找，比较在 C 中完成）"""
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        mid = (low + high + 1) // 2
+        if a[:mid] == b[:mid]:
+            low = mid
+        else:
+            high = mid - 1
+    return low
+
+
+def main():
+    repo_name = os.path.basename(os.path.normpath(config.PROJECT_PATH))
+    # 常驻进程不设总时间预算，只限制单个请求的期限
+    policy = RequestPolicy(config.LSP_REQUEST_TIMEOUT, None, config.LSP_BREAKER_THRESHOLD)
+    lsp_client = create_resolver(config.PROJECT_PATH, config.RESOLVER_BACKEND, size=config.LSP_POOL_SIZE,
+                                 max_in_flight=config.LSP_MAX_IN_FLIGHT, policy=policy)
+    lsp_client.start_server()
+    try:
+        watcher = CodeGraphWatcher(config.PROJECT_PATH, repo_name, lsp_client)
+        watcher.build()
+        watcher.run()
+    finally:
+        lsp_client.stop_server()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,29 +3,80 @@ import matplotlib.pyplot as plt
 from tqdm import tqdm
 import json
 import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'CodeGraph'))
+from graph_store import open_graph_store
+from graph_snapshot import open_graph_snapshot
+from node_link_json import iter_nodes, iter_links
+from parsers.source_buffer import SourceSpan
 
 RESULTDIR = "results"
 ALGORITHMS = ["Infomap", "Leiden", "Louvain", "Label Propagation", "Walktrap"]
 
 def load_graph_from_json(filename):
-    """从 JSON 文件加载图"""
-    with open(filename, 'r') as infile:
-        graph_data = json.load(infile)
-
-    # 从 JSON 数据创建 igraph 图
-    vertices = [v['id'] for v in graph_data['nodes']]
-    edges = [(link['source'], link['target']) for link in graph_data['links']]
+    """从 JSON 文件加载图，存在同名的图快照或图存储时从它们加载"""
+    snapshot = open_graph_snapshot(filename)
+    if snapshot is not None:
+        return load_graph_from_snapshot(snapshot)
+    store = open_graph_store(filename)
+    if store is not None:
+        return load_graph_from_store(store)
+
+    # 流式读取节点和边（兼容 "links" 和 "edges" 两种边列表键），不需要先把整个文件加载为字典
+    nodes = list(iter_nodes(filename))
+    vertices = [v['id'] for v in nodes]
+    index = {name: i for i, name in enumerate(vertices)}
+    edges = [(index[link['source']], index[link['target']]) for link in iter_links(filename, fields=())]
 
     # 构建 directed 图 (有向图)
     ig_G = ig.Graph(directed=True)
     ig_G.add_vertices(vertices)
     ig_G.add_edges(edges)
 
-    # 将节点的属性从 JSON 文件中添加到 igraph 节点中
-    for v in graph_data['nodes']:
-        for key, value in v.items():
-            if key != 'id':  # 'id' 已作为顶点名称使用
-                ig_G.vs.find(name=v['id'])[key] = value
+    # 将节点的属性按列添加到 igraph 节点中
+    keys = {key for v in nodes for key in v if key != 'id'}  # 'id' 已作为顶点名称使用
+    for key in keys:
+        ig_G.vs[key] = [v.get(key) for v in nodes]
+
+    return ig_G
+
+def load_graph_from_store(store):
+    """
+    从图存储（graph_store.GraphStore）加载图：属性按列一次性写入，
+    code 属性保存为 SourceSpan，导出社区信息时才从 mmap 中解码
+    """
+    vertices = [v['id'] for v in store.nodes]
+    index = {name: i for i, name in enumerate(vertices)}
+    edges = [(index[link['source']], index[link['target']]) for link in store.links]
+
+    ig_G = ig.Graph(directed=True)
+    ig_G.add_vertices(vertices)
+    ig_G.add_edges(edges)
+
+    keys = {key for v in store.nodes for key in v if key != 'id'}
+    for key in keys:
+        if key == 'code':
+            ig_G.vs[key] = [SourceSpan(store.sources, 0, *v['code']) if v.get('code') is not None else None
+                            for v in store.nodes]
+        else:
+            ig_G.vs[key] = [v.get(key) for v in store.nodes]
+
+    return ig_G
+
+def load_graph_from_snapshot(snapshot):
+    """
+    从图快照（graph_snapshot.GraphSnapshot）加载图：边直接取自 CSR 数组，属性按列一次性写入，
+    code 属性保存为 SourceSpan，导出社区信息时才从 mmap 中解码
+    """
+    nodes = snapshot.node_dicts()
+    ig_G = ig.Graph(directed=True)
+    ig_G.add_vertices([v['id'] for v in nodes])
+    ig_G.add_edges([(source, target) for source, target, _ in snapshot.edges()])
+
+    for key, _ in snapshot.node_columns:
+        # 直接读取原始值，SourceSpan 不解码
+        ig_G.vs[key] = [dict.get(v, key) for v in nodes]
 
     return ig_G
 
@@ -66,7 +117,8 @@ def export_community_info(partition, ig_G, output_filename):
 
                 # 获取所有属性
                 for attr in ig_G.vs[vertex_id].attributes():
-                    node_info["attributes"][attr] = ig_G.vs[vertex_id][attr]
+                    value = ig_G.vs[vertex_id][attr]
+                    node_info["attributes"][attr] = value.text() if isinstance(value, SourceSpan) else value
 
                 community_info[community_id]["nodes"].append(node_info)
 
@@ -5,10 +5,14 @@ import matplotlib.pyplot as plt
 from tqdm import tqdm
 import json
 import os
+import sys
 from pyvis.network import Network
 import streamlit.components.v1 as components
 import metis  # 导入 METIS 库
 
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'CodeGraph'))
+from edge_index import edge_relationships
+
 # 设置页面为宽屏布局
 st.set_page_config(layout="wide")
 
@@ -20,11 +24,14 @@ def load_graph_from_json(filename):
         graph_data = json.load(infile)
 
     vertices = [v['id'] if 'id' in v else f"node_{i}" for i, v in enumerate(graph_data['nodes'])]
-    edges = [(link['source'], link['target']) for link in graph_data['links']]
+    links = graph_data['links'] if 'links' in graph_data else graph_data['edges']
+    edges = [(link['source'], link['target']) for link in links]
 
     ig_G = ig.Graph(directed=True)
     ig_G.add_vertices(vertices)
     ig_G.add_edges(edges)
+    # 合并在同一条边上的全部关系
+    ig_G.es['relationships'] = [edge_relationships(link) for link in links]
     
     for i, v in enumerate(graph_data['nodes']):
         for key, value in v.items():
@@ -134,8 +141,8 @@ def plot_interactive_communities(ig_G, partition):
     for edge in ig_G.es:
         source = edge.source
         target = edge.target
-        relationship = edge['relationship'] if 'relationship' in edge.attributes() else "None"
-        net.add_edge(source, target, title=f"{relationship}", width=2)
+        relationships = edge['relationships'] if 'relationships' in edge.attributes() else []
+        net.add_edge(source, target, title=", ".join(relationships) or "None", width=2)
 
     options = {
         "nodes": {"borderWidth": 2, "size": 16},
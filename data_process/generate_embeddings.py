@@ -12,8 +12,10 @@ import socket
 current_dir = os.path.dirname(os.path.abspath(__file__))
 parent_dir = os.path.dirname(current_dir)
 sys.path.append(parent_dir)
+sys.path.append(os.path.join(parent_dir, 'CodeGraph'))
 
 from Agent.tools.model_server import start_model_server, stop_model_server, MODEL_SERVER_PORT
+from node_link_json import iter_nodes
 
 # 设置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -48,13 +50,8 @@ def process_graph(graph_file):
 
     logging.info(f"处理图文件: {graph_file}")
 
-    # 加载图
-    with open(graph_path, 'r') as f:
-        graph_data = json.load(f)
-    graph = nx.node_link_graph(graph_data)
-
-    # 获取所有函数节点
-    function_nodes = [(n, d) for n, d in graph.nodes(data=True) if d.get('type') == 'function']
+    # 流式读取所有函数节点及其源码，不加载其他节点和边
+    function_nodes = [(node.pop('id'), node) for node in iter_nodes(graph_path, fields=('code',), node_types={'function'})]
 
     embeddings = {}
     for node, data in tqdm(function_nodes, desc=f"生成 {base_name} 的嵌入"):
@@ -13,13 +13,30 @@ parent_dir = os.path.dirname(current_dir)
 sys.path.append(os.path.join(parent_dir, 'CodeGraph'))
 
 from code_graph import CodeGraph
-from parsers.contains_parser import ContainsParser
-from parsers.import_parser import ImportParser
-from parsers.call_parser import CallParser
-from lsp_client import LspClientWrapper
+from compact_graph import CompactCodeGraph
+from module_classifier import ModuleClassifier
+from parsers.repo_parser import RepoParser
+from lsp_client import LspService
+from graph_store import save_graph_store
+from graph_snapshot import save_graph_snapshot
+from node_link_json import save_node_link_json
 
 RESULTDIR = "./"
 MAX_WORKERS = 32  # 最大并行进程数
+PARSE_WORKERS = 1  # 单个代码库内部并行解析文件的进程数（大型代码库可以调大）
+PARSE_CACHE_DIR = os.path.join(RESULTDIR, "parse_cache")  # 逐文件解析缓存，重复构建时只重新解析变化的文件
+RESOLVER_BACKEND = "lsp"  # 查找定义的后端："lsp" 为 multilspy 语言服务器，"jedi" 为进程内的 jedi
+LSP_MAX_IN_FLIGHT = 16  # 批量查找定义时同时在途的 LSP 请求数上限
+LSP_POOL_SIZE = 1  # 每个工作进程的语言服务器个数（代码库之间已经由 MAX_WORKERS 个进程并行）
+LSP_REQUEST_TIMEOUT = 10.0  # 单个定义请求的期限（秒）
+LSP_REPO_BUDGET = 1800  # 每个代码库所有 LSP 请求的总时间预算（秒），用完后剩余调用点改用静态推测
+LSP_BREAKER_THRESHOLD = 5  # 连续超时达到该次数后熔断
+STATIC_RESOLVE = True  # 解析调用前先用作用域表静态消歧，只有无法静态确定的调用点才请求 LSP
+DISCOVERY_EXCLUDES = None  # 额外的排除规则（gitignore 语法），None 表示默认规则（.git、虚拟环境、缓存等）
+MAX_FILE_SIZE = 1024 * 1024  # 超过该大小（字节）的 Python 文件视为生成文件，不解析
+GRAPH_BACKEND = "networkx"  # 代码图后端："networkx" 为 CodeGraph（nx.DiGraph），"compact" 为 CompactCodeGraph（整数编号 + CSR 数组，内存约为三分之一）
+EXPORT_SNAPSHOT = True  # 同时保存二进制图快照（<repo>.snapshot），加载时整个文件 mmap，不需要解析 JSON，源码按需解码
+EXPORT_STORE = False  # 同时保存图存储（<repo>.store.json + <repo>.code.bin）；快照已覆盖其用途，加载时优先使用快照，默认不保存
 
 # 全局日志配置
 logging.basicConfig(level=logging.INFO, format='%(name)s - %(levelname)s - %(message)s')
@@ -29,12 +46,12 @@ logging.basicConfig(level=logging.INFO, format='%(name)s - %(levelname)s - %(mes
 def export_graph_to_json(graph: nx.DiGraph, output_path: str):
     """
     将 NetworkX 图导出为 JSON 格式并保存到文件。
+    逐个节点、逐条边流式写出，输出与 json.dump(nx.node_link_data(graph), f, indent=4) 相同，
+    不需要先构造包含全部源码的 node-link 字典。
     :param graph: NetworkX 的 DiGraph 对象
     :param output_path: 要保存的 JSON 文件路径
     """
-    graph_data = nx.node_link_data(graph)  # 将图转换为 node-link 格式的字典
-    with open(output_path, 'w') as f:
-        json.dump(graph_data, f, indent=4)  # 将图数据保存为 JSON 文件
+    save_node_link_json(graph, output_path)
     logging.info(f"Graph saved as JSON to: {output_path}")
 
 
@@ -45,46 +62,65 @@ def safe_glob(pattern):
         return []
 
 
-def generate_code_graph(repo_path):
+# 工作进程内的语言服务器管理器，由 _init_worker 在进程启动时创建，处理多个代码库时复用
+_lsp_service = None
+
+
+def _init_worker():
+    global _lsp_service
+    _lsp_service = LspService(pool_size=LSP_POOL_SIZE, max_in_flight=LSP_MAX_IN_FLIGHT,
+                              request_timeout=LSP_REQUEST_TIMEOUT, repo_budget=LSP_REPO_BUDGET,
+                              breaker_threshold=LSP_BREAKER_THRESHOLD, backend=RESOLVER_BACKEND)
+
+
+def generate_code_graph(repo_path, parse_workers=PARSE_WORKERS):
     """为给定的代码库生成 JSON 文件。"""
     repo_name = os.path.basename(os.path.normpath(repo_path))
     logging.info(f"Processing repository: {repo_name}")
 
-    # 第一步：解析 CONTAINS 关系
-    contains_parser = ContainsParser(repo_path, repo_name)
-    contains_parser.parse()
+    # 第一步：一次遍历代码库，同时解析 CONTAINS、IMPORT 关系并收集调用点
+    repo_parser = RepoParser(repo_path, repo_name, workers=parse_workers,
+                             cache_dir=os.path.join(PARSE_CACHE_DIR, repo_name), static_resolve=STATIC_RESOLVE,
+                             excludes=DISCOVERY_EXCLUDES, max_file_size=MAX_FILE_SIZE)
+    repo_parser.parse()
 
     # 构建代码图
-    code_graph = CodeGraph()
-    code_graph.build_graph_from_tree(contains_parser.root)
+    graph_class = CompactCodeGraph if GRAPH_BACKEND == "compact" else CodeGraph
+    code_graph = graph_class(ModuleClassifier(repo_parser.local_modules()))
+    code_graph.build_graph_from_tree(repo_parser.root)
 
-    # 第二步：解析 IMPORT 关系
-    import_parser = ImportParser(repo_path, repo_name)
-    import_parser.parse()
-    for import_data in import_parser.imports:
+    # 第二步：处理 IMPORT 关系
+    for import_data in repo_parser.imports:
         importer, imported_module = import_data
         code_graph.add_import(importer, imported_module)
 
     # 第三步：解析调用关系并启动 LSP 服务器
-    lsp_client = LspClientWrapper(repo_path)
-    lsp_client.start_server()
-
+    # 语言服务器由工作进程的 LspService 管理：切换代码库时重启到新的根目录，
+    # 请求涉及的文档在发送前一次性打开
+    if _lsp_service is None:
+        _init_worker()
     try:
-        call_parser = CallParser(repo_path, repo_name, code_graph, contains_parser.defined_symbols, lsp_client)
-        call_parser.parse()
-
-        for caller, callee in call_parser.calls:
-            code_graph.add_call(caller, callee)
-    finally:
-        lsp_client.stop_server()
+        lsp_client = _lsp_service.client_for(repo_path)
+        for caller, callee in repo_parser.resolve_calls(code_graph, lsp_client):
+            code_graph.add_call(caller, callee, **repo_parser.call_attributes(caller, callee))
+    except Exception:
+        # 服务器状态未知，下一个代码库重新启动
+        _lsp_service.close()
+        raise
 
     # 保存代码图为 JSON 文件
     os.makedirs(RESULTDIR, exist_ok=True)
     json_path = os.path.join(RESULTDIR, f"{repo_name}.json")
 
-    # NetworkX graph is stored in the code_graph object; let's assume it has an attribute that holds the DiGraph
-    nx_graph = code_graph.graph  # 假设 code_graph.graph 是 NetworkX 的 DiGraph 对象
+    # code_graph.graph 是 NetworkX 的 DiGraph 对象（compact 后端为只读的 DiGraph 视图）
+    nx_graph = code_graph.graph
     export_graph_to_json(nx_graph, json_path)
+    if EXPORT_STORE:
+        save_graph_store(nx_graph, json_path)
+    if EXPORT_SNAPSHOT:
+        save_graph_snapshot(nx_graph, json_path)
+    # 符号表单独保存，Agent 工具和 prompt 生成可以直接加载（SymbolIndex.load），不必重新解析代码库
+    repo_parser.defined_symbols.save(os.path.join(RESULTDIR, f"{repo_name}.symbols.json"))
 
 
 def process_repositories(base_dir):
@@ -99,7 +135,7 @@ def process_repositories(base_dir):
             repos.append(repo_path)
 
     # 使用进程池并发处理每个代码库，限制最大并发数为 MAX_WORKERS
-    with ProcessPoolExecutor(max_workers=MAX_WORKERS) as executor:
+    with ProcessPoolExecutor(max_workers=MAX_WORKERS, initializer=_init_worker) as executor:
         # 提交任务并返回未来对象
         future_to_repo = {executor.submit(generate_code_graph, repo_path): repo_path for repo_path in repos}
 
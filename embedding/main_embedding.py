@@ -2,6 +2,7 @@ import os
 import matplotlib.pyplot as plt
 import networkx as nx
 from code_graph import CodeGraph
+from edge_index import edge_relationships
 # from neo4j_utils import Neo4jHandler  # 引入 Neo4j 的工具类，注释掉
 from parsers.contains_parser import ContainsParser  # 引入包含关系的解析器
 from parsers.import_parser import ImportParser  # 引入 import 关系的解析器
@@ -24,7 +25,7 @@ def visualize_similar_subgraph(graph):
     可视化仅包含SIMILAR关系的子图，并将其保存为文件
     """
     # Extract SIMILAR relationships from the graph
-    similar_edges = [(u, v) for u, v, d in graph.edges(data=True) if d.get('relationship') == 'SIMILAR']
+    similar_edges = [(u, v) for u, v, d in graph.edges(data=True) if 'SIMILAR' in edge_relationships(d)]
     
     # Create a subgraph containing only the nodes and SIMILAR edges
     similar_subgraph = graph.edge_subgraph(similar_edges).copy()